@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmarks for pyoozie.
+
+Run all of them with ``python -m benchmarks -o results.json`` from the repository root, and compare two runs with
+``python -m benchmarks --compare old.json new.json``.
+"""
+
+__author__ = 'pavel'
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import argparse
+import json
+import sys
+
+from benchmarks import harness
+# importing the benchmark modules registers their benchmarks
+from benchmarks import bench_workflow, bench_client, bench_import, bench_records, bench_jobstore
+
+__author__ = 'pavel'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the pyoozie benchmarks',
+                                     epilog='Exits with 1 when a benchmark is over its budget or a comparison '
+                                            'finds a regression.')
+    parser.add_argument('-k', dest='pattern', help='only run the benchmarks matching this regular expression')
+    parser.add_argument('-o', '--output', help='write the results (JSON) to this file instead of stdout')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of timing repeats')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two results files')
+    parser.add_argument('--threshold', type=float, default=harness.DEFAULT_REGRESSION_THRESHOLD,
+                        help='ratio of median times above which a benchmark is a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        rows = harness.compare(harness.load_report(args.compare[0]), harness.load_report(args.compare[1]),
+                               args.threshold)
+        for name, old, new, ratio, regression in rows:
+            print '%-70s %.6fs -> %.6fs %6.2fx%s' % (name, old, new, ratio, ' REGRESSION' if regression else '')
+        return 1 if any(row[-1] for row in rows) else 0
+
+    report = harness.make_report(harness.run(args.pattern, args.repeat, sys.stderr))
+    if args.output:
+        harness.write_report(report, args.output)
+    else:
+        print json.dumps(report, indent=2, sort_keys=True)
+
+    over_budget = harness.over_budget(report['results'])
+    for name in over_budget:
+        sys.stderr.write('%s is over its budget\n' % name)
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+from benchmarks.harness import benchmark, percentile
+from pyoozie import utils
+from pyoozie.admission import AdmissionController
+from pyoozie.fakeserver import FakeOozieServer
+from pyoozie.oozie import Oozie
+
+__author__ = 'pavel'
+
+REQUESTS = 500
+
+
+@benchmark('oozie.get_job_information', concurrency=[1, 8])
+def get_job_information(concurrency):
+    with FakeOozieServer() as server:
+        client = server.client()
+        job_ids = [server.add_job() for _ in range(REQUESTS)]
+
+        def timed_call(job_id):
+            started = time.time()
+            client.get_job_information(job_id)
+            return time.time() - started
+
+        started = time.time()
+        results = utils.concurrent_map(timed_call, job_ids, concurrency)
+        elapsed = time.time() - started
+
+    latencies = sorted(latency for latency, error in results if error is None)
+    return {'unit': 'seconds', 'requests': REQUESTS, 'errors': REQUESTS - len(latencies),
+            'requests_per_second': REQUESTS / elapsed,
+            'latency_p50': percentile(latencies, 0.5), 'latency_p99': percentile(latencies, 0.99)}
+
+
+@benchmark('oozie.bulk_job_action', bulk_support=[True, False])
+def bulk_job_action(bulk_support):
+    with FakeOozieServer(job_duration=3600, bulk_support=bulk_support) as server:
+        client = server.client()
+        for _ in range(REQUESTS):
+            server.add_job(app_name='backfill')
+
+        started = time.time()
+        affected = client.bulk_job_action('kill', name='backfill')
+        elapsed = time.time() - started
+
+    return {'unit': 'seconds', 'jobs': affected, 'seconds': elapsed, 'requests': sum(server.request_counts.values()),
+            'requests_per_second': sum(server.request_counts.values()) / elapsed}
+
+
+@benchmark('oozie.admission', admission=[False, True])
+def admission_control(admission):
+    # a fan out far wider than the server's capacity
+    controller = AdmissionController(max_limit=64) if admission else None
+    with FakeOozieServer(latency=0.02, capacity=8) as server:
+        client = Oozie(server.host, server.port, admission=controller)
+        job_ids = [server.add_job() for _ in range(REQUESTS)]
+
+        started = time.time()
+        results = utils.concurrent_map(client.get_job_information, job_ids, 64)
+        elapsed = time.time() - started
+
+    succeeded = len([info for info, error in results if error is None])
+    return {'unit': 'seconds', 'requests': REQUESTS, 'errors': REQUESTS - succeeded,
+            'rejected_by_server': server.rejected_requests, 'requests_per_second': succeeded / elapsed}
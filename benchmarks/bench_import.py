@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import benchmark, percentile
+
+__author__ = 'pavel'
+
+REPEAT = 11
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds an import may add to the interpreter's startup time
+IMPORT_BUDGETS = {'client': 0.2, 'workflow': 0.1}
+
+IMPORT_STATEMENTS = {'client': 'import pyoozie; pyoozie.Oozie',
+                     'workflow': 'import pyoozie; pyoozie.workflow'}
+
+
+def _run_python(code):
+    return subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+
+
+def _median_run_time(code):
+    times = []
+    for _ in range(REPEAT):
+        started = time.time()
+        _run_python(code)
+        times.append(time.time() - started)
+    return percentile(sorted(times), 0.5)
+
+
+@benchmark('import', target=sorted(IMPORT_STATEMENTS))
+def import_time(target):
+    statement = IMPORT_STATEMENTS[target]
+    median = _median_run_time(statement) - _median_run_time('pass')
+    modules = _run_python("import sys; %s; print ' '.join(sorted(sys.modules))" % statement).split()
+    lxml_loaded = 'lxml' in modules
+    within_budget = median <= IMPORT_BUDGETS[target] and not (target == 'client' and lxml_loaded)
+    return {'unit': 'seconds', 'median': median, 'budget': IMPORT_BUDGETS[target], 'lxml_loaded': lxml_loaded,
+            'within_budget': within_budget}
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+from benchmarks.harness import benchmark
+from pyoozie.jobstore import JobStore
+from pyoozie.oozie import JobStatus
+from pyoozie.records import JobInfo
+
+__author__ = 'pavel'
+
+_STATUSES = (JobStatus.SUCCEEDED, JobStatus.SUCCEEDED, JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.KILLED,
+             JobStatus.RUNNING)
+
+
+def filled_store(size):
+    store = JobStore(':memory:')
+    now = time.time()
+    store.upsert([JobInfo('%07d-140101000000000-oozie-oozi-W' % i, 'app%d' % (i % 500), _STATUSES[i % len(_STATUSES)],
+                          'user%d' % (i % 20), created_time=now - i * 60, start_time=now - i * 60 + 1,
+                          end_time=now - i * 60 + 600, last_modified_time=now - i * 60 + 600)
+                  for i in range(size)])
+    return store
+
+
+@benchmark('jobstore.find', size=[100000], query=['status', 'app_name_last_day', 'user_limit'])
+def find(size, query):
+    store = filled_store(size)
+    day_ago = time.time() - 86400
+    queries = {'status': lambda: store.find(status=JobStatus.RUNNING, created_since=day_ago),
+               'app_name_last_day': lambda: store.find(app_name='app7', created_since=day_ago),
+               'user_limit': lambda: store.find(user='user3', limit=100)}
+    return queries[query]
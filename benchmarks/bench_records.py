@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import operator
+import sys
+
+from benchmarks.harness import benchmark
+from pyoozie.oozie import JobStatus
+from pyoozie.history import ActionHistory
+from pyoozie.records import JobInfo, parse_jobs, parse_time
+from pyoozie import stats
+
+__author__ = 'pavel'
+
+RECORDS = 10000
+ACTIONS_PER_JOB = 5
+_STATUSES = (JobStatus.RUNNING, JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.KILLED)
+
+
+def _time(seconds):
+    days, seconds = divmod(seconds, 86400)
+    return 'Wed, %02d Jan 2014 %02d:%02d:%02d GMT' % (1 + days % 28, seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def raw_jobs(count=RECORDS):
+    """
+    Jobs as decoded from the server's JSON responses
+    """
+    jobs = []
+    for i in range(count):
+        job_id = '%07d-140101000000000-oozie-oozi-W' % i
+        created = (i * 7919) % (86400 * 28)
+        jobs.append({'id': job_id, 'appName': 'app%d' % (i % 50), 'appPath': 'hdfs://nn/apps/app%d' % (i % 50),
+                     'status': _STATUSES[i % len(_STATUSES)], 'user': 'user%d' % (i % 5), 'run': 0,
+                     'parentId': None, 'createdTime': _time(created), 'startTime': _time(created + 1),
+                     'endTime': _time(created + 600), 'lastModTime': _time(created + 600),
+                     'actions': [{'id': '%s@action%d' % (job_id, a), 'name': 'action%d' % a, 'type': 'pig',
+                                  'status': 'OK', 'startTime': _time(created + a * 100),
+                                  'endTime': _time(created + a * 100 + 90), 'errorCode': None,
+                                  'errorMessage': None, 'externalId': 'job_%d_%d' % (i, a)}
+                                 for a in range(ACTIONS_PER_JOB)]})
+    # round trip through JSON so strings are shared the way the decoder shares them
+    return json.loads(json.dumps(jobs))
+
+
+def deep_size(obj, seen=None):
+    """
+    The bytes used by an object and everything it references (objects shared with seen are counted once)
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.iterkeys())
+            stack.extend(current.itervalues())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+        elif hasattr(current, '__slots__'):
+            stack.extend(getattr(current, slot) for slot in current.__slots__ if hasattr(current, slot))
+    return size
+
+
+@benchmark('records.memory_per_job', representation=['dict', 'record'])
+def memory_per_job(representation):
+    jobs = raw_jobs()
+    if representation == 'record':
+        records = parse_jobs(jobs)
+        del jobs
+        # strings shared by every record (e.g: interned statuses) are not counted
+        seen = set(id(s) for s in _STATUSES)
+        size = deep_size(records, seen)
+    else:
+        size = deep_size(jobs)
+    return {'unit': 'bytes', 'bytes_per_job': size / float(RECORDS), 'jobs': RECORDS}
+
+
+@benchmark('records.sort_by_created_time', representation=['dict', 'record'])
+def sort_by_created_time(representation):
+    jobs = raw_jobs()
+    if representation == 'record':
+        records = parse_jobs(jobs)
+        return lambda: sorted(records, key=operator.attrgetter('created_time'))
+    return lambda: sorted(jobs, key=lambda job: parse_time(job['createdTime']))
+
+
+@benchmark('records.filter_running_since', representation=['dict', 'record'])
+def filter_running_since(representation):
+    jobs = raw_jobs()
+    since = parse_time(_time(86400 * 14))
+    if representation == 'record':
+        records = parse_jobs(jobs)
+        return lambda: [r for r in records if r.status is JobStatus.RUNNING and r.created_time >= since]
+    return lambda: [job for job in jobs if job['status'] == JobStatus.RUNNING and
+                    parse_time(job['createdTime']) >= since]
+
+
+def action_history(count=RECORDS * 4):
+    history = ActionHistory()
+    for job in parse_jobs(raw_jobs(count)):
+        history.add_job(job)
+    return history
+
+
+@benchmark('records.action_stats', backend=['python', 'numpy'])
+def action_stats(backend):
+    if backend == 'numpy' and stats.numpy is None:
+        return {'unit': 'skipped', 'reason': 'numpy is not installed'}
+    history = action_history()
+    return lambda: stats.compute_stats(history, use_numpy=backend == 'numpy')
+
+
+@benchmark('records.action_history_memory', representation=['record', 'columns'])
+def action_history_memory(representation):
+    records = parse_jobs(raw_jobs())
+    if representation == 'record':
+        size = deep_size([job.actions for job in records], set(id(s) for s in _STATUSES))
+    else:
+        history = ActionHistory()
+        for job in records:
+            history.add_job(job)
+        size = sum(column.buffer_info()[1] * column.itemsize for column in
+                   (history.job_codes, history.app_codes, history.action_codes, history.status_codes,
+                    history.start_times, history.end_times))
+        size += deep_size([history.job_ids, history.app_names, history.action_names, history.statuses])
+    return {'unit': 'bytes', 'bytes_per_action': size / float(RECORDS * ACTIONS_PER_JOB),
+            'actions': RECORDS * ACTIONS_PER_JOB}
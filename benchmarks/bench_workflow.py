@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+
+from benchmarks.harness import benchmark
+from pyoozie import utils
+from pyoozie.configuration import ConfigurationLayer, LayeredConfiguration
+from pyoozie.workflow import (StartNode, EndNode, KillNode, ForkNode, JoinNode, PigAction, ShellAction, FsAction,
+                              Workflow, serialize_many)
+
+__author__ = 'pavel'
+
+SIZES = [10, 100, 1000]
+SHAPES = ['chain', 'wide', 'diamonds']
+
+
+def _properties(i):
+    return {'mapred.job.queue.name': 'default', 'mapred.reduce.tasks': '10', 'action.index': str(i)}
+
+
+def chain_workflow(size):
+    """
+    start -> action 1 -> ... -> action N -> end
+    """
+    kill = KillNode('kill')
+    node = EndNode('end')
+    for i in reversed(range(size)):
+        node = PigAction('pig%d' % i, node, kill, 'script%d.pig' % i, properties=_properties(i),
+                         params={'input': '/data/in%d' % i}, files=['/lib/udf.py'])
+    return Workflow('chain-%d' % size, StartNode(node))
+
+
+def wide_workflow(size):
+    """
+    start -> fork -> N parallel actions -> join -> end
+    """
+    kill = KillNode('kill')
+    join = JoinNode('join', EndNode('end'))
+    paths = [ShellAction('shell%d' % i, join, kill, 'run.sh', arguments=[str(i)], properties=_properties(i))
+             for i in range(size)]
+    return Workflow('wide-%d' % size, StartNode(ForkNode('fork', paths)))
+
+
+def diamonds_workflow(size):
+    """
+    start -> (fork -> 2 parallel actions -> join) * N/2 -> end
+    """
+    kill = KillNode('kill')
+    node = EndNode('end')
+    for i in reversed(range(size // 2)):
+        join = JoinNode('join%d' % i, node)
+        left = ShellAction('left%d' % i, join, kill, 'run.sh', properties=_properties(i))
+        right = PigAction('right%d' % i, join, kill, 'script.pig', properties=_properties(i))
+        node = ForkNode('fork%d' % i, [left, right])
+    return Workflow('diamonds-%d' % size, StartNode(node))
+
+
+WORKFLOW_BUILDERS = {'chain': chain_workflow, 'wide': wide_workflow, 'diamonds': diamonds_workflow}
+
+
+@benchmark('workflow.to_string', shape=SHAPES, size=SIZES)
+def workflow_to_string(shape, size):
+    workflow = WORKFLOW_BUILDERS[shape](size)
+    return workflow.to_string
+
+
+@benchmark('workflow.traversal', shape=SHAPES, size=SIZES)
+def workflow_traversal(shape, size):
+    workflow = WORKFLOW_BUILDERS[shape](size)
+    return workflow._collect_all_nodes
+
+
+@benchmark('workflow.freeze', shape=SHAPES, size=SIZES)
+def workflow_freeze(shape, size):
+    workflow = WORKFLOW_BUILDERS[shape](size)
+    return workflow.freeze
+
+
+@benchmark('workflow.frozen_to_xml', shape=SHAPES, size=SIZES)
+def frozen_workflow_to_xml(shape, size):
+    frozen = WORKFLOW_BUILDERS[shape](size).freeze()
+    return frozen.to_xml
+
+
+@benchmark('workflow.serialize_many', processes=[1, 2, 4])
+def workflow_serialize_many(processes):
+    # a deploy sized batch, the workflows are built in the workers
+    builders = [functools.partial(diamonds_workflow, 100)] * 200
+    return lambda: list(serialize_many(builders, processes))
+
+
+def shared_properties_workflow(size, representation):
+    """
+    A chain of actions sharing 200 base properties (a job-xml file), each with one property of its own
+    (mixed: layered properties, every tenth action is an FS action without properties)
+    """
+    base = dict(('base.property.%d' % i, 'value-%d' % i) for i in range(200))
+    layer = ConfigurationLayer(base, path='${wf:appPath()}/base.xml')
+    kill = KillNode('kill')
+    node = EndNode('end')
+    for i in reversed(range(size)):
+        if representation == 'mixed' and i % 10 == 0:
+            node = FsAction('fs%d' % i, node, kill, mkdir_paths=['/tmp/shared/%d' % i])
+            continue
+        if representation in ('layered', 'mixed'):
+            properties = LayeredConfiguration([layer], {'action.index': str(i)})
+        else:
+            properties = dict(base, **{'action.index': str(i)})
+        node = PigAction('pig%d' % i, node, kill, 'script%d.pig' % i, properties=properties)
+    return Workflow('shared-%d' % size, StartNode(node))
+
+
+@benchmark('workflow.shared_properties_to_string', representation=['dict', 'layered', 'mixed'])
+def shared_properties_to_string(representation):
+    return shared_properties_workflow(1000, representation).to_string
+
+
+@benchmark('utils.properties_to_config', size=[10, 1000, 10000])
+def properties_to_config(size):
+    properties = dict(('property.name.%d' % i, 'value-%d' % i) for i in range(size))
+    return lambda: utils.properties_to_config(properties)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import itertools
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+import timeit
+
+__author__ = 'pavel'
+
+# registered benchmarks as (name, setup function, params)
+BENCHMARKS = []
+
+# a benchmark whose median time grows by more than this ratio is reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 1.1
+
+
+def benchmark(name, **params):
+    """
+    Register a benchmark.
+    The decorated function is called with the params and returns either a function of no arguments to time,
+    or a dict of already measured metrics.
+    Every param is a list of values, the benchmark is registered once for every combination of values.
+
+    :param name: the name of the benchmark, the param values are appended to it
+    :type name: basestring
+    """
+    def register(setup):
+        names = sorted(params)
+        for values in itertools.product(*[params[n] for n in names]):
+            combination = dict(zip(names, values))
+            full_name = name + ''.join('[%s=%s]' % (n, combination[n]) for n in names)
+            BENCHMARKS.append((full_name, setup, combination))
+        return setup
+
+    return register
+
+
+def percentile(values, fraction):
+    """
+    :param values: sorted values
+    :param fraction: the percentile as a fraction (e.g: 0.99)
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def measure(func, repeat=5, min_repeat_time=0.05):
+    """
+    Time a function of no arguments.
+    The function is called enough times per repeat to take at least min_repeat_time seconds.
+
+    :return: timing metrics, times are in seconds per call
+    :rtype : dict
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_repeat_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_repeat_time / elapsed) + 1)
+
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    median = percentile(times, 0.5)
+    return {'unit': 'seconds', 'number': number, 'repeat': repeat,
+            'min': times[0], 'median': median, 'max': times[-1], 'mean': sum(times) / len(times),
+            'ops_per_second': 1.0 / median if median else None}
+
+
+def run(pattern=None, repeat=5, stream=None):
+    """
+    Run the registered benchmarks
+
+    :param pattern: only run the benchmarks whose name matches this regular expression
+    :param repeat: number of timing repeats
+    :param stream: where to report progress (e.g: sys.stderr)
+    :return: the metrics of every benchmark by name
+    :rtype : dict
+    """
+    results = {}
+    for name, setup, params in BENCHMARKS:
+        if pattern and not re.search(pattern, name):
+            continue
+        measured = setup(**params)
+        metrics = measured if isinstance(measured, dict) else measure(measured, repeat)
+        metrics['params'] = params
+        results[name] = metrics
+        if stream:
+            stream.write('%-70s %s\n' % (name, _summary(metrics)))
+    return results
+
+
+def _summary(metrics):
+    if 'median' in metrics:
+        return '%.6fs' % metrics['median']
+    return ' '.join('%s=%s' % (k, v) for k, v in sorted(metrics.iteritems()) if k != 'params')
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(results):
+    """
+    Wrap benchmark results with the information needed to compare them across commits
+    :rtype : dict
+    """
+    return {'commit': _git_commit(),
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': results}
+
+
+def _cost(metrics):
+    """
+    The seconds per operation of a benchmark, either timed by the harness or measured as a request rate
+    """
+    if metrics.get('median'):
+        return metrics['median']
+    if metrics.get('requests_per_second'):
+        return 1.0 / metrics['requests_per_second']
+    return None
+
+
+def compare(old_report, new_report, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compare the seconds per operation of two reports
+
+    :return: (name, old seconds, new seconds, ratio, is regression) for every benchmark in both reports
+    :rtype : list[tuple]
+    """
+    rows = []
+    old_results, new_results = old_report['results'], new_report['results']
+    for name in sorted(set(old_results) & set(new_results)):
+        old, new = _cost(old_results[name]), _cost(new_results[name])
+        if not old or not new:
+            continue
+        ratio = new / old
+        rows.append((name, old, new, ratio, ratio > threshold))
+    return rows
+
+
+def over_budget(results):
+    """
+    :return: the names of the benchmarks that report exceeding their budget
+    :rtype : list[basestring]
+    """
+    return sorted(name for name, metrics in results.iteritems() if metrics.get('within_budget') is False)
+
+
+def load_report(path):
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def write_report(report, path):
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
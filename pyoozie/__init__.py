@@ -15,10 +15,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import errors
-import utils
-import workflow
-from oozie import Oozie
+"""
+The submodules of pyoozie are imported on first access (e.g: pyoozie.workflow or pyoozie.Oozie),
+so a script that only uses the client does not pay for importing lxml.
+"""
+import importlib
+import sys
+import types
 
 __author__ = 'pavel'
 __all__ = ['Oozie']
+
+_SUBMODULES = ('errors', 'utils', 'workflow', 'builder', 'oozie', 'records', 'jobstore', 'instrumentation',
+               'admission', 'federation', 'scheduler', 'logs', 'sla', 'history', 'stats', 'splitter', 'configuration',
+               'notifications', 'fakeserver', 'cli')
+
+# attributes of the package and the submodule defining them
+_ATTRIBUTES = {'Oozie': 'oozie'}
+
+
+class _LazyPackage(types.ModuleType):
+    def __getattr__(self, name):
+        if name in _ATTRIBUTES:
+            value = getattr(importlib.import_module('%s.%s' % (__name__, _ATTRIBUTES[name])), name)
+        elif name in _SUBMODULES:
+            value = importlib.import_module('%s.%s' % (__name__, name))
+        else:
+            raise AttributeError("'module' object has no attribute '%s'" % name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_SUBMODULES) | set(_ATTRIBUTES))
+
+
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update(globals())
+# the replaced module must stay alive, python 2 clears the globals of a module once it is deleted
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
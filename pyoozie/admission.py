@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Client side admission control, protecting the oozie server from the clients fanning out requests to it.
+
+An AdmissionController limits the number of requests in flight with AIMD (additive increase, multiplicative
+decrease): every successful response raises the limit by about one per round trip, and an overloaded response
+(a 5xx, a 429, a connection error or a response slower than the latency target) halves it. Token buckets can
+additionally cap the request rate of every endpoint class. One controller is shared by all the threads of a client,
+and can be shared by several clients of the same server::
+
+    admission = AdmissionController(max_limit=64, rate_limits={EndpointClass.WRITE: 20})
+    client = Oozie('oozie-host', admission=admission)
+    client.bulk_job_action(JobAction.KILL, name='backfill')  # runs as fast as the server sustains
+"""
+import threading
+import time
+
+__author__ = 'pavel'
+__all__ = ['EndpointClass', 'TokenBucket', 'AdmissionController']
+
+
+class EndpointClass:
+    # job information, listings and logs
+    READ = 'read'
+    # submissions, job actions and reruns
+    WRITE = 'write'
+    # the admin end points
+    ADMIN = 'admin'
+
+
+class TokenBucket(object):
+    def __init__(self, rate, burst=None):
+        """
+        Limit the rate of requests, allowing bursts
+
+        :param rate: requests per second
+        :type rate: float
+        :param burst: maximal number of requests at once, rate by default
+        :type burst: float
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting for one if the bucket is empty
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdmissionController(object):
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=64, latency_target=None, backoff=0.5,
+                 rate_limits=None, max_retries=3, retry_delay=0.5):
+        """
+        Create an admission controller
+
+        :param initial_limit: the number of requests allowed in flight at first
+        :param min_limit: the limit never drops below it
+        :param max_limit: the limit never rises above it, also the number of threads bulk operations use
+        :type max_limit: int
+        :param latency_target: seconds, a slower response counts as overloaded (ignored if None)
+        :type latency_target: float
+        :param backoff: the factor the limit is multiplied by on overload
+        :type backoff: float
+        :param rate_limits: maximal requests per second by endpoint class (see EndpointClass)
+        :type rate_limits: dict[str, float]
+        :param max_retries: number of times a request answered with 503 (service unavailable) is sent again
+        :type max_retries: int
+        :param retry_delay: seconds to wait before the first retry, doubled on every retry
+        :type retry_delay: float
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.buckets = dict((endpoint_class, TokenBucket(rate))
+                            for endpoint_class, rate in (rate_limits or {}).iteritems())
+        self.in_flight = 0
+        self.overloads = 0
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._last_decrease = 0.0
+        self._latency = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        :return: the number of requests currently allowed in flight
+        :rtype : int
+        """
+        return int(self._limit)
+
+    def acquire(self, endpoint_class=EndpointClass.READ):
+        """
+        Wait until a request may be sent, call release() once it is answered
+        """
+        bucket = self.buckets.get(endpoint_class)
+        if bucket is not None:
+            bucket.acquire()
+        with self._condition:
+            while self.in_flight >= int(self._limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, overloaded=False):
+        """
+        Account for an answered (or failed) request
+
+        :param latency: seconds the request took
+        :type latency: float
+        :param overloaded: whether the server answered as overloaded
+        :type overloaded: bool
+        """
+        overloaded = overloaded or (self.latency_target is not None and latency > self.latency_target)
+        now = time.time()
+        with self._condition:
+            self.in_flight -= 1
+            self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            if overloaded:
+                self.overloads += 1
+                # requests in flight together see the same overload, decrease once per round trip
+                if now - self._last_decrease >= self._latency:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
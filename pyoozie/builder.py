@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Build workflows from the data their actions read and write, with as much parallelism as oozie allows.
+
+Actions declare the HDFS paths they read and write. An action depends on the earlier actions writing what it reads,
+reading what it writes, or writing what it writes. The dependency DAG is decomposed into series and parallel blocks,
+the only shapes oozie's strictly nested fork/join nodes can express; where the DAG is not series-parallel a block
+boundary is added at the level that lengthens the critical path the least::
+
+    builder = DataflowBuilder('daily')
+    builder.add(PigAction('clean', None, None, 'clean.pig'), reads=['/raw/events'], writes=['/clean/events'])
+    builder.add(HiveAction('users', None, None, 'users.hql'), reads=['/raw/users'], writes=['/clean/users'])
+    builder.add(HiveAction('join', None, None, 'join.hql'), reads=['/clean/events', '/clean/users'],
+                writes=['/report'])
+    workflow = builder.build()
+    print builder.report()['speedup']
+"""
+import itertools
+
+from workflow import StartNode, EndNode, KillNode, ForkNode, JoinNode, Workflow
+
+__author__ = 'pavel'
+__all__ = ['DataflowBuilder']
+
+_ACTION, _SERIES, _PARALLEL = 'action', 'series', 'parallel'
+
+
+def _overlaps(path, other):
+    """
+    Whether two paths refer to the same data (the same path, or one is inside the other)
+    """
+    path, other = path.rstrip('/'), other.rstrip('/')
+    return path == other or path.startswith(other + '/') or other.startswith(path + '/')
+
+
+def _any_overlap(paths, others):
+    return any(_overlaps(path, other) for path in paths for other in others)
+
+
+def _critical_path(names, dependencies, durations):
+    """
+    The longest path of the DAG induced by names (a list in topological order)
+
+    :return: (length, names on the path)
+    """
+    finish, previous = {}, {}
+    for name in names:
+        upstream = [other for other in dependencies[name] if other in finish]
+        before = max(upstream, key=finish.get) if upstream else None
+        finish[name] = durations[name] + (finish[before] if before is not None else 0)
+        previous[name] = before
+    if not finish:
+        return 0, []
+    last = max(names, key=finish.get)
+    path = [last]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    return finish[last], path[::-1]
+
+
+class DataflowBuilder(object):
+    def __init__(self, name, kill=None, end=None, parameters=None):
+        """
+        Create a builder of a workflow
+
+        :param name: Name of the workflow
+        :param kill: the node every action transitions to on error, a KillNode named 'kill' by default
+        :type kill: KillNode
+        :param end: the end node, an EndNode named 'end' by default
+        :type end: EndNode
+        :param parameters: the parameters of the workflow
+        :type parameters: dict
+        """
+        self.name = name
+        self.kill = kill or KillNode('kill')
+        self.end = end or EndNode('end')
+        self.parameters = parameters
+        self._actions = []
+        self._reads = {}
+        self._writes = {}
+        self._durations = {}
+
+    def add(self, action, reads=(), writes=(), duration=1.0):
+        """
+        Add an action, its ok and error transitions are set by build()
+
+        :param action: the action
+        :type action: pyoozie.workflow.ActionNode
+        :param reads: the paths the action reads
+        :type reads: list[basestring]
+        :param writes: the paths the action writes (or deletes)
+        :type writes: list[basestring]
+        :param duration: estimated duration of the action (any unit), for the critical path
+        :type duration: float
+        :return: the action
+        :raise ValueError: if an action with the same name was added
+        """
+        if action.name in self._durations:
+            raise ValueError('an action named %s was already added' % action.name)
+        self._actions.append(action)
+        self._reads[action.name] = list(reads)
+        self._writes[action.name] = list(writes)
+        self._durations[action.name] = duration
+        return action
+
+    def get_dependencies(self):
+        """
+        :return: the names of the actions every action depends on by action name
+        :rtype : dict[str, set[str]]
+        """
+        dependencies = dict((action.name, set()) for action in self._actions)
+        for i, later in enumerate(self._actions):
+            reads, writes = self._reads[later.name], self._writes[later.name]
+            for earlier in self._actions[:i]:
+                if _any_overlap(self._writes[earlier.name], reads) or \
+                        _any_overlap(self._writes[earlier.name] + self._reads[earlier.name], writes):
+                    dependencies[later.name].add(earlier.name)
+        return dependencies
+
+    def build(self):
+        """
+        Build the workflow, setting the transitions of the actions
+
+        :rtype : pyoozie.workflow.Workflow
+        :raise ValueError: if no action was added
+        """
+        if not self._actions:
+            raise ValueError('workflow %s has no actions' % self.name)
+        actions = dict((action.name, action) for action in self._actions)
+        counter = itertools.count(1)
+
+        def emit(block, next_node):
+            kind, content = block
+            if kind == _ACTION:
+                action = actions[content]
+                action.ok, action.error = next_node, self.kill
+                return action
+            if kind == _SERIES:
+                for part in reversed(content):
+                    next_node = emit(part, next_node)
+                return next_node
+            number = next(counter)
+            join = JoinNode('join-%d' % number, next_node)
+            return ForkNode('fork-%d' % number, [emit(part, join) for part in content])
+
+        root = self._decompose([action.name for action in self._actions], self.get_dependencies())
+        return Workflow(self.name, StartNode(emit(root, self.end)), self.parameters)
+
+    def _decompose(self, names, dependencies):
+        """
+        Decompose the DAG induced by names (in topological order) to nested series and parallel blocks
+
+        :return: a block, (_ACTION, name), (_SERIES, [blocks]) or (_PARALLEL, [blocks])
+        """
+        if len(names) == 1:
+            return _ACTION, names[0]
+
+        components = self._components(names, dependencies)
+        if len(components) > 1:
+            return _PARALLEL, [self._decompose(component, dependencies) for component in components]
+
+        # a connected DAG runs as a series of blocks, split at the level costing the least parallelism
+        members = set(names)
+        levels = {}
+        for name in names:
+            levels[name] = 1 + max([levels[other] for other in dependencies[name] if other in members] or [-1])
+        best = None
+        for level in range(1, max(levels.itervalues()) + 1):
+            before = [name for name in names if levels[name] < level]
+            after = [name for name in names if levels[name] >= level]
+            cost = _critical_path(before, dependencies, self._durations)[0] + \
+                _critical_path(after, dependencies, self._durations)[0]
+            if best is None or cost < best[0]:
+                best = cost, before, after
+
+        blocks = []
+        for part in best[1:]:
+            block = self._decompose(part, dependencies)
+            blocks.extend(block[1] if block[0] == _SERIES else [block])
+        return _SERIES, blocks
+
+    @staticmethod
+    def _components(names, dependencies):
+        """
+        The weakly connected components of the DAG induced by names, each in topological order
+        """
+        members = set(names)
+        neighbours = dict((name, set()) for name in names)
+        for name in names:
+            for other in dependencies[name]:
+                if other in members:
+                    neighbours[name].add(other)
+                    neighbours[other].add(name)
+        component_of = {}
+        for name in names:
+            if name in component_of:
+                continue
+            stack = [name]
+            component_of[name] = name
+            while stack:
+                for other in neighbours[stack.pop()]:
+                    if other not in component_of:
+                        component_of[other] = name
+                        stack.append(other)
+        components = {}
+        for name in names:
+            components.setdefault(component_of[name], []).append(name)
+        return [components[name] for name in names if component_of[name] == name]
+
+    def report(self):
+        """
+        Compare the critical path of the actions with running them one after the other
+
+        :return: a dict of
+                 serial_length: the total duration of the actions,
+                 critical_path: the names of the actions on the longest dependency chain,
+                 critical_path_length: the duration of the longest dependency chain (the theoretical minimum),
+                 workflow_length: the duration of the longest chain of the built fork/join structure,
+                 speedup: serial_length / workflow_length
+        :rtype : dict
+        """
+        names = [action.name for action in self._actions]
+        dependencies = self.get_dependencies()
+        length, path = _critical_path(names, dependencies, self._durations)
+        workflow_length = self._block_length(self._decompose(names, dependencies)) if names else 0
+        serial_length = sum(self._durations.itervalues())
+        return {'serial_length': serial_length, 'critical_path': path, 'critical_path_length': length,
+                'workflow_length': workflow_length,
+                'speedup': float(serial_length) / workflow_length if workflow_length else None}
+
+    def _block_length(self, block):
+        kind, content = block
+        if kind == _ACTION:
+            return self._durations[content]
+        lengths = [self._block_length(part) for part in content]
+        return sum(lengths) if kind == _SERIES else max(lengths)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A command line tool for oozie, built on the Oozie client.
+
+Every command writes JSON lines to the standard output as results arrive, e.g::
+
+    pyoozie --oozie http://oozie-host:11000/oozie status 0000001-140101000000000-oozie-oozi-W ...
+    pyoozie kill --name nightly-backfill --status RUNNING
+    pyoozie submit job.properties -D queue=etl --start
+    pyoozie log 0000001-140101000000000-oozie-oozi-W --follow
+
+Job ids can also be read from the standard input by passing '-' instead of ids.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urlparse
+
+import utils
+from oozie import Oozie, JobAction, JobType, FINAL_JOB_STATUSES
+
+__author__ = 'pavel'
+
+DEFAULT_OOZIE_URL = 'http://localhost:11000/oozie'
+DEFAULT_INTERVAL = 10
+DEFAULT_RETRIES = 3
+
+
+def _emit(record):
+    sys.stdout.write(json.dumps(record, sort_keys=True) + '\n')
+    sys.stdout.flush()
+
+
+def _emit_error(record, error):
+    record['error'] = str(error)
+    _emit(record)
+
+
+def _client(url):
+    parsed = urlparse.urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('invalid oozie URL %s (e.g: %s)' % (url, DEFAULT_OOZIE_URL))
+    return Oozie(parsed.hostname, parsed.port or 11000, scheme=parsed.scheme, path=parsed.path.rstrip('/') or '/oozie')
+
+
+def _job_ids(ids):
+    if ids == ['-']:
+        return [line.strip() for line in sys.stdin if line.strip()]
+    return ids
+
+
+def _info(client, args):
+    job_ids = _job_ids(args.ids)
+    failed = False
+    for job_id, info, error in utils.iter_concurrent_map(client.get_job_information, job_ids, args.concurrency):
+        if error is not None:
+            _emit_error({'id': job_id}, error)
+            failed = True
+        elif args.command == 'status':
+            _emit({'id': job_id, 'status': info['status']})
+        else:
+            _emit({'id': job_id, 'info': info})
+    return failed
+
+
+def _watch(client, args):
+    pending = _job_ids(args.ids)
+    statuses = {}
+    # consecutive errors by job id, a job is given up after more than args.retries
+    errors = {}
+    failed = False
+    while pending:
+        for job_id, info, error in utils.iter_concurrent_map(client.get_job_information, pending, args.concurrency):
+            if error is not None:
+                errors[job_id] = errors.get(job_id, 0) + 1
+                _emit_error({'id': job_id, 'time': time.time(), 'retry': errors[job_id] <= args.retries}, error)
+                failed = failed or errors[job_id] > args.retries
+                continue
+            errors.pop(job_id, None)
+            if statuses.get(job_id) != info['status']:
+                statuses[job_id] = info['status']
+                _emit({'id': job_id, 'status': info['status'], 'time': time.time()})
+        pending = [job_id for job_id in pending if statuses.get(job_id) not in FINAL_JOB_STATUSES and
+                   errors.get(job_id, 0) <= args.retries]
+        if pending:
+            time.sleep(args.interval)
+    return failed
+
+
+def _log(client, args):
+    # oozie can not tail a log, following a log fetches it again and skips the lines already written
+    written = 0
+    while True:
+        for i, line in enumerate(client.iter_job_log(args.id)):
+            if i < written:
+                continue
+            written += 1
+            if args.raw:
+                sys.stdout.write(line + '\n')
+            else:
+                _emit({'id': args.id, 'line': line})
+        sys.stdout.flush()
+        if not args.follow or client.get_job_information(args.id)['status'] in FINAL_JOB_STATUSES:
+            return False
+        time.sleep(args.interval)
+
+
+def _job_action(client, args):
+    if args.ids:
+        job_ids = _job_ids(args.ids)
+        failed = False
+        results = utils.iter_concurrent_map(lambda job_id: client.do_job_action(job_id, args.command), job_ids,
+                                            args.concurrency)
+        for job_id, _, error in results:
+            if error is not None:
+                _emit_error({'id': job_id, 'action': args.command}, error)
+                failed = True
+            else:
+                _emit({'id': job_id, 'action': args.command})
+        return failed
+
+    affected = client.bulk_job_action(args.command, args.type, args.name, args.user, args.status, args.since,
+                                      args.until, concurrency=args.concurrency)
+    _emit({'action': args.command, 'affected': affected})
+    return False
+
+
+def _submit(client, args):
+    properties = utils.load_properties(args.properties)
+    for definition in args.define:
+        name, _, value = definition.partition('=')
+        properties[name] = value
+    job_id = client.create_job(properties)
+    if args.start:
+        client.do_job_action(job_id, JobAction.START)
+    _emit({'id': job_id, 'started': args.start})
+    return False
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='pyoozie', description='Oozie command line tool (JSON lines output)')
+    parser.add_argument('--oozie', default=os.environ.get('OOZIE_URL', DEFAULT_OOZIE_URL),
+                        help='oozie URL (default: $OOZIE_URL or %s)' % DEFAULT_OOZIE_URL)
+    parser.add_argument('--concurrency', type=int, default=utils.DEFAULT_CONCURRENCY,
+                        help='maximal number of concurrent requests')
+    commands = parser.add_subparsers(dest='command')
+
+    for name, description in (('info', 'job information'), ('status', 'job status')):
+        command = commands.add_parser(name, help=description)
+        command.add_argument('ids', nargs='+', help="job ids, or '-' to read them from the standard input")
+        command.set_defaults(handler=_info)
+
+    watch = commands.add_parser('watch', help='write every status change of jobs until they end')
+    watch.add_argument('ids', nargs='+', help="job ids, or '-' to read them from the standard input")
+    watch.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between polls')
+    watch.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                       help='consecutive errors polling a job before giving up on it')
+    watch.set_defaults(handler=_watch)
+
+    log = commands.add_parser('log', help='job log')
+    log.add_argument('id', help='job id')
+    log.add_argument('--follow', action='store_true', help='keep writing new lines until the job ends')
+    log.add_argument('--raw', action='store_true', help='write the log lines as they are instead of JSON')
+    log.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between polls')
+    log.set_defaults(handler=_log)
+
+    for name in (JobAction.KILL, JobAction.SUSPEND, JobAction.RESUME):
+        command = commands.add_parser(name, help='%s jobs by id or by filter' % name)
+        command.add_argument('ids', nargs='*', help="job ids, or '-' to read them from the standard input")
+        command.add_argument('--type', default=JobType.WORKFLOW,
+                             choices=(JobType.WORKFLOW, JobType.COORDINATOR, JobType.BUNDLE))
+        command.add_argument('--name', action='append', help='application name filter')
+        command.add_argument('--user', action='append', help='user filter')
+        command.add_argument('--status', action='append', help='status filter')
+        command.add_argument('--since', help='created at or after (e.g: 2014-01-01T00:00Z or -2d)')
+        command.add_argument('--until', help='created at or before (e.g: 2014-01-02T00:00Z or -1d)')
+        command.set_defaults(handler=_job_action)
+
+    submit = commands.add_parser('submit', help='submit a job from a properties file')
+    submit.add_argument('properties', help='a java properties file (e.g: job.properties)')
+    submit.add_argument('-D', dest='define', action='append', default=[], metavar='NAME=VALUE',
+                        help='set a property')
+    submit.add_argument('--start', action='store_true', help='start the job after submitting it')
+    submit.set_defaults(handler=_submit)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command line tool
+    :return: the exit code
+    :rtype : int
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.handler is _job_action and not args.ids and not (args.name or args.user or args.status or
+                                                            args.since or args.until):
+        parser.error('%s requires job ids or a filter' % args.command)
+    try:
+        return 1 if args.handler(_client(args.oozie), args) else 0
+    except Exception as e:
+        _emit_error({'command': args.command}, e)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Layered, copy-on-write configurations of actions.
+
+Properties shared by many actions are kept once, in immutable layers the actions' configurations reference; every
+configuration stores only its own overrides. A layer with a path is a job-xml file (uploaded with the workflow
+application) and is serialized as a job-xml element, otherwise only the overrides of an action are serialized
+(layers shared by all the actions of a workflow are hoisted to its global section)::
+
+    base = ConfigurationLayer(utils.load_properties('base.properties'), path='${nameNode}/apps/etl/base.xml')
+    actions = [PigAction('pig%d' % i, ..., properties=LayeredConfiguration([base], {'action.index': str(i)}))
+               for i in range(1000)]
+    upload('/apps/etl/base.xml', base.to_config())
+
+(a path relative to ${wf:appPath()} resolves in the directory of every sub-workflow, see pyoozie.splitter)
+"""
+import collections
+import itertools
+
+import utils
+
+__author__ = 'pavel'
+__all__ = ['ConfigurationLayer', 'LayeredConfiguration']
+
+_MISSING = object()
+
+
+class ConfigurationLayer(collections.Mapping):
+    def __init__(self, properties, path=None, name=None):
+        """
+        An immutable set of properties shared by configurations
+
+        :param properties: the properties of the layer (copied)
+        :type properties: dict
+        :param path: the path (in hdfs) of a job-xml file holding the properties, they are then referenced
+                     instead of serialized (see to_config)
+        :type path: basestring
+        :param name: a name for debugging
+        """
+        self._properties = dict(properties)
+        self.path = path
+        self.name = name
+
+    def __getitem__(self, name):
+        return self._properties[name]
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __contains__(self, name):
+        return name in self._properties
+
+    def __hash__(self):
+        return id(self)
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def to_config(self):
+        """
+        :return: the job-xml file of the layer
+        :rtype : basestring
+        """
+        return utils.properties_to_config(self._properties)
+
+    def __repr__(self):
+        return 'ConfigurationLayer(name=%r, path=%r, properties=%d)' % (self.name, self.path, len(self))
+
+
+class LayeredConfiguration(collections.MutableMapping):
+    def __init__(self, layers=(), overrides=None):
+        """
+        A configuration made of shared layers (later layers override earlier ones) and its own overrides.
+        Setting a property only changes the overrides, the layers are never copied.
+
+        :param layers: the shared layers, the base layer first
+        :type layers: list[ConfigurationLayer]
+        :param overrides: properties overriding the layers
+        :type overrides: dict
+        """
+        self.layers = tuple(layers)
+        # created on the first override
+        self._overrides = dict(overrides) if overrides else None
+
+    @property
+    def overrides(self):
+        """
+        :rtype : dict
+        """
+        return self._overrides or {}
+
+    def __getitem__(self, name):
+        if self._overrides and name in self._overrides:
+            return self._overrides[name]
+        for layer in reversed(self.layers):
+            if name in layer:
+                return layer[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        if self._overrides is None:
+            self._overrides = {}
+        self._overrides[name] = value
+
+    def __delitem__(self, name):
+        """
+        Remove an override, a property of a shared layer can not be removed
+        """
+        if name in self.overrides:
+            del self._overrides[name]
+        elif name in self:
+            raise KeyError('%s is set by a shared layer and can only be overridden' % name)
+        else:
+            raise KeyError(name)
+
+    def __iter__(self):
+        seen = set()
+        for properties in itertools.chain([self.overrides], reversed(self.layers)):
+            for name in properties:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self):
+        if len(self.layers) == 1 and not self._overrides:
+            return len(self.layers[0])
+        return sum(1 for _ in self)
+
+    def __contains__(self, name):
+        return name in self.overrides or any(name in layer for layer in self.layers)
+
+    def __nonzero__(self):
+        # without counting the properties of the layers
+        return bool(self._overrides) or any(len(layer) for layer in self.layers)
+
+    def copy(self):
+        """
+        :return: a configuration sharing the layers, with a copy of the overrides
+        :rtype : LayeredConfiguration
+        """
+        return LayeredConfiguration(self.layers, self._overrides)
+
+    def _local_layers(self, provided):
+        """
+        The layers after the longest prefix of the layers that the provided configuration also has
+        """
+        provided_layers = provided.layers if isinstance(provided, LayeredConfiguration) else ()
+        count = 0
+        while (count < len(self.layers) and count < len(provided_layers) and
+               self.layers[count] is provided_layers[count]):
+            count += 1
+        return self.layers[count:]
+
+    def get_job_xmls(self, provided=None):
+        """
+        :param provided: the properties already provided (e.g: by the global section), their layers are skipped
+        :return: the paths of the layers serialized as job-xml elements
+        :rtype : list[basestring]
+        """
+        return [layer.path for layer in self._local_layers(provided) if layer.path]
+
+    def get_local_properties(self, provided=None, job_xml=True):
+        """
+        Get the properties that must be serialized: the properties of the layers that are not provided and
+        have no path, and the overrides, unless they are already set to the same value.
+        The cost is of the overrides and the layers without a path, not of the provided layers.
+
+        :param provided: the properties already provided (e.g: by the global section)
+        :type provided: dict or LayeredConfiguration
+        :param job_xml: the layers with a path are serialized as job-xml elements (see get_job_xmls),
+                        otherwise their properties are serialized as well
+        :return: the properties, sorted by name (the same for equal configurations, even when unpickled)
+        :rtype : collections.OrderedDict
+        """
+        provided = {} if provided is None else provided
+        local_layers = self._local_layers(provided)
+        referenced = [layer for layer in local_layers if layer.path and job_xml]
+
+        names = set(self.overrides)
+        if isinstance(provided, LayeredConfiguration):
+            # the provided configuration may override its own layers
+            names.update(provided.overrides)
+        for layer in local_layers:
+            if not (layer.path and job_xml):
+                names.update(layer)
+
+        properties = collections.OrderedDict()
+        for name in sorted(names):
+            value = self[name]
+            # the value the server would have without this configuration
+            current = provided.get(name, _MISSING)
+            for layer in reversed(referenced):
+                if name in layer:
+                    current = layer[name]
+                    break
+            if value != current:
+                properties[name] = value
+        return properties
+
+    def __repr__(self):
+        return 'LayeredConfiguration(layers=%r, overrides=%r)' % (self.layers, self.overrides)
@@ -0,0 +1,679 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+An in-process fake Oozie server for load and lifecycle testing.
+
+The server implements the REST end points used by pyoozie.oozie.Oozie and simulates the life cycle of workflow,
+coordinator and bundle jobs with configurable durations, latency and injected errors::
+
+    with FakeOozieServer(job_duration=0.5, latency=0.01, error_rate=0.05) as server:
+        client = server.client()
+        job_id = client.create_job(utils.properties_to_config({'oozie.wf.application.path': '/apps/my-app'}))
+"""
+import BaseHTTPServer
+import SocketServer
+import calendar
+import email.utils
+import httplib
+import itertools
+import json
+import random
+import re
+import threading
+import socket
+import time
+import urllib2
+import urlparse
+
+import utils
+from notifications import WORKFLOW_NOTIFICATION_URL
+from oozie import Oozie, JobAction, JobType, RerunType, SystemStatus, JobStatus, ActionStatus, FINAL_JOB_STATUSES
+
+__author__ = 'pavel'
+__all__ = ['FakeOozieServer']
+
+
+_JOB_ID_SUFFIXES = {JobType.WORKFLOW: 'W', JobType.COORDINATOR: 'C', JobType.BUNDLE: 'B'}
+_APP_PATH_PROPERTIES = (('oozie.wf.application.path', JobType.WORKFLOW),
+                        ('oozie.coord.application.path', JobType.COORDINATOR),
+                        ('oozie.bundle.application.path', JobType.BUNDLE))
+_RELATIVE_TIME_PATTERN = re.compile(r'^-(\d+)([dhm])$')
+_RELATIVE_TIME_UNITS = {'d': 86400, 'h': 3600, 'm': 60}
+_LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _format_time(timestamp):
+    if timestamp is None:
+        return None
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+def _parse_filter_time(value, now):
+    match = _RELATIVE_TIME_PATTERN.match(value)
+    if match:
+        return now - int(match.group(1)) * _RELATIVE_TIME_UNITS[match.group(2)]
+    return calendar.timegm(time.strptime(value, utils.OOZIE_TIME_FORMAT))
+
+
+def _parse_filter(value):
+    """
+    Parse the filter parameter of the jobs end point to a dict of lists (e.g: {'status': ['RUNNING', 'PREP']})
+    """
+    terms = {}
+    for term in (value or '').split(';'):
+        if '=' in term:
+            name, term_value = term.split('=', 1)
+            terms.setdefault(name.lower(), []).append(term_value)
+    return terms
+
+
+class _FakeJob(object):
+    """
+    A simulated job. Its status is derived from the time it has been running, so no background thread is needed.
+    """
+
+    def __init__(self, job_id, job_type, app_name, user, conf, created_time, duration, fails, action_names,
+                 coordinator_actions, failing_coordinator_actions):
+        self.id = job_id
+        self.type = job_type
+        self.app_name = app_name
+        self.user = user
+        self.conf = conf
+        self.created_time = created_time
+        self.last_modified_time = created_time
+        self.duration = duration
+        self.fails = fails
+        self.action_names = action_names
+        self.status = JobStatus.PREP
+        self.run = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self.end_time = None
+        self.skip_nodes = set()
+        self.failing_coordinator_actions = failing_coordinator_actions
+        # coordinator actions as [status, started_at] by action number
+        self.coordinator_actions = dict((number, [JobStatus.PREP, None])
+                                        for number in range(1, coordinator_actions + 1))
+
+    def get_elapsed(self, now):
+        if self.status == JobStatus.RUNNING:
+            return now - self.started_at
+        return self.elapsed
+
+    def refresh(self, now):
+        if self.status == JobStatus.RUNNING and now - self.started_at >= self.duration:
+            self.status = JobStatus.FAILED if self.fails else JobStatus.SUCCEEDED
+            self.elapsed = self.duration
+            self.end_time = self.last_modified_time = self.started_at + self.duration
+        for number, action in self.coordinator_actions.iteritems():
+            if action[0] == JobStatus.RUNNING and now - action[1] >= self.duration:
+                action[0] = JobStatus.KILLED if number in self.failing_coordinator_actions else JobStatus.SUCCEEDED
+
+    def start(self, now):
+        self.status = JobStatus.RUNNING
+        self.started_at = now
+        self.elapsed = 0.0
+        self.end_time = None
+        self.last_modified_time = now
+        for action in self.coordinator_actions.itervalues():
+            if action[0] == JobStatus.PREP:
+                action[:] = [JobStatus.RUNNING, now]
+
+    def do_action(self, action, now):
+        """
+        :return: True if the action was applied
+        """
+        if action == JobAction.START and self.status == JobStatus.PREP:
+            self.start(now)
+        elif action == JobAction.SUSPEND and self.status in (JobStatus.PREP, JobStatus.RUNNING):
+            self.elapsed = self.get_elapsed(now)
+            self.status = JobStatus.SUSPENDED
+        elif action == JobAction.RESUME and self.status == JobStatus.SUSPENDED:
+            self.status = JobStatus.RUNNING
+            self.started_at = now - self.elapsed
+        elif action == JobAction.KILL and self.status not in FINAL_JOB_STATUSES:
+            self.elapsed = self.get_elapsed(now)
+            self.status = JobStatus.KILLED
+            self.end_time = now
+            for coordinator_action in self.coordinator_actions.itervalues():
+                if coordinator_action[0] not in FINAL_JOB_STATUSES:
+                    coordinator_action[0] = JobStatus.KILLED
+        elif action == JobAction.RERUN and self.status in FINAL_JOB_STATUSES:
+            self.run += 1
+            self.fails = False
+            self.start(now)
+        else:
+            return False
+        self.last_modified_time = now
+        return True
+
+    def get_action_statuses(self, now):
+        """
+        :return: (name, status, start time, end time) of every action that started
+        """
+        elapsed = self.get_elapsed(now)
+        if self.status == JobStatus.PREP:
+            return []
+        slot = float(self.duration) / len(self.action_names)
+        last = len(self.action_names) - 1
+        statuses = []
+        for i, name in enumerate(self.action_names):
+            started = i * slot
+            if started > elapsed:
+                break
+            start_time = (self.started_at or now) + started
+            if self.status == JobStatus.FAILED and i == last:
+                status = ActionStatus.ERROR
+            elif name in self.skip_nodes or self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED) or \
+                    started + slot <= elapsed:
+                status = ActionStatus.OK
+            elif self.status == JobStatus.KILLED:
+                status = ActionStatus.KILLED
+            else:
+                status = ActionStatus.RUNNING
+            end_time = None if status == ActionStatus.RUNNING else min(start_time + slot, self.end_time or now)
+            statuses.append((name, status, start_time, end_time))
+        return statuses
+
+    def to_summary(self):
+        """
+        The job as it appears in the jobs end point
+        """
+        if self.type == JobType.WORKFLOW:
+            return {'id': self.id, 'appName': self.app_name, 'appPath': self.conf.get('oozie.wf.application.path'),
+                    'status': self.status, 'user': self.user, 'group': None, 'acl': None, 'run': self.run,
+                    'parentId': None, 'externalId': None, 'consoleUrl': None, 'conf': None,
+                    'createdTime': _format_time(self.created_time), 'startTime': _format_time(self.started_at),
+                    'endTime': _format_time(self.end_time), 'lastModTime': _format_time(self.last_modified_time),
+                    'toString': 'Workflow id[%s] status[%s]' % (self.id, self.status), 'actions': []}
+        prefix = 'coord' if self.type == JobType.COORDINATOR else 'bundle'
+        return {prefix + 'JobId': self.id, prefix + 'JobName': self.app_name,
+                prefix + 'JobPath': self.conf.get('oozie.%s.application.path' % prefix),
+                'status': self.status, 'user': self.user, 'group': None, 'acl': None, 'conf': None,
+                'createdTime': _format_time(self.created_time), 'startTime': _format_time(self.started_at),
+                'endTime': _format_time(self.end_time), 'lastModTime': _format_time(self.last_modified_time),
+                'frequency': 1, 'timeUnit': 'DAY', 'toString': 'Coordinator application id[%s] status[%s]' %
+                                                              (self.id, self.status)}
+
+    def to_info(self, now, offset=1, length=None, statuses=None):
+        """
+        The job as it appears in the job end point (show=info)
+        """
+        info = self.to_summary()
+        info['conf'] = utils.properties_to_config(self.conf)
+        if self.type == JobType.WORKFLOW:
+            info['actions'] = [{'id': '%s@%s' % (self.id, name), 'name': name, 'type': 'pig', 'status': status,
+                                'startTime': _format_time(start_time), 'endTime': _format_time(end_time),
+                                'errorCode': 'JA018' if status == ActionStatus.ERROR else None,
+                                'errorMessage': 'Main class exit code [1]' if status == ActionStatus.ERROR else None,
+                                'externalId': None, 'transition': None, 'retries': 0}
+                               for name, status, start_time, end_time in self.get_action_statuses(now)]
+        elif self.type == JobType.COORDINATOR:
+            numbers = [number for number, (status, _) in sorted(self.coordinator_actions.iteritems())
+                       if not statuses or status in statuses]
+            page = numbers[offset - 1:offset - 1 + length] if length else numbers[offset - 1:]
+            info['total'] = len(numbers)
+            info['actions'] = [self._coordinator_action_info(number) for number in page]
+        else:
+            info['bundleCoordJobs'] = []
+        return info
+
+    def _coordinator_action_info(self, number):
+        status, started_at = self.coordinator_actions[number]
+        nominal_time = self.created_time + (number - 1) * 86400
+        return {'id': '%s@%d' % (self.id, number), 'actionNumber': number, 'coordJobId': self.id,
+                'status': status, 'nominalTime': _format_time(nominal_time),
+                'createdTime': _format_time(self.created_time), 'lastModifiedTime': _format_time(started_at),
+                'externalId': None, 'errorCode': None, 'errorMessage': None, 'missingDependencies': None}
+
+    def get_log(self, now):
+        lines = []
+        for name, status, start_time, end_time in self.get_action_statuses(now):
+            prefix = 'SERVER[fake] USER[%s] GROUP[-] TOKEN[] APP[%s] JOB[%s] ACTION[%s@%s]' % (
+                self.user, self.app_name, self.id, self.id, name)
+            lines.append('%s,000  INFO ActionStartXCommand:520 - %s Start action [%s@%s] with user-retry state : '
+                         'userRetryCount [0], userRetryMax [0], userRetryInterval [10]' %
+                         (time.strftime(_LOG_TIME_FORMAT, time.gmtime(start_time)), prefix, self.id, name))
+            if status == ActionStatus.ERROR:
+                lines.append('%s,000 ERROR ActionEndXCommand:517 - %s Main class exit code [1]\n'
+                             'java.lang.RuntimeException: Main class exit code [1]\n'
+                             '\tat org.apache.oozie.action.hadoop.LauncherMain.run(LauncherMain.java:42)' %
+                             (time.strftime(_LOG_TIME_FORMAT, time.gmtime(end_time)), prefix))
+            elif end_time is not None:
+                lines.append('%s,000  INFO ActionEndXCommand:520 - %s End action [%s@%s] status [%s]' %
+                             (time.strftime(_LOG_TIME_FORMAT, time.gmtime(end_time)), prefix, self.id, name,
+                              status))
+        return '\n'.join(lines) + '\n'
+
+    def get_definition(self):
+        nodes = ''.join('<action name="%s"><pig><script>%s.pig</script></pig><ok to="%s"/><error to="kill"/>'
+                        '</action>' % (name, name, next_name)
+                        for name, next_name in zip(self.action_names, self.action_names[1:] + ['end']))
+        return ('<workflow-app name="%s" xmlns="uri:oozie:workflow:0.4"><start to="%s"/>%s'
+                '<kill name="kill"><message>failed</message></kill><end name="end"/></workflow-app>' %
+                (self.app_name, self.action_names[0], nodes))
+
+
+class _FakeOozieHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        fake = self.server.fake
+        url = urlparse.urlparse(self.path)
+        params = dict((name, values[-1]) for name, values in urlparse.parse_qs(url.query).iteritems())
+        body = self.rfile.read(int(self.headers['Content-Length'])) if self.headers.get('Content-Length') else None
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = self._read_chunked()
+
+        started = time.time()
+        status, content, content_type = fake.handle(method, url.path, params, body)
+        fake.record_request(method, url.path, time.time() - started)
+
+        self.send_response(status)
+        if status >= httplib.BAD_REQUEST:
+            self.send_header('oozie-error-message', content)
+            content, content_type = '', 'text/plain'
+        elif not isinstance(content, basestring):
+            content, content_type = json.dumps(content), 'application/json;charset=UTF-8'
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(';')[0], 16)
+            if not size:
+                self.rfile.readline()
+                return ''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+
+class _ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class FakeOozieServer(object):
+    def __init__(self, host='127.0.0.1', port=0, job_duration=1.0, actions_per_job=3, coordinator_actions=10,
+                 failure_rate=0.0, latency=0.0, error_rate=0.0, error_status=httplib.SERVICE_UNAVAILABLE,
+                 bulk_support=True, notification_interval=0.1, capacity=None, seed=None):
+        """
+        Create a fake oozie server, call start() to serve requests
+
+        :param host: the address to listen on
+        :param port: the port to listen on (0 picks a free port)
+        :param job_duration: seconds a job (or a coordinator action) runs before it ends
+        :type job_duration: float
+        :param actions_per_job: number of actions in every workflow job
+        :type actions_per_job: int
+        :param coordinator_actions: number of actions materialized for every coordinator job
+        :type coordinator_actions: int
+        :param failure_rate: fraction of the workflow jobs that end FAILED
+        :type failure_rate: float
+        :param latency: seconds to wait before answering a request, or a function of no arguments returning them
+        :type latency: float or callable
+        :param error_rate: fraction of the requests answered with error_status
+        :type error_rate: float
+        :param error_status: the HTTP status of injected errors
+        :type error_status: int
+        :param bulk_support: whether actions on the jobs end point are supported
+        :type bulk_support: bool
+        :param notification_interval: seconds between checks for workflow status changes to notify
+                                      (jobs with an oozie.wf.workflow.notification.url property)
+        :type notification_interval: float
+        :param capacity: maximal number of requests served at once, the others are answered with 503
+                         (like an overloaded web tier), unlimited if None
+        :type capacity: int
+        :param seed: seed of the random failure and error injection
+        """
+        self.host = host
+        self.port = port
+        self.job_duration = job_duration
+        self.actions_per_job = actions_per_job
+        self.coordinator_action_count = coordinator_actions
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.bulk_support = bulk_support
+        self.notification_interval = notification_interval
+        self.capacity = capacity
+        self.rejected_requests = 0
+        self._in_flight = 0
+        self.notifications_sent = 0
+        self.system_mode = SystemStatus.NORMAL
+        self.jobs = {}
+        self.request_counts = {}
+        self.request_times = {}
+        self._ids = itertools.count(1)
+        self._id_stamp = time.strftime('%y%m%d%H%M%S000', time.gmtime())
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._server = None
+        self._threads = []
+        self._stopped = threading.Event()
+        # the last notified status of every job with a notification URL
+        self._notified_statuses = {}
+
+    def start(self):
+        """
+        Start serving requests in a background thread
+        :rtype : FakeOozieServer
+        """
+        self._server = _ThreadingHTTPServer((self.host, self.port), _FakeOozieHandler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._stopped.clear()
+        self._threads = [threading.Thread(target=self._server.serve_forever, name='fake-oozie-server'),
+                         threading.Thread(target=self._notify_forever, name='fake-oozie-notifier')]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._stopped.set()
+            self._server.shutdown()
+            self._server.server_close()
+            for thread in self._threads:
+                thread.join()
+            self._server, self._threads = None, []
+
+    def _notify_forever(self):
+        # like oozie, a notification that can not be delivered is lost
+        while not self._stopped.wait(self.notification_interval):
+            now = time.time()
+            urls = []
+            with self._lock:
+                for job in self.jobs.itervalues():
+                    url = job.conf.get(WORKFLOW_NOTIFICATION_URL)
+                    if url is None:
+                        continue
+                    job.refresh(now)
+                    if self._notified_statuses.get(job.id) != job.status:
+                        self._notified_statuses[job.id] = job.status
+                        urls.append(url.replace('$jobId', job.id).replace('$status', job.status))
+            for url in urls:
+                try:
+                    urllib2.urlopen(url, timeout=5).close()
+                    self.notifications_sent += 1
+                except (urllib2.URLError, socket.error):
+                    pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def base_uri(self):
+        return "http://{host}:{port}/oozie/v1/".format(host=self.host, port=self.port)
+
+    def client(self):
+        """
+        :return: a client of the fake server
+        :rtype : Oozie
+        """
+        return Oozie(self.host, self.port)
+
+    def add_job(self, properties=None, job_type=JobType.WORKFLOW, app_name='app', user='hdfs', start=True,
+                created_time=None):
+        """
+        Add a job directly, without a request (e.g: to load the server with many historical jobs)
+
+        :return: the id of the job
+        :rtype : basestring
+        """
+        now = time.time()
+        with self._lock:
+            job_id = '%07d-%s-oozie-oozi-%s' % (next(self._ids), self._id_stamp, _JOB_ID_SUFFIXES[job_type])
+            coordinator_actions = self.coordinator_action_count if job_type == JobType.COORDINATOR else 0
+            job = _FakeJob(job_id, job_type, app_name, user, dict(properties or {}),
+                           now if created_time is None else created_time, self.job_duration,
+                           self._random.random() < self.failure_rate,
+                           ['action%d' % i for i in range(max(1, self.actions_per_job))], coordinator_actions,
+                           set(n for n in range(1, coordinator_actions + 1)
+                               if self._random.random() < self.failure_rate))
+            if start:
+                job.start(now)
+            self.jobs[job_id] = job
+        return job_id
+
+    def record_request(self, method, path, elapsed):
+        key = '%s %s' % (method, self._endpoint(path))
+        with self._lock:
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+            self.request_times[key] = self.request_times.get(key, 0.0) + elapsed
+
+    @staticmethod
+    def _endpoint(path):
+        parts = path.strip('/').split('/')
+        return '/'.join(parts[2:4] if len(parts) > 2 and parts[2] == 'admin' else parts[2:3])
+
+    def handle(self, method, path, params, body):
+        """
+        Handle a request
+
+        :return: (HTTP status, content (a string or a JSON serializable object), content type)
+        """
+        if self.capacity is None:
+            return self._serve(method, path, params, body)
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected_requests += 1
+                return httplib.SERVICE_UNAVAILABLE, 'server overloaded', None
+            self._in_flight += 1
+        try:
+            return self._serve(method, path, params, body)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _serve(self, method, path, params, body):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status, 'injected error', None
+
+        parts = path.strip('/').split('/')
+        if len(parts) < 3 or parts[0] != 'oozie':
+            return httplib.NOT_FOUND, 'unknown end point %s' % path, None
+        resource = parts[2]
+        with self._lock:
+            if resource == 'jobs' and method == 'POST':
+                return self._create_job(params, body)
+            if resource == 'jobs' and method == 'GET':
+                return self._list_jobs(params)
+            if resource == 'jobs' and method == 'PUT':
+                return self._bulk_action(params)
+            if resource == 'job' and len(parts) == 4:
+                job = self.jobs.get(parts[3])
+                if job is None:
+                    return httplib.BAD_REQUEST, 'E0604: Job does not exist [%s]' % parts[3], None
+                job.refresh(time.time())
+                if method == 'GET':
+                    return self._show_job(job, params)
+                if method == 'PUT':
+                    return self._job_action(job, params, body)
+            if resource == 'admin' and len(parts) == 4:
+                return self._admin(method, parts[3], params)
+        return httplib.NOT_FOUND, 'unknown end point %s' % path, None
+
+    def _create_job(self, params, body):
+        properties = utils.config_to_properties(body) if body else {}
+        job_type, app_path = JobType.WORKFLOW, ''
+        for name, path_job_type in _APP_PATH_PROPERTIES:
+            if name in properties:
+                job_type, app_path = path_job_type, properties[name]
+        app_name = params.get('jobtype') or app_path.rstrip('/').split('/')[-1] or 'app'
+        # proxy submissions (pig, hive) and explicitly started jobs start right away
+        start = params.get('action') == JobAction.START or 'jobtype' in params
+        job_id = self.add_job(properties, job_type, app_name, properties.get('user.name', 'hdfs'), start)
+        return httplib.CREATED, {'id': job_id}, None
+
+    def _matching_jobs(self, params):
+        now = time.time()
+        job_type = params.get('jobtype', JobType.WORKFLOW)
+        terms = _parse_filter(params.get('filter'))
+        start_created = _parse_filter_time(terms['startcreatedtime'][-1], now) if 'startcreatedtime' in terms else None
+        end_created = _parse_filter_time(terms['endcreatedtime'][-1], now) if 'endcreatedtime' in terms else None
+        jobs = []
+        for job in self.jobs.itervalues():
+            job.refresh(now)
+            if job.type != job_type:
+                continue
+            if 'name' in terms and job.app_name not in terms['name']:
+                continue
+            if 'user' in terms and job.user not in terms['user']:
+                continue
+            if 'status' in terms and job.status not in terms['status']:
+                continue
+            if start_created is not None and job.created_time < start_created:
+                continue
+            if end_created is not None and job.created_time > end_created:
+                continue
+            jobs.append(job)
+        # oozie lists the most recently created jobs first
+        jobs.sort(key=lambda j: (j.created_time, j.id), reverse=True)
+        offset, length = int(params.get('offset', 1)), int(params.get('len', 50))
+        return job_type, len(jobs), jobs[offset - 1:offset - 1 + length]
+
+    def _jobs_response(self, job_type, total, jobs, params):
+        key = {JobType.WORKFLOW: 'workflows', JobType.COORDINATOR: 'coordinatorjobs',
+               JobType.BUNDLE: 'bundlejobs'}[job_type]
+        return {key: [job.to_summary() for job in jobs], 'total': total,
+                'offset': int(params.get('offset', 1)), 'len': int(params.get('len', 50))}
+
+    def _list_jobs(self, params):
+        job_type, total, jobs = self._matching_jobs(params)
+        return httplib.OK, self._jobs_response(job_type, total, jobs, params), None
+
+    def _bulk_action(self, params):
+        if not self.bulk_support:
+            return httplib.METHOD_NOT_ALLOWED, 'bulk actions are not supported', None
+        action = params.get('action')
+        if action not in (JobAction.KILL, JobAction.SUSPEND, JobAction.RESUME) or not params.get('filter'):
+            return httplib.BAD_REQUEST, 'E0420: Invalid jobs filter [%s]' % params.get('filter'), None
+        job_type, total, jobs = self._matching_jobs(params)
+        now = time.time()
+        # like oozie, the response lists the page of matching jobs, including those the action did not apply to
+        for job in jobs:
+            job.do_action(action, now)
+        return httplib.OK, self._jobs_response(job_type, total, jobs, params), None
+
+    def _show_job(self, job, params):
+        show = params.get('show', 'info')
+        now = time.time()
+        if show == 'info':
+            statuses = _parse_filter(params.get('filter')).get('status')
+            length = int(params['len']) if 'len' in params else None
+            return httplib.OK, job.to_info(now, int(params.get('offset', 1)), length, statuses), None
+        if show == 'definition':
+            return httplib.OK, job.get_definition(), 'application/xml;charset=UTF-8'
+        if show == 'log':
+            return httplib.OK, job.get_log(now), 'text/plain;charset=UTF-8'
+        return httplib.BAD_REQUEST, 'E0302: Invalid parameter [show=%s]' % show, None
+
+    def _job_action(self, job, params, body):
+        action = params.get('action')
+        now = time.time()
+        if action == JobAction.COORD_RERUN:
+            return self._coordinator_rerun(job, params, now)
+        if action == JobAction.RERUN and body:
+            properties = utils.config_to_properties(body)
+            job.skip_nodes = set(n for n in properties.get('oozie.wf.rerun.skip.nodes', '').split(',') if n)
+        if action in (JobAction.CHANGE, JobAction.DRYRUN):
+            return httplib.OK, {}, None
+        if not job.do_action(action, now):
+            return httplib.BAD_REQUEST, 'E1018: Can not %s job [%s] in status [%s]' % (action, job.id, job.status), \
+                None
+        return httplib.OK, {}, None
+
+    def _coordinator_rerun(self, job, params, now):
+        if job.type != JobType.COORDINATOR:
+            return httplib.BAD_REQUEST, 'E1018: [%s] is not a coordinator job' % job.id, None
+        numbers = set()
+        for term in params.get('scope', '').split(','):
+            if params.get('type') == RerunType.DATE:
+                bounds = [int((_parse_filter_time(t, now) - job.created_time) // 86400) + 1 for t in term.split('::')]
+            else:
+                bounds = [int(t) for t in term.split('-')]
+            numbers.update(range(bounds[0], bounds[-1] + 1))
+        numbers &= set(job.coordinator_actions)
+        if params.get('failed') == 'true':
+            numbers = set(n for n in numbers if job.coordinator_actions[n][0] in (JobStatus.FAILED, JobStatus.KILLED))
+        for number in numbers:
+            job.coordinator_actions[number] = [JobStatus.RUNNING, now]
+            job.failing_coordinator_actions.discard(number)
+        job.status = JobStatus.RUNNING
+        job.last_modified_time = now
+        return httplib.OK, {'coordinatoractions': [job._coordinator_action_info(n) for n in sorted(numbers)]}, None
+
+    def _admin(self, method, name, params):
+        if name == 'status':
+            if method == 'PUT':
+                self.system_mode = params.get('systemmode', self.system_mode)
+            return httplib.OK, {'systemMode': self.system_mode}, None
+        if name == 'build-version':
+            return httplib.OK, {'buildVersion': '4.1.0-fake'}, None
+        if name == 'available-timezones':
+            return httplib.OK, {'available-timezones': [{'timezoneDisplayName': 'GMT', 'timezoneId': 'GMT'}]}, None
+        if name == 'instrumentation':
+            return httplib.OK, self.get_instrumentation(), None
+        if name in ('configuration', 'os-env', 'java-sys-properties'):
+            return httplib.OK, {'fake.server': 'true'}, None
+        return httplib.NOT_FOUND, 'unknown admin end point %s' % name, None
+
+    def get_instrumentation(self):
+        """
+        The fake server's own request counters and timers, in the format of oozie's instrumentation
+        :rtype : dict
+        """
+        statuses = {}
+        for job in self.jobs.itervalues():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        counters = [{'name': key, 'value': count} for key, count in sorted(self.request_counts.iteritems())]
+        timers = []
+        for key, count in sorted(self.request_counts.iteritems()):
+            average = 1000.0 * self.request_times[key] / count
+            timers.append({'name': key, 'ticks': count, 'ownTimeAvg': average, 'totalTimeAvg': average,
+                           'ownMinTime': 0, 'ownMaxTime': 0, 'totalMinTime': 0, 'totalMaxTime': 0,
+                           'ownTimeStdDev': 0, 'totalTimeStdDev': 0})
+        return {'counters': [{'group': 'webservices', 'data': counters}],
+                'timers': [{'group': 'webservices', 'data': timers}],
+                'samplers': [{'group': 'jobs', 'data': [{'name': status, 'value': count}
+                                                        for status, count in sorted(statuses.iteritems())]}],
+                'variables': [{'group': 'oozie', 'data': [{'name': 'mode', 'value': self.system_mode}]}]}
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A client for several independent oozie clusters.
+
+Listings and filtered actions are sent to all the clusters concurrently and their results are merged, every job
+tagged with the name of its cluster. Calls on a single job are routed to the cluster that owns it::
+
+    federation = FederatedOozie({'east': Oozie('oozie-east'), 'west': Oozie('oozie-west')})
+    running = federation.get_jobs_information(status='RUNNING')
+    federation.do_job_action(running[0]['id'], JobAction.KILL)
+"""
+import errors
+import utils
+from oozie import JobType, _JOB_ID_KEYS
+from records import parse_time
+
+__author__ = 'pavel'
+__all__ = ['FederatedOozie']
+
+CLUSTER_KEY = 'cluster'
+
+
+def _routing_key(job_id):
+    """
+    The part of a job id identifying the server that created it
+    (e.g: 140101000000000-oozie-oozi of 0000001-140101000000000-oozie-oozi-W@action)
+    """
+    job_id = job_id.split('@', 1)[0]
+    return job_id.split('-', 1)[-1].rsplit('-', 1)[0]
+
+
+class FederatedOozie(object):
+    def __init__(self, clusters, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Create a client for several oozie clusters
+
+        :param clusters: the client of every cluster by cluster name
+        :type clusters: dict[str, pyoozie.Oozie]
+        :param concurrency: maximal number of concurrent requests per cluster for bulk lookups
+        :type concurrency: int
+        """
+        self.clusters = dict(clusters)
+        self.concurrency = concurrency
+        self._routes = {}
+
+    def _fan_out(self, func, ignore_errors=False):
+        """
+        Call func(cluster name, client) for all the clusters concurrently
+
+        :return: the result of every cluster by cluster name (clusters that failed are skipped if ignore_errors)
+        :rtype : dict
+        """
+        names = sorted(self.clusters)
+        results = utils.concurrent_map(lambda name: func(name, self.clusters[name]), names, len(names))
+        failed = [(name, error) for name, (_, error) in zip(names, results) if error is not None]
+        if failed and not ignore_errors:
+            raise errors.OozieError('; '.join('%s: %s' % (name, error) for name, error in failed))
+        return dict((name, result) for name, (result, error) in zip(names, results) if error is None)
+
+    def _learn_routes(self, cluster, job_ids):
+        for job_id in job_ids:
+            self._routes[_routing_key(job_id)] = cluster
+
+    def cluster_of(self, job_id):
+        """
+        Find the cluster owning a job.
+        Servers are learned from the jobs seen in listings, an unknown job is looked up on all the clusters.
+
+        :param job_id: a job id (or an action id)
+        :type job_id: basestring
+        :return: the name of the cluster
+        :rtype : str
+        :raise ValueError: if no cluster knows the job
+        """
+        key = _routing_key(job_id)
+        cluster = self._routes.get(key)
+        if cluster is None:
+            found = self._fan_out(lambda name, client: client.get_job_information(job_id.split('@', 1)[0]),
+                                  ignore_errors=True)
+            if not found:
+                raise ValueError('%s is a bad job id in all the clusters' % job_id)
+            cluster = self._routes[key] = sorted(found)[0]
+        return cluster
+
+    def client_of(self, job_id):
+        """
+        :return: the client of the cluster owning a job
+        :rtype : pyoozie.Oozie
+        """
+        return self.clusters[self.cluster_of(job_id)]
+
+    def get_jobs_information(self, job_type=JobType.WORKFLOW, name=None, user=None, status=None,
+                             start_created_time=None, end_created_time=None, length=None, ignore_errors=False,
+                             timezone='GMT'):
+        """
+        Retrieves the jobs matching a filter from all the clusters, the most recently created first.
+        Every job is tagged with the name of its cluster (under the 'cluster' key).
+        See Oozie.get_jobs_information for the filter arguments.
+
+        :param length: maximal number of jobs to retrieve, all the matching jobs if None
+        :type length: int
+        :param ignore_errors: return the jobs of the clusters that responded instead of raising an error
+        :type ignore_errors: bool
+        :rtype : list[dict]
+        :raise errors.OozieError: if a cluster failed and ignore_errors is not set
+        """
+        def list_jobs(cluster, client):
+            if length is None:
+                jobs = list(client.iter_jobs_information(job_type, name, user, status, start_created_time,
+                                                         end_created_time, timezone=timezone))
+            else:
+                jobs = client.get_jobs_information(job_type, name, user, status, start_created_time,
+                                                   end_created_time, length=length, timezone=timezone)
+            for job in jobs:
+                job[CLUSTER_KEY] = cluster
+            self._learn_routes(cluster, [job[_JOB_ID_KEYS[job_type]] for job in jobs])
+            return jobs
+
+        merged = [job for jobs in self._fan_out(list_jobs, ignore_errors).itervalues() for job in jobs]
+        merged.sort(key=lambda job: parse_time(job.get('createdTime')) or 0, reverse=True)
+        return merged if length is None else merged[:length]
+
+    def get_jobs_status(self, job_ids, timezone='GMT'):
+        """
+        Retrieves the information of many jobs, possibly owned by different clusters, concurrently.
+        Every job is tagged with the name of its cluster (under the 'cluster' key).
+
+        :param job_ids: The job ids
+        :type job_ids: list[basestring]
+        :return: the information of every job by id (jobs that could not be retrieved are missing)
+        :rtype : dict
+        """
+        job_ids = list(job_ids)
+
+        def get_job(job_id):
+            cluster = self.cluster_of(job_id)
+            info = self.clusters[cluster].get_job_information(job_id, timezone)
+            info[CLUSTER_KEY] = cluster
+            return info
+
+        results = utils.concurrent_map(get_job, job_ids, self.concurrency * len(self.clusters))
+        return dict((job_id, info) for job_id, (info, error) in zip(job_ids, results) if error is None)
+
+    def bulk_job_action(self, action, job_type=JobType.WORKFLOW, name=None, user=None, status=None,
+                        start_created_time=None, end_created_time=None, ignore_errors=False):
+        """
+        Kill, suspend or resume the jobs matching a filter in all the clusters.
+        See Oozie.bulk_job_action for the arguments.
+
+        :return: the number of jobs affected in every cluster by cluster name
+        :rtype : dict
+        """
+        return self._fan_out(lambda cluster, client: client.bulk_job_action(
+            action, job_type, name, user, status, start_created_time, end_created_time,
+            concurrency=self.concurrency), ignore_errors)
+
+    def do_jobs_action(self, job_ids, action, config=None):
+        """
+        Apply an action on many jobs, possibly owned by different clusters, concurrently.
+
+        :return: The ids of the jobs the action was applied on
+        :rtype : list[basestring]
+        """
+        job_ids = list(job_ids)
+        results = utils.concurrent_map(lambda job_id: self.do_job_action(job_id, action, config), job_ids,
+                                       self.concurrency * len(self.clusters))
+        return [job_id for job_id, (_, error) in zip(job_ids, results) if error is None]
+
+    def get_job_information(self, job_id, timezone='GMT'):
+        """
+        Retrieves the job information from the cluster owning the job, tagged with the name of the cluster.
+        :rtype : dict
+        """
+        cluster = self.cluster_of(job_id)
+        info = self.clusters[cluster].get_job_information(job_id, timezone)
+        info[CLUSTER_KEY] = cluster
+        return info
+
+    def do_job_action(self, job_id, action, config=None):
+        """
+        Apply an action on a job in the cluster owning it (see Oozie.do_job_action)
+        """
+        self.client_of(job_id).do_job_action(job_id, action, config)
+
+    def get_job_definition(self, job_id):
+        """
+        :rtype : basestring
+        """
+        return self.client_of(job_id).get_job_definition(job_id)
+
+    def get_job_log(self, job_id):
+        """
+        :rtype : basestring
+        """
+        return self.client_of(job_id).get_job_log(job_id)
+
+    def rerun_failed_nodes(self, job_id, properties=None, use_fail_nodes=False):
+        """
+        Rerun the failed nodes of a workflow job in the cluster owning it (see Oozie.rerun_failed_nodes)
+        :rtype : list[basestring]
+        """
+        return self.client_of(job_id).rerun_failed_nodes(job_id, properties, use_fail_nodes)
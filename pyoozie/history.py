@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A compact, columnar history of workflow action executions, collected from the oozie server.
+
+Every action execution is a row of fixed width columns held in typed arrays (the application, action name and status
+are codes into small string tables), so hundreds of thousands of executions take a few megabytes and can be handed
+to pyoozie.stats (or numpy) without copying::
+
+    history = ActionHistory.load('/var/cache/oozie-history.bin') if os.path.exists(path) else ActionHistory()
+    HistoryCollector(Oozie('oozie-host'), history).collect(since='-90d')
+    history.prune(time.time() - 90 * 86400)
+    history.save('/var/cache/oozie-history.bin')
+"""
+import array
+import json
+import os
+import tempfile
+
+import utils
+from oozie import JobType, JobStatus
+from records import JobInfo
+
+__author__ = 'pavel'
+__all__ = ['ActionHistory', 'HistoryCollector']
+
+_MISSING_TIME = float('nan')
+
+# name and type code of every column, in the order they are saved
+_COLUMNS = (('job_codes', 'i'), ('app_codes', 'i'), ('action_codes', 'i'), ('status_codes', 'i'),
+            ('start_times', 'd'), ('end_times', 'd'))
+
+_TABLES = ('job_ids', 'app_names', 'action_names', 'statuses')
+
+_FINAL_WORKFLOW_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.KILLED)
+
+
+class ActionHistory(object):
+    """
+    Action executions in columns: row i is the execution of action action_names[action_codes[i]] of job
+    job_ids[job_codes[i]] (an application app_names[app_codes[i]]), that ended in statuses[status_codes[i]].
+    Times are seconds since the epoch, NaN if the action did not start or end.
+    """
+
+    def __init__(self):
+        for name in _TABLES:
+            setattr(self, name, [])
+        for name, type_code in _COLUMNS:
+            setattr(self, name, array.array(type_code))
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self._indexes = tuple(dict((value, code) for code, value in enumerate(getattr(self, name)))
+                              for name in _TABLES)
+
+    def _code(self, table, value):
+        index = self._indexes[_TABLES.index(table)]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+            getattr(self, table).append(value)
+        return code
+
+    def __len__(self):
+        return len(self.start_times)
+
+    def __contains__(self, job_id):
+        return job_id in self._indexes[0]
+
+    def add_job(self, job):
+        """
+        Add the action executions of a job, a job that was already added is skipped
+
+        :param job: the job, with its actions
+        :type job: pyoozie.records.JobInfo
+        :return: the number of rows added
+        :rtype : int
+        """
+        if job.id in self or not job.actions:
+            return 0
+        job_code = self._code('job_ids', job.id)
+        app_code = self._code('app_names', job.app_name)
+        added = 0
+        for action in job.actions:
+            if action.start_time is None:
+                # a node that did not run (e.g: the branch that was not taken)
+                continue
+            self.job_codes.append(job_code)
+            self.app_codes.append(app_code)
+            self.action_codes.append(self._code('action_names', action.name))
+            self.status_codes.append(self._code('statuses', action.status))
+            self.start_times.append(action.start_time)
+            self.end_times.append(action.end_time if action.end_time is not None else _MISSING_TIME)
+            added += 1
+        return added
+
+    def prune(self, before):
+        """
+        Drop the executions that started before a time (e.g: to keep a rolling window of history)
+
+        :param before: seconds since the epoch
+        :type before: float
+        :return: the number of rows dropped
+        :rtype : int
+        """
+        keep = [i for i, start_time in enumerate(self.start_times) if start_time >= before]
+        dropped = len(self) - len(keep)
+        if dropped:
+            for name, type_code in _COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, array.array(type_code, [column[i] for i in keep]))
+            # forget the jobs with no executions left, so they can be collected again
+            job_codes = sorted(set(self.job_codes))
+            new_codes = dict((code, new_code) for new_code, code in enumerate(job_codes))
+            self.job_ids = [self.job_ids[code] for code in job_codes]
+            self.job_codes = array.array('i', [new_codes[code] for code in self.job_codes])
+            self._build_indexes()
+        return dropped
+
+    def save(self, path):
+        """
+        Save the history (atomically) in a binary file: a json header line with the string tables,
+        followed by the raw columns (in the native byte order)
+        """
+        header = dict((name, getattr(self, name)) for name in _TABLES)
+        header['rows'] = len(self)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(path))
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(json.dumps(header) + '\n')
+                for name, _ in _COLUMNS:
+                    getattr(self, name).tofile(temp_file)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.rename(temp_path, path)
+        except:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: a file written by save
+        :rtype : ActionHistory
+        """
+        history = cls()
+        with open(path, 'rb') as history_file:
+            header = json.loads(history_file.readline())
+            for name in _TABLES:
+                setattr(history, name, header[name])
+            for name, _ in _COLUMNS:
+                getattr(history, name).fromfile(history_file, header['rows'])
+        history._build_indexes()
+        return history
+
+
+class HistoryCollector(object):
+    def __init__(self, oozie, history=None, page_length=1000, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        :param oozie: the client to collect from
+        :type oozie: pyoozie.Oozie
+        :param history: the history to add to, a new one if None
+        :type history: ActionHistory
+        :param page_length: number of jobs to list per request
+        :type page_length: int
+        :param concurrency: maximal number of concurrent requests when retrieving the actions of the jobs
+        :type concurrency: int
+        """
+        self.oozie = oozie
+        self.history = history if history is not None else ActionHistory()
+        self.page_length = page_length
+        self.concurrency = concurrency
+        # job id -> the error retrieving the job in the last collect
+        self.errors = {}
+
+    def collect(self, since=None, until=None, name=None, user=None):
+        """
+        Add the actions of the finished workflow jobs created in a time range to the history.
+        Jobs already in the history are not retrieved again, so collecting repeatedly over the same range is cheap.
+
+        :param since: only jobs created at or after this time (UTC datetime or oozie time string, e.g: -90d)
+        :type since: datetime.datetime or basestring
+        :param until: only jobs created at or before this time (UTC datetime or oozie time string)
+        :type until: datetime.datetime or basestring
+        :param name: application name(s) of the jobs
+        :param user: user(s) that submitted the jobs
+        :return: the number of action executions added
+        :rtype : int
+        """
+        self.errors = {}
+        added = 0
+        offset = 1
+        # a page of jobs at a time, every job is added (and its JSON dropped) as soon as it is retrieved
+        while True:
+            jobs = self.oozie.get_jobs_information(JobType.WORKFLOW, name, user, list(_FINAL_WORKFLOW_STATUSES),
+                                                   since, until, offset, self.page_length)
+            job_ids = [job['id'] for job in jobs if job['id'] not in self.history]
+            for job_id, info, error in utils.iter_concurrent_map(self.oozie.get_job_information, job_ids,
+                                                                 self.concurrency):
+                if error is not None:
+                    self.errors[job_id] = error
+                else:
+                    added += self.history.add_job(JobInfo.from_json(info))
+            if len(jobs) < self.page_length:
+                break
+            offset += self.page_length
+        return added
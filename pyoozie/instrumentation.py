@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Periodic sampling of the oozie server's instrumentation.
+
+Oozie reports cumulative counters and timers. The sampler polls them on an interval and turns successive snapshots
+into per second rates and per interval timer averages, keeping a bounded history of every series::
+
+    sampler = InstrumentationSampler(Oozie('oozie-host'), interval=30).start()
+    ...
+    print sampler.to_prometheus()
+"""
+import collections
+import threading
+import time
+
+__author__ = 'pavel'
+__all__ = ['InstrumentationSampler', 'MetricKind']
+
+
+class MetricKind:
+    # cumulative value of a counter
+    COUNTER_TOTAL = 'counter_total'
+    # per second increase of a counter during the last interval
+    COUNTER_RATE = 'counter_rate'
+    # cumulative number of timed operations
+    TIMER_TICKS_TOTAL = 'timer_ticks_total'
+    # per second timed operations during the last interval
+    TIMER_RATE = 'timer_rate'
+    # average own time (in seconds) of the operations timed during the last interval, NaN if there were none
+    TIMER_INTERVAL_AVERAGE = 'timer_interval_average_seconds'
+    # current value of a sampler (e.g: a queue size)
+    SAMPLER = 'sampler'
+    # current value of a numeric variable
+    VARIABLE = 'variable'
+
+
+# the kinds exported to prometheus as counters, all the others are gauges
+_PROMETHEUS_COUNTERS = (MetricKind.COUNTER_TOTAL, MetricKind.TIMER_TICKS_TOTAL)
+
+
+def _entries(snapshot, section):
+    for group in snapshot.get(section) or []:
+        for entry in group.get('data') or []:
+            yield group.get('group'), entry
+
+
+def _flatten(snapshot):
+    """
+    :return: counters as {(group, name): value}, timers as {(group, name): (ticks, own average ms)},
+             and gauges as {(kind, group, name): value}
+    """
+    counters = dict(((group, entry['name']), entry['value']) for group, entry in _entries(snapshot, 'counters'))
+    timers = dict(((group, entry['name']), (entry.get('ticks', 0), entry.get('ownTimeAvg', 0.0)))
+                  for group, entry in _entries(snapshot, 'timers'))
+    gauges = {}
+    for section, kind in (('samplers', MetricKind.SAMPLER), ('variables', MetricKind.VARIABLE)):
+        for group, entry in _entries(snapshot, section):
+            if isinstance(entry.get('value'), (int, long, float)) and not isinstance(entry['value'], bool):
+                gauges[(kind, group, entry['name'])] = entry['value']
+    return counters, timers, gauges
+
+
+class InstrumentationSampler(object):
+    def __init__(self, oozie, interval=60, history=360):
+        """
+        Create a sampler of the oozie server's instrumentation
+
+        :param oozie: the client to poll
+        :type oozie: pyoozie.Oozie
+        :param interval: seconds between samples when running in the background
+        :type interval: float
+        :param history: number of samples to keep per series
+        :type history: int
+        """
+        self.oozie = oozie
+        self.interval = interval
+        self.history = history
+        self.last_error = None
+        self._series = {}
+        self._previous = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def sample(self, now=None, snapshot=None):
+        """
+        Take a sample of the instrumentation and add it to the series.
+        Rates and interval averages are only available from the second sample on.
+
+        :param now: the time of the sample (defaults to the current time)
+        :param snapshot: the instrumentation to sample (defaults to polling the server)
+        :type snapshot: dict
+        :return: the values of the sample as {(kind, group, name): value}
+        :rtype : dict
+        """
+        if snapshot is None:
+            snapshot = self.oozie.instrumentation
+        now = time.time() if now is None else now
+        counters, timers, values = _flatten(snapshot)
+
+        for (group, name), value in counters.iteritems():
+            values[(MetricKind.COUNTER_TOTAL, group, name)] = value
+        for (group, name), (ticks, _) in timers.iteritems():
+            values[(MetricKind.TIMER_TICKS_TOTAL, group, name)] = ticks
+
+        if self._previous is not None:
+            previous_time, previous_counters, previous_timers = self._previous
+            elapsed = now - previous_time
+            if elapsed > 0:
+                values.update(self._diff(elapsed, counters, timers, previous_counters, previous_timers))
+        self._previous = (now, counters, timers)
+
+        with self._lock:
+            for key, value in values.iteritems():
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = collections.deque(maxlen=self.history)
+                series.append((now, value))
+        return values
+
+    @staticmethod
+    def _diff(elapsed, counters, timers, previous_counters, previous_timers):
+        values = {}
+        for key, value in counters.iteritems():
+            previous = previous_counters.get(key, 0)
+            # a counter going down means the server restarted
+            increase = value - previous if value >= previous else value
+            values[(MetricKind.COUNTER_RATE,) + key] = increase / elapsed
+
+        for key, (ticks, average) in timers.iteritems():
+            previous_ticks, previous_average = previous_timers.get(key, (0, 0.0))
+            if ticks < previous_ticks:
+                previous_ticks, previous_average = 0, 0.0
+            interval_ticks = ticks - previous_ticks
+            values[(MetricKind.TIMER_RATE,) + key] = interval_ticks / elapsed
+            if interval_ticks:
+                interval_total = ticks * average - previous_ticks * previous_average
+                values[(MetricKind.TIMER_INTERVAL_AVERAGE,) + key] = interval_total / interval_ticks / 1000.0
+            else:
+                values[(MetricKind.TIMER_INTERVAL_AVERAGE,) + key] = float('nan')
+        return values
+
+    def series(self, kind, group, name):
+        """
+        :return: the (time, value) samples of a series, oldest first
+        :rtype : list[tuple]
+        """
+        with self._lock:
+            return list(self._series.get((kind, group, name), ()))
+
+    def latest(self):
+        """
+        :return: the last value of every series as {(kind, group, name): value}
+        :rtype : dict
+        """
+        with self._lock:
+            return dict((key, series[-1][1]) for key, series in self._series.iteritems() if series)
+
+    def start(self):
+        """
+        Start sampling in a background thread
+        :rtype : InstrumentationSampler
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='oozie-instrumentation-sampler')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            self._stopped.wait(self.interval)
+
+    def to_prometheus(self, prefix='oozie'):
+        """
+        Export the last value of every series in the prometheus text format
+
+        :param prefix: prefix of the metric names
+        :rtype : basestring
+        """
+        by_kind = collections.defaultdict(list)
+        for (kind, group, name), value in self.latest().iteritems():
+            by_kind[kind].append((group, name, value))
+
+        lines = []
+        for kind in sorted(by_kind):
+            metric = '%s_%s' % (prefix, kind)
+            lines.append('# TYPE %s %s' % (metric, 'counter' if kind in _PROMETHEUS_COUNTERS else 'gauge'))
+            for group, name, value in sorted(by_kind[kind]):
+                lines.append('%s{group="%s",name="%s"} %s' % (metric, _escape_label(group), _escape_label(name),
+                                                             _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value):
+    value = float(value)
+    return 'NaN' if value != value else repr(value)
+
+
+def _escape_label(value):
+    return unicode(value or '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
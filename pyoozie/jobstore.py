@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A persistent local index of oozie jobs, synced incrementally from the server.
+
+Dashboards and reports read jobs from the local store (indexed by status, user, application name and created time)
+instead of listing all the jobs from the server on every refresh::
+
+    store = JobStore('/var/cache/oozie-jobs.db', Oozie('oozie-host'))
+    store.sync()
+    failed = store.find(status=JobStatus.FAILED, created_since=time.time() - 86400)
+"""
+import datetime
+import sqlite3
+import threading
+
+import utils
+from oozie import JobType, JobStatus, FINAL_JOB_STATUSES
+from records import JobInfo
+
+__author__ = 'pavel'
+__all__ = ['JobStore']
+
+_COLUMNS = ('id', 'type', 'app_name', 'app_path', 'user', 'status', 'run', 'parent_id', 'created_time',
+            'start_time', 'end_time', 'last_modified_time')
+
+_COORDINATOR_IN_PROGRESS_STATUSES = (JobStatus.PREP, JobStatus.RUNNING, JobStatus.RUNNINGWITHERROR,
+                                     JobStatus.PREPSUSPENDED, JobStatus.SUSPENDED, JobStatus.SUSPENDEDWITHERROR,
+                                     JobStatus.PREPPAUSED, JobStatus.PAUSED, JobStatus.PAUSEDWITHERROR)
+
+# The non final statuses of every job type
+_IN_PROGRESS_STATUSES = {JobType.WORKFLOW: (JobStatus.PREP, JobStatus.RUNNING, JobStatus.SUSPENDED),
+                         JobType.COORDINATOR: _COORDINATOR_IN_PROGRESS_STATUSES,
+                         JobType.BUNDLE: _COORDINATOR_IN_PROGRESS_STATUSES}
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    app_name TEXT,
+    app_path TEXT,
+    user TEXT,
+    status TEXT,
+    run INTEGER,
+    parent_id TEXT,
+    created_time REAL,
+    start_time REAL,
+    end_time REAL,
+    last_modified_time REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_time);
+CREATE INDEX IF NOT EXISTS jobs_by_user ON jobs (user, created_time);
+CREATE INDEX IF NOT EXISTS jobs_by_app_name ON jobs (app_name, created_time);
+CREATE INDEX IF NOT EXISTS jobs_by_created_time ON jobs (created_time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    type TEXT PRIMARY KEY,
+    last_created_time REAL
+);
+'''
+
+
+class JobStore(object):
+    # seconds of already synced jobs to list again, oozie filters created times by the minute
+    DEFAULT_OVERLAP = 120
+
+    def __init__(self, path, oozie=None, job_types=(JobType.WORKFLOW, JobType.COORDINATOR, JobType.BUNDLE),
+                 page_length=1000, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Open (or create) a job store
+
+        :param path: path of the SQLite database (':memory:' for a store that is not persisted)
+        :type path: basestring
+        :param oozie: the client to sync from, not needed to only read the store
+        :type oozie: pyoozie.Oozie
+        :param job_types: the types of jobs to sync
+        :type job_types: list[str]
+        :param page_length: number of jobs to list per request when syncing
+        :type page_length: int
+        :param concurrency: maximal number of concurrent requests when refreshing jobs one by one
+        :type concurrency: int
+        """
+        self.path = path
+        self.oozie = oozie
+        self.job_types = job_types
+        self.page_length = page_length
+        self.concurrency = concurrency
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def sync(self, overlap=DEFAULT_OVERLAP):
+        """
+        Bring the store up to date with the server:
+        jobs created since the last sync are listed, and the jobs the store holds in a non final status
+        are refreshed in bulk.
+
+        :param overlap: seconds before the last synced created time to list again
+        :type overlap: int
+        :return: the number of jobs added or updated
+        :rtype : int
+        """
+        if self.oozie is None:
+            raise ValueError('syncing requires an oozie client')
+        updated = 0
+        for job_type in self.job_types:
+            listed = self._sync_new_jobs(job_type, overlap)
+            updated += len(listed) + self._refresh_jobs(job_type, listed)
+        return updated
+
+    def _sync_new_jobs(self, job_type, overlap):
+        last_created_time = self._get_last_created_time(job_type)
+        since = None
+        if last_created_time is not None:
+            since = datetime.datetime.utcfromtimestamp(last_created_time - overlap)
+        jobs = [JobInfo.from_json(job) for job in
+                self.oozie.iter_jobs_information(job_type, start_created_time=since, page_length=self.page_length)]
+        self.upsert(jobs)
+        return set(job.id for job in jobs)
+
+    def _refresh_jobs(self, job_type, listed):
+        with self._lock:
+            pending = set(row[0] for row in self._connection.execute(
+                'SELECT id FROM jobs WHERE type = ? AND status NOT IN (%s)' % ','.join('?' * len(FINAL_JOB_STATUSES)),
+                (job_type,) + FINAL_JOB_STATUSES)) - listed
+        if not pending:
+            return 0
+
+        # one listing returns every job still in progress, the others ended since the last sync
+        in_progress = [JobInfo.from_json(job) for job in
+                       self.oozie.iter_jobs_information(job_type, status=_IN_PROGRESS_STATUSES[job_type],
+                                                        page_length=self.page_length)]
+        changed = [job for job in in_progress if job.id in pending]
+        ended = pending - set(job.id for job in in_progress)
+        for info, error in utils.concurrent_map(self.oozie.get_job_information, sorted(ended), self.concurrency):
+            if error is None:
+                changed.append(JobInfo.from_json(info))
+        self.upsert(changed)
+        return len(changed)
+
+    def _get_last_created_time(self, job_type):
+        with self._lock:
+            row = self._connection.execute('SELECT last_created_time FROM sync_state WHERE type = ?',
+                                           (job_type,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, jobs):
+        """
+        Add jobs to the store, replacing the stored jobs with the same ids
+
+        :type jobs: list[JobInfo]
+        """
+        if not jobs:
+            return
+        rows = [(job.id, job.type, job.app_name, job.app_path, job.user, job.status, job.run, job.parent_id,
+                 job.created_time, job.start_time, job.end_time, job.last_modified_time) for job in jobs]
+        last_created_times = {}
+        for job in jobs:
+            if job.created_time is not None and job.created_time > last_created_times.get(job.type, 0):
+                last_created_times[job.type] = job.created_time
+
+        with self._lock:
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO jobs (%s) VALUES (%s)' %
+                                             (', '.join(_COLUMNS), ','.join('?' * len(_COLUMNS))), rows)
+                for job_type, created_time in last_created_times.iteritems():
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO sync_state (type, last_created_time) VALUES '
+                        '(?, MAX(?, COALESCE((SELECT last_created_time FROM sync_state WHERE type = ?), 0)))',
+                        (job_type, created_time, job_type))
+
+    def get(self, job_id):
+        """
+        :return: the stored job, None if the store does not hold it
+        :rtype : JobInfo
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT %s FROM jobs WHERE id = ?' % ', '.join(_COLUMNS),
+                                           (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def find(self, status=None, user=None, app_name=None, job_type=None, created_since=None, created_until=None,
+             limit=None):
+        """
+        Find stored jobs, the most recently created first.
+        Each filter argument can be a single value or a list of values.
+
+        :param status: status(es) of the jobs
+        :param user: user(s) that submitted the jobs
+        :param app_name: application name(s) of the jobs
+        :param job_type: type(s) of the jobs (JobType)
+        :param created_since: only jobs created at or after this time (seconds since the epoch)
+        :type created_since: float
+        :param created_until: only jobs created at or before this time (seconds since the epoch)
+        :type created_until: float
+        :param limit: maximal number of jobs to return
+        :type limit: int
+        :rtype : list[JobInfo]
+        """
+        where, params = self._where(status, user, app_name, job_type, created_since, created_until)
+        query = 'SELECT %s FROM jobs%s ORDER BY created_time DESC' % (', '.join(_COLUMNS), where)
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def count(self, status=None, user=None, app_name=None, job_type=None, created_since=None, created_until=None):
+        """
+        Count stored jobs, see find for the filter arguments
+        :rtype : int
+        """
+        where, params = self._where(status, user, app_name, job_type, created_since, created_until)
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM jobs' + where, params).fetchone()[0]
+
+    @staticmethod
+    def _where(status, user, app_name, job_type, created_since, created_until):
+        conditions = []
+        params = []
+        for column, value in (('status', status), ('user', user), ('app_name', app_name), ('type', job_type)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, basestring) else list(value)
+            conditions.append('%s IN (%s)' % (column, ','.join('?' * len(values))))
+            params.extend(values)
+        if created_since is not None:
+            conditions.append('created_time >= ?')
+            params.append(created_since)
+        if created_until is not None:
+            conditions.append('created_time <= ?')
+            params.append(created_until)
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    @staticmethod
+    def _to_job(row):
+        job_id, _, app_name, app_path, user, status, run, parent_id, created, started, ended, modified = row
+        return JobInfo(job_id, app_name, status, user, app_path, run, parent_id, created, started, ended, modified)
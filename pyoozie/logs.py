@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Structured oozie job logs.
+
+iter_records turns log lines into LogRecords, folding the continuation lines of a record (e.g: a stack trace) into its
+message. A LogIndex keeps the offsets of the records of a log file by action and level in a SQLite file next to the
+log, so looking up the records of one action seeks to them instead of scanning the whole log::
+
+    path = save_job_log(Oozie('oozie-host'), job_id, '/tmp/job.log')
+    index = LogIndex(path)
+    for record in index.records(action='load-table', level='ERROR'):
+        print record.message
+"""
+import calendar
+import os
+import re
+import sqlite3
+import threading
+
+__author__ = 'pavel'
+__all__ = ['LogRecord', 'LogIndex', 'iter_records', 'save_job_log']
+
+# e.g: 2014-01-01 10:00:00,000  INFO ActionStartXCommand:520 - SERVER[host] USER[hdfs] GROUP[-] TOKEN[] APP[app]
+#      JOB[0000001-140101000000000-oozie-oozi-W] ACTION[0000001-140101000000000-oozie-oozi-W@load] Start action ...
+_HEADER = re.compile(r'(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d),(\d{3})\s+([A-Z]+)\s+(\S+) - (.*)')
+_CONTEXT = re.compile(r'(?:\w+\[[^\]]*\] )*?JOB\[([^\]]*)\] ACTION\[([^\]]*)\] ?')
+
+
+def _context_id(value):
+    return value if value and value != '-' else None
+
+
+class LogRecord(object):
+    """
+    A record of an oozie log: one log line and the continuation lines following it
+    """
+    __slots__ = ('timestamp', 'level', 'source', 'job_id', 'action_id', 'message', 'offset', 'length')
+
+    def __init__(self, timestamp, level, source, job_id, action_id, message, offset=None, length=None):
+        """
+        :param timestamp: seconds since the epoch, of the time as written in the log (the server's time zone)
+        :type timestamp: float
+        :param level: the log level (e.g: INFO), None for lines preceding the first record
+        :param source: the logging class and line (e.g: ActionStartXCommand:520)
+        :param message: the message, including the continuation lines
+        :param offset: position of the record in the log in bytes
+        :param length: size of the record in the log in bytes
+        """
+        self.timestamp = timestamp
+        self.level = level
+        self.source = source
+        self.job_id = job_id
+        self.action_id = action_id
+        self.message = message
+        self.offset = offset
+        self.length = length
+
+    @property
+    def action_name(self):
+        """
+        :return: the name of the action (e.g: load of 0000001-140101000000000-oozie-oozi-W@load)
+        :rtype : str
+        """
+        if self.action_id is None:
+            return None
+        return self.action_id.rpartition('@')[2]
+
+    def __repr__(self):
+        return 'LogRecord(level=%r, action_id=%r, offset=%r)' % (self.level, self.action_id, self.offset)
+
+
+def _make_record(lines, offset, length):
+    header = _HEADER.match(lines[0])
+    if header is None:
+        return LogRecord(None, None, None, None, None, '\n'.join(lines), offset, length)
+    year, month, day, hours, minutes, seconds, millis, level, source, text = header.groups()
+    timestamp = calendar.timegm((int(year), int(month), int(day), int(hours), int(minutes), int(seconds))) + \
+        int(millis) / 1000.0
+    job_id = action_id = None
+    context = _CONTEXT.match(text)
+    if context is not None:
+        job_id, action_id = _context_id(context.group(1)), _context_id(context.group(2))
+        text = text[context.end():]
+    lines[0] = text
+    return LogRecord(timestamp, intern(str(level)), source, job_id, action_id, '\n'.join(lines), offset, length)
+
+
+def iter_records(lines, offset=0):
+    """
+    Parse log lines to records, one record at a time
+
+    :param lines: the lines of the log, with or without their line endings (e.g: a file or Oozie.iter_job_log)
+    :type lines: collections.Iterable[basestring]
+    :param offset: position of the first line in the log in bytes
+    :type offset: int
+    :rtype : collections.Iterator[LogRecord]
+    """
+    record_lines, record_offset = [], offset
+    for line in lines:
+        size = len(line) if line.endswith('\n') else len(line) + 1
+        line = line.rstrip('\r\n')
+        if record_lines and _HEADER.match(line):
+            yield _make_record(record_lines, record_offset, offset - record_offset)
+            record_lines, record_offset = [], offset
+        record_lines.append(line)
+        offset += size
+    if record_lines:
+        yield _make_record(record_lines, record_offset, offset - record_offset)
+
+
+def save_job_log(oozie, job_id, path):
+    """
+    Download the log of a job to a file, streaming it
+
+    :type oozie: pyoozie.Oozie
+    :rtype : basestring
+    :return: the path of the log
+    """
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as log_file:
+        for line in oozie.iter_job_log(job_id):
+            if isinstance(line, unicode):
+                line = line.encode('UTF-8')
+            log_file.write(line + '\n')
+    os.rename(temp_path, path)
+    return path
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    level TEXT,
+    job_id TEXT,
+    action_id TEXT,
+    action_name TEXT
+);
+CREATE INDEX IF NOT EXISTS records_by_action_id ON records (action_id, level, offset);
+CREATE INDEX IF NOT EXISTS records_by_action_name ON records (action_name, level, offset);
+CREATE INDEX IF NOT EXISTS records_by_level ON records (level, offset);
+CREATE TABLE IF NOT EXISTS log_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER,
+    head TEXT
+);
+'''
+
+# bytes at the start of the log identifying it, a log with a different head is indexed again
+_HEAD_SIZE = 1024
+
+
+class LogIndex(object):
+    def __init__(self, log_path, index_path=None, update=True):
+        """
+        Open (or create) the index of a log file
+
+        :param log_path: path of the log
+        :type log_path: basestring
+        :param index_path: path of the SQLite index, <log_path>.idx by default
+        :type index_path: basestring
+        :param update: index the records the index does not hold yet
+        :type update: bool
+        """
+        self.log_path = log_path
+        self.index_path = index_path or log_path + '.idx'
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        if update:
+            self.update()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self):
+        """
+        Index the records the index does not hold yet.
+        A log that grew is indexed from its last indexed record (it may have gained continuation lines),
+        any other change indexes the whole log again.
+
+        :return: the number of records indexed
+        :rtype : int
+        """
+        with self._lock, open(self.log_path, 'rb') as log_file:
+            head = log_file.read(_HEAD_SIZE)
+            size = os.fstat(log_file.fileno()).st_size
+            state = self._connection.execute('SELECT size, head FROM log_state').fetchone()
+            start = 0
+            if state is not None and size >= state[0] and head.startswith(str(state[1])[:len(head)]):
+                if size == state[0]:
+                    return 0
+                start = self._connection.execute('SELECT COALESCE(MAX(offset), 0) FROM records').fetchone()[0]
+
+            log_file.seek(start)
+            with self._connection:
+                self._connection.execute('DELETE FROM records WHERE offset >= ?', (start,))
+                rows = ((record.offset, record.length, record.level, record.job_id, record.action_id,
+                         record.action_name) for record in iter_records(log_file, start))
+                cursor = self._connection.executemany('INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self._connection.execute('INSERT OR REPLACE INTO log_state VALUES (0, ?, ?)',
+                                         (size, buffer(head)))
+            return cursor.rowcount
+
+    def records(self, action=None, level=None):
+        """
+        Read the records of an action and/or level, seeking to them in the log
+
+        :param action: an action id, or an action name
+        :type action: basestring
+        :param level: a log level (e.g: ERROR) or a list of levels
+        :type level: basestring or list[basestring]
+        :return: the matching records in the order of the log
+        :rtype : collections.Iterator[LogRecord]
+        """
+        conditions, arguments = [], []
+        if action is not None:
+            conditions.append('action_id = ?' if '@' in action else 'action_name = ?')
+            arguments.append(action)
+        if level is not None:
+            levels = [level] if isinstance(level, basestring) else list(level)
+            conditions.append('level IN (%s)' % ','.join('?' * len(levels)))
+            arguments.extend(levels)
+        query = 'SELECT offset, length FROM records'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        with self._lock:
+            locations = self._connection.execute(query + ' ORDER BY offset', arguments).fetchall()
+
+        with open(self.log_path, 'rb') as log_file:
+            for offset, length in locations:
+                log_file.seek(offset)
+                for record in iter_records(log_file.read(length).splitlines(True), offset):
+                    yield record
+
+    def summary(self):
+        """
+        :return: the number of records of every action by level (records of no action are under None)
+        :rtype : dict[str, dict[str, int]]
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT action_id, level, COUNT(*) FROM records '
+                                            'GROUP BY action_id, level').fetchall()
+        summary = {}
+        for action_id, level, count in rows:
+            summary.setdefault(action_id, {})[level] = count
+        return summary
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Push notifications of job state changes.
+
+Oozie calls the notification URLs of a job (oozie.wf.workflow.notification.url, oozie.wf.action.notification.url and
+oozie.coord.action.notification.url) when the job or its actions change state. A NotificationReceiver serves those
+URLs, adds them to every job submitted through an attached client, and dispatches the notifications to callbacks and
+futures. Polling remains only as a slow safety net for lost notifications::
+
+    with NotificationReceiver(oozie=client) as receiver:
+        job_id = client.create_job({'oozie.wf.application.path': '/apps/my-app'})
+        client.do_job_action(job_id, JobAction.START)
+        status = receiver.watch(job_id).result(timeout=3600)
+"""
+import BaseHTTPServer
+import SocketServer
+import collections
+import httplib
+import socket
+import threading
+import time
+import traceback
+import urlparse
+
+import utils
+from oozie import FINAL_JOB_STATUSES
+
+__author__ = 'pavel'
+__all__ = ['NotificationKind', 'Notification', 'JobFuture', 'NotificationReceiver', 'WORKFLOW_NOTIFICATION_URL',
+           'ACTION_NOTIFICATION_URL', 'COORDINATOR_ACTION_NOTIFICATION_URL']
+
+WORKFLOW_NOTIFICATION_URL = 'oozie.wf.workflow.notification.url'
+ACTION_NOTIFICATION_URL = 'oozie.wf.action.notification.url'
+COORDINATOR_ACTION_NOTIFICATION_URL = 'oozie.coord.action.notification.url'
+
+
+class NotificationKind:
+    WORKFLOW = 'workflow'
+    ACTION = 'action'
+    COORDINATOR_ACTION = 'coordinator-action'
+    # a final status found by the safety net poller, not notified by the server
+    POLL = 'poll'
+
+
+class Notification(object):
+    __slots__ = ('kind', 'job_id', 'status', 'node_name', 'transition', 'received_time')
+
+    def __init__(self, kind, job_id, status, node_name=None, transition=None, received_time=None):
+        """
+        A state change of a job, an action or a coordinator action
+
+        :param kind: see NotificationKind
+        :param job_id: the workflow job id, or the coordinator action id
+        :param status: the new status (None for an action that ended, see transition)
+        :param node_name: the name of the action of an action notification
+        :param transition: the node an action that ended transitions to
+        """
+        self.kind = kind
+        self.job_id = job_id
+        self.status = status
+        self.node_name = node_name
+        self.transition = transition
+        self.received_time = received_time or time.time()
+
+    def __repr__(self):
+        return 'Notification(kind=%r, job_id=%r, status=%r, node_name=%r)' % (self.kind, self.job_id, self.status,
+                                                                             self.node_name)
+
+
+class JobFuture(object):
+    def __init__(self, job_id):
+        """
+        The final status of a job, set once the job ends
+        """
+        self.job_id = job_id
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._status = None
+        self._callbacks = []
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the job to end
+
+        :param timeout: maximal number of seconds to wait, wait forever if None
+        :return: the final status of the job
+        :rtype : str
+        :raise RuntimeError: if the job did not end within timeout
+        """
+        if not self._event.wait(timeout):
+            raise RuntimeError('%s did not end within %s seconds' % (self.job_id, timeout))
+        return self._status
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(future) when the job ends (right away if it already ended)
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, status):
+        with self._lock:
+            if self.done():
+                return
+            self._status = status
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _call(callback, self)
+
+
+def _call(callback, argument):
+    # a failing callback must not break the dispatch to the others
+    try:
+        callback(argument)
+    except Exception:
+        traceback.print_exc()
+
+
+class _NotificationHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        params = dict((name, values[-1]) for name, values in urlparse.parse_qs(url.query).iteritems())
+        notification = _parse_notification(url.path.strip('/'), params)
+        self.send_response(httplib.OK if notification is not None else httplib.NOT_FOUND)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        if notification is not None:
+            self.server.receiver.dispatch(notification)
+
+    def log_message(self, *args):
+        pass
+
+
+def _parse_notification(kind, params):
+    if kind == NotificationKind.WORKFLOW and 'jobId' in params:
+        return Notification(kind, params['jobId'], params.get('status'))
+    if kind == NotificationKind.ACTION and 'jobId' in params:
+        # oozie notifies S:<status> when an action starts and T:<node> when it ends
+        status, transition = params.get('status'), None
+        if status and status.startswith('T:'):
+            status, transition = None, status[2:]
+        elif status and status.startswith('S:'):
+            status = status[2:]
+        return Notification(kind, params['jobId'], status, params.get('nodeName'), transition)
+    if kind == NotificationKind.COORDINATOR_ACTION and 'actionId' in params:
+        return Notification(kind, params['actionId'], params.get('status'))
+    return None
+
+
+class _ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class NotificationReceiver(object):
+    # seconds between polls of the watched jobs, only catches notifications the server failed to deliver
+    DEFAULT_SAFETY_POLL_INTERVAL = 300
+    # number of final statuses kept for jobs that are not watched yet
+    FINAL_STATUSES_KEPT = 10000
+
+    def __init__(self, host='0.0.0.0', port=0, public_host=None, oozie=None,
+                 safety_poll_interval=DEFAULT_SAFETY_POLL_INTERVAL, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Create a notification receiver, call start() to receive notifications
+
+        :param host: the address to listen on
+        :param port: the port to listen on (0 picks a free port)
+        :param public_host: the host name the oozie server reaches the receiver by, the fully qualified host name
+                            of the machine by default
+        :param oozie: a client to attach (see attach), also used by the safety net poller
+        :type oozie: pyoozie.Oozie
+        :param safety_poll_interval: seconds between polls of the watched jobs, no polling if None
+        :type safety_poll_interval: float
+        :param concurrency: maximal number of concurrent requests when polling
+        :type concurrency: int
+        """
+        self.host = host
+        self.port = port
+        self.public_host = public_host or socket.getfqdn()
+        self.oozie = oozie
+        self.safety_poll_interval = safety_poll_interval
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._futures = {}
+        self._final_statuses = collections.OrderedDict()
+        self._server = None
+        self._threads = []
+        self._stopped = threading.Event()
+
+    def start(self):
+        """
+        Start receiving notifications (and polling) in background threads, and attach the client if any
+        :rtype : NotificationReceiver
+        """
+        self._stopped.clear()
+        self._server = _ThreadingHTTPServer((self.host, self.port), _NotificationHandler)
+        self._server.receiver = self
+        self.port = self._server.server_address[1]
+        self._threads = [threading.Thread(target=self._server.serve_forever, name='oozie-notification-receiver')]
+        if self.oozie is not None:
+            self.attach(self.oozie)
+            if self.safety_poll_interval is not None:
+                self._threads.append(threading.Thread(target=self._poll_forever, name='oozie-notification-poller'))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            if self.oozie is not None:
+                self.detach(self.oozie)
+            self._stopped.set()
+            self._server.shutdown()
+            self._server.server_close()
+            for thread in self._threads:
+                thread.join()
+            self._server, self._threads = None, []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def base_url(self):
+        return 'http://%s:%d' % (self.public_host, self.port)
+
+    def get_notification_properties(self):
+        """
+        :return: the notification URL properties of a job notifying the receiver
+        :rtype : dict
+        """
+        return {WORKFLOW_NOTIFICATION_URL: self.base_url + '/workflow?jobId=$jobId&status=$status',
+                ACTION_NOTIFICATION_URL: self.base_url + '/action?jobId=$jobId&nodeName=$nodeName&status=$status',
+                COORDINATOR_ACTION_NOTIFICATION_URL: self.base_url + '/coordinator-action?actionId=$actionId'
+                                                                     '&status=$status'}
+
+    def attach(self, oozie):
+        """
+        Make every job submitted through a client notify the receiver
+        :type oozie: pyoozie.Oozie
+        """
+        oozie.submission_properties.update(self.get_notification_properties())
+
+    def detach(self, oozie):
+        for name in self.get_notification_properties():
+            oozie.submission_properties.pop(name, None)
+
+    def add_listener(self, callback):
+        """
+        Call callback(notification) on every notification (from the thread that received it)
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners.remove(callback)
+
+    def watch(self, job_id, callback=None):
+        """
+        Get the future final status of a workflow job (submitted with the notification URL properties)
+
+        :param callback: called with the future when the job ends
+        :rtype : JobFuture
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None:
+                future = self._futures[job_id] = JobFuture(job_id)
+            status = self._final_statuses.pop(job_id, None)
+        if callback is not None:
+            future.add_done_callback(callback)
+        if status is not None:
+            self._resolve(job_id, status)
+        return future
+
+    def dispatch(self, notification):
+        """
+        Deliver a notification to the listeners, and to the future of its job if it ended the job
+        :type notification: Notification
+        """
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            _call(listener, notification)
+        if notification.kind in (NotificationKind.WORKFLOW, NotificationKind.POLL) and \
+                notification.status in FINAL_JOB_STATUSES:
+            self._resolve(notification.job_id, notification.status)
+
+    def _resolve(self, job_id, status):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            if future is None:
+                # the job may end before it is watched
+                self._final_statuses[job_id] = status
+                while len(self._final_statuses) > self.FINAL_STATUSES_KEPT:
+                    self._final_statuses.popitem(last=False)
+                return
+        future.set_result(status)
+
+    def _poll_forever(self):
+        while not self._stopped.wait(self.safety_poll_interval):
+            with self._lock:
+                job_ids = list(self._futures)
+            results = utils.concurrent_map(self.oozie.get_job_information, job_ids, self.concurrency)
+            for job_id, (info, error) in zip(job_ids, results):
+                if error is None and info['status'] in FINAL_JOB_STATUSES:
+                    self.dispatch(Notification(NotificationKind.POLL, job_id, info['status']))
@@ -17,9 +17,11 @@
 
 import httplib
 import os
+import time
 import requests
 import errors
 import utils
+from admission import EndpointClass
 
 
 __author__ = 'pavel'
@@ -50,11 +52,145 @@ class JobAction:
     DRYRUN = 'dryrun'
     RERUN = 'rerun'
     CHANGE = 'change'
+    COORD_RERUN = 'coord-rerun'
 
 
+class RerunType:
+    ACTION = 'action'
+    DATE = 'date'
+
+
+class JobType:
+    WORKFLOW = 'wf'
+    COORDINATOR = 'coordinator'
+    BUNDLE = 'bundle'
+
+
+class JobStatus:
+    PREP = 'PREP'
+    RUNNING = 'RUNNING'
+    SUSPENDED = 'SUSPENDED'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    KILLED = 'KILLED'
+    PREPSUSPENDED = 'PREPSUSPENDED'
+    PREPPAUSED = 'PREPPAUSED'
+    PAUSED = 'PAUSED'
+    RUNNINGWITHERROR = 'RUNNINGWITHERROR'
+    SUSPENDEDWITHERROR = 'SUSPENDEDWITHERROR'
+    PAUSEDWITHERROR = 'PAUSEDWITHERROR'
+    DONEWITHERROR = 'DONEWITHERROR'
+    IGNORED = 'IGNORED'
+
+
+# Statuses a job never leaves (unless it is rerun)
+FINAL_JOB_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.KILLED, JobStatus.DONEWITHERROR,
+                      JobStatus.IGNORED)
+
+
+class ActionStatus:
+    PREP = 'PREP'
+    RUNNING = 'RUNNING'
+    OK = 'OK'
+    ERROR = 'ERROR'
+    KILLED = 'KILLED'
+    FAILED = 'FAILED'
+    DONE = 'DONE'
+
+
+RERUN_SKIP_NODES = 'oozie.wf.rerun.skip.nodes'
+RERUN_FAIL_NODES = 'oozie.wf.rerun.failnodes'
+
 JobsEndPoint = 'jobs'
 JobEndPoint = 'job'
 
+# Actions the jobs end point can apply to all the jobs matching a filter
+BULK_JOB_ACTIONS = (JobAction.KILL, JobAction.SUSPEND, JobAction.RESUME)
+
+# The statuses of the jobs a bulk action changes, the jobs it is applied on leave them
+_BULK_ACTION_STATUSES = {
+    JobAction.KILL: (JobStatus.PREP, JobStatus.RUNNING, JobStatus.SUSPENDED, JobStatus.PREPSUSPENDED,
+                     JobStatus.PREPPAUSED, JobStatus.PAUSED, JobStatus.RUNNINGWITHERROR, JobStatus.SUSPENDEDWITHERROR,
+                     JobStatus.PAUSEDWITHERROR),
+    JobAction.SUSPEND: (JobStatus.PREP, JobStatus.RUNNING, JobStatus.PREPPAUSED, JobStatus.PAUSED,
+                        JobStatus.RUNNINGWITHERROR, JobStatus.PAUSEDWITHERROR),
+    JobAction.RESUME: (JobStatus.SUSPENDED, JobStatus.PREPSUSPENDED, JobStatus.SUSPENDEDWITHERROR),
+}
+
+# The key holding the list of jobs in a jobs response, per job type
+_JOBS_KEYS = {JobType.WORKFLOW: 'workflows',
+              JobType.COORDINATOR: 'coordinatorjobs',
+              JobType.BUNDLE: 'bundlejobs'}
+
+# The key holding the id of a job in a jobs response, per job type
+_JOB_ID_KEYS = {JobType.WORKFLOW: 'id',
+                JobType.COORDINATOR: 'coordJobId',
+                JobType.BUNDLE: 'bundleJobId'}
+
+# Responses of servers that do not support acting on jobs by filter
+_BULK_UNSUPPORTED_STATUSES = (httplib.NOT_FOUND, httplib.METHOD_NOT_ALLOWED, httplib.NOT_IMPLEMENTED)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, basestring):
+        return [value]
+    return list(value)
+
+
+def _rerun_scope(ranges, format_value, separator):
+    """
+    Build the scope parameter of a coordinator rerun (e.g: 1-5,8 or 2014-01-01T00:00Z::2014-01-02T00:00Z)
+
+    :param ranges: single values or (first, last) tuples
+    :param format_value: a function formatting a single value
+    :param separator: the separator between the first and last values of a range
+    :rtype : basestring
+    """
+    terms = []
+    for value in ranges:
+        if isinstance(value, tuple):
+            terms.append('%s%s%s' % (format_value(value[0]), separator, format_value(value[1])))
+        else:
+            terms.append(format_value(value))
+    return ','.join(terms)
+
+
+def _jobs_filter(name=None, user=None, status=None, start_created_time=None, end_created_time=None):
+    """
+    Build the filter parameter of the jobs end point (e.g: name=my-app;status=RUNNING;status=PREP)
+
+    :rtype : basestring
+    """
+    terms = []
+    terms.extend('name=%s' % n for n in _as_list(name))
+    terms.extend('user=%s' % u for u in _as_list(user))
+    terms.extend('status=%s' % s for s in _as_list(status))
+    if start_created_time is not None:
+        terms.append('startcreatedtime=%s' % utils.format_time(start_created_time))
+    if end_created_time is not None:
+        terms.append('endcreatedtime=%s' % utils.format_time(end_created_time))
+    return ';'.join(terms)
+
+
+def _release_on_close(close, admission, latency, overloaded):
+    """
+    Wrap the close method of a streamed response to release its admission slot (once)
+    """
+    released = []
+
+    def release_and_close():
+        try:
+            close()
+        finally:
+            if not released:
+                released.append(True)
+                admission.release(latency, overloaded)
+
+    return release_and_close
+
+
 class Oozie(object):
     """
     Oozie is a python warper for the oozie REST api
@@ -63,9 +199,10 @@ class Oozie(object):
     DEFAULT_JOB_TRACKER = r'localhost:8021'
     DEFAULT_OOZIE_LIBPATH = r'/user/oozie/share/lib/pig'
     DEFAULT_USER_NAME = 'hdfs'
+    DEFAULT_PAGE_LENGTH = 100
 
 
-    def __init__(self, hostname='localhost', port=11000):
+    def __init__(self, hostname='localhost', port=11000, admission=None, scheme='http', path='/oozie'):
         """
         Create a new client for interacting with Oozie
 
@@ -73,10 +210,85 @@ class Oozie(object):
         :type hostname: basestring
         :param port: the port of the oozie WS
         :type port: int
+        :param admission: limits the requests sent to the server (may be shared by several clients)
+        :type admission: pyoozie.admission.AdmissionController
+        :param scheme: the scheme of the oozie WS (http or https)
+        :type scheme: basestring
+        :param path: the path of the oozie web application on the server
+        :type path: basestring
         """
         self.hostname = hostname
         self.port = port
-        self.base_uri = "http://{host}:{port}/oozie/v1/".format(host=self.hostname, port=self.port)
+        self.admission = admission
+        self.scheme = scheme
+        self.path = path
+        self.base_uri = "{scheme}://{host}:{port}{path}/v1/".format(scheme=scheme, host=self.hostname, port=self.port,
+                                                                   path=path.rstrip('/'))
+        # properties added to every job submitted by the client (e.g: notification URLs), the job's own win
+        self.submission_properties = {}
+
+    def _request(self, method, path, **kwargs):
+        """
+        Send a request to the server, through the admission controller if any.
+        With an admission controller, requests answered with 503 (service unavailable) are sent again
+        (unless their body is streamed).
+
+        :param method: the HTTP method
+        :param path: the path of the end point relative to the base URI (e.g: 'job/<id>')
+        :param kwargs: the arguments of requests.request
+        :rtype : requests.Response
+        """
+        admission = self.admission
+        if admission is None:
+            return requests.request(method, self.base_uri + path, **kwargs)
+
+        if path.startswith('admin/'):
+            endpoint_class = EndpointClass.ADMIN
+        else:
+            endpoint_class = EndpointClass.READ if method == 'GET' else EndpointClass.WRITE
+        replayable = isinstance(kwargs.get('data'), (basestring, type(None)))
+        streamed = kwargs.get('stream', False)
+        retry_delay = admission.retry_delay
+        retries = 0
+        while True:
+            admission.acquire(endpoint_class)
+            started = time.time()
+            response = None
+            overloaded = False
+            retry = False
+            try:
+                response = requests.request(method, self.base_uri + path, **kwargs)
+                overloaded = response.status_code >= httplib.INTERNAL_SERVER_ERROR or response.status_code == 429
+                retry = (response.status_code == httplib.SERVICE_UNAVAILABLE and replayable and
+                         retries < admission.max_retries)
+            except requests.ConnectionError:
+                overloaded = True
+                raise
+            finally:
+                # the slot is always released (e.g: when streaming the body raises), a streamed response holds it
+                # until it is closed so the limit covers reading the body
+                if response is not None and streamed and not retry:
+                    response.close = _release_on_close(response.close, admission, time.time() - started,
+                                                       overloaded)
+                else:
+                    admission.release(time.time() - started, overloaded)
+            if not retry:
+                return response
+            response.close()
+            time.sleep(retry_delay)
+            retries += 1
+            retry_delay *= 2
+
+    def _bulk_concurrency(self, concurrency):
+        """
+        The number of concurrent requests of a bulk operation:
+        as given, or as many as the admission controller may allow (it throttles them to what the server sustains)
+        """
+        if concurrency is not None:
+            return concurrency
+        if self.admission is not None:
+            return self.admission.max_limit
+        return utils.DEFAULT_CONCURRENCY
 
     def create_job(self, config):
         # TODO: validate the config xml file
@@ -89,8 +301,10 @@ class Oozie(object):
         Or, if none of those are present, the jobtype parameter determines the type of job to run.
         It can either be mapreduce or pig.
 
-        :type config: basestring
-        :param config: XML configuration file.
+        :type config: basestring or file or dict or collections.Iterable[tuple]
+        :param config: XML configuration file, either the XML string, a path of an XML or .properties file,
+                       an opened XML file, or the properties themselves (a dict or a generator of (name, value)).
+                       Anything but an XML string is streamed to the server (see utils.config_body).
         <?xml version="1.0" encoding="UTF-8"?>
         <configuration>
             <property>
@@ -108,7 +322,8 @@ class Oozie(object):
         :raise errors.OozieError: if the server does not response with a CREATED response
         """
         headers = {'Content-Type': 'application/xml;charset=UTF-8'}
-        response = requests.post(self.base_uri + JobsEndPoint, headers=headers, data=config)
+        response = self._request('POST', JobsEndPoint, headers=headers,
+                                 data=utils.config_body(config, self.submission_properties))
         if response.status_code != httplib.CREATED:
             raise errors.OozieError(errors.error_message_from_response(response))
         else:
@@ -144,36 +359,8 @@ class Oozie(object):
         :return: ID of the created workflow
         :rtype : basestring
         """
-        # TODO: remove code duplication with pig job creation
-        properties = {'fs.default.name': name_node,
-                      'mapred.job.tracker': job_tracker,
-                      'user.name': user_name,
-                      'oozie.hive.script': script,
-                      'oozie.libpath': oozie_libpath,
-                      'oozie.proxysubmission': 'true', }
-        if files:
-            properties['oozie.files'] = ','.join("%s#%s" % (f, os.path.basename(f)) for f in files)
-
-        if archives:
-            properties['oozie.archives'] = ','.join("%s#%s" % (f, os.path.basename(f)) for f in files)
-
-        if params:
-            properties['oozie.hive.script.params.size'] = len(params)
-            for i, param in enumerate(params.iteritems()):
-                properties['oozie.hive.script.params.%d' % i] = "%s=%s" % param
-
-        if options:
-            properties['oozie.hive.options.size'] = len(options)
-            for i, option in enumerate(options):
-                properties['oozie.hive.options.%d' % i] = option
-
-        config = utils.properties_to_config(properties)
-        headers = {'Content-Type': 'application/xml;charset=UTF-8'}
-        response = requests.post(self.base_uri + JobsEndPoint, params={'jobtype': 'hive'}, headers=headers, data=config)
-        if response.status_code != httplib.CREATED:
-            raise errors.OozieError(errors.error_message_from_response(response))
-        else:
-            return response.json()['id']
+        return self._create_proxy_job('hive', script, params, options, files, archives, user_name, name_node,
+                                      job_tracker, oozie_libpath)
 
     def create_pig_job(self, script, params=None, options=None, files=None, archives=None,
                        user_name=DEFAULT_USER_NAME, name_node=DEFAULT_NAME_NODE, job_tracker=DEFAULT_JOB_TRACKER,
@@ -204,31 +391,46 @@ class Oozie(object):
         :return: ID of the created workflow
         :rtype : basestring
         """
+        return self._create_proxy_job('pig', script, params, options, files, archives, user_name, name_node,
+                                      job_tracker, oozie_libpath)
+
+    def _create_proxy_job(self, job_type, script, params, options, files, archives, user_name, name_node,
+                          job_tracker, oozie_libpath):
+        """
+        Submit a single HIVE or PIG action workflow (see create_hive_job and create_pig_job)
+
+        :param job_type: 'hive' or 'pig'
+        :rtype : basestring
+        """
         properties = {'fs.default.name': name_node,
                       'mapred.job.tracker': job_tracker,
                       'user.name': user_name,
-                      'oozie.pig.script': script,
+                      'oozie.%s.script' % job_type: script,
                       'oozie.libpath': oozie_libpath,
                       'oozie.proxysubmission': 'true', }
+        for name, value in self.submission_properties.iteritems():
+            properties.setdefault(name, value)
+
         if files:
             properties['oozie.files'] = ','.join("%s#%s" % (f, os.path.basename(f)) for f in files)
 
         if archives:
-            properties['oozie.archives'] = ','.join("%s#%s" % (f, os.path.basename(f)) for f in files)
+            properties['oozie.archives'] = ','.join("%s#%s" % (f, os.path.basename(f)) for f in archives)
 
         if params:
-            properties['oozie.pig.script.params.size'] = len(params)
+            properties['oozie.%s.script.params.size' % job_type] = len(params)
             for i, param in enumerate(params.iteritems()):
-                properties['oozie.pig.script.params.%d' % i] = "%s=%s" % param
+                properties['oozie.%s.script.params.%d' % (job_type, i)] = "%s=%s" % param
 
         if options:
-            properties['oozie.pig.options.size'] = len(options)
+            properties['oozie.%s.options.size' % job_type] = len(options)
             for i, option in enumerate(options):
-                properties['oozie.pig.options.%d' % i] = option
+                properties['oozie.%s.options.%d' % (job_type, i)] = option
 
-        config = utils.properties_to_config(properties)
+        # the script is usually the bulk of the configuration, stream it instead of building the XML in memory
         headers = {'Content-Type': 'application/xml;charset=UTF-8'}
-        response = requests.post(self.base_uri + JobsEndPoint, params={'jobtype': 'pig'}, headers=headers, data=config)
+        response = self._request('POST', JobsEndPoint, params={'jobtype': job_type}, headers=headers,
+                                 data=utils.iter_config(properties))
         if response.status_code != httplib.CREATED:
             raise errors.OozieError(errors.error_message_from_response(response))
         else:
@@ -246,18 +448,271 @@ class Oozie(object):
         :type config: basestring
         :raise errors.OozieError: if the server does not response with an OK response
         """
-        if action not in [v for v in dir(JobAction) if not v.startswith('_')]:
+        if action not in [getattr(JobAction, v) for v in dir(JobAction) if not v.startswith('_')]:
             raise ValueError('%s is not a legal action' % action)
         if config is not None:
             headers = {'Content-Type': 'application/xml;charset=UTF-8'}
-            response = requests.put(self.base_uri + JobEndPoint + "/" + job_id,
-                                    params={'action': action}, headers=headers, data=config)
+            response = self._request('PUT', JobEndPoint + "/" + job_id,
+                                     params={'action': action}, headers=headers, data=config)
         else:
-            response = requests.put(self.base_uri + JobEndPoint + "/" + job_id, params={'action': action})
+            response = self._request('PUT', JobEndPoint + "/" + job_id, params={'action': action})
 
         if response.status_code != httplib.OK:
             raise errors.OozieError(errors.error_message_from_response(response))
 
+    def do_jobs_action(self, job_ids, action, config=None, concurrency=None):
+        """
+        Apply an action on many jobs, one request per job, sending the requests concurrently.
+        Jobs on which the action fails (e.g: killing an already killed job) are not counted as affected.
+
+        :param job_ids: The jobs to act on
+        :type job_ids: list[basestring]
+        :param action: The action to do (one of JobAction)
+        :type action: str
+        :param config: if rerunning or changing supply with the XML configuration
+        :type config: basestring
+        :param concurrency: maximal number of concurrent requests (see _bulk_concurrency)
+        :type concurrency: int
+        :return: The ids of the jobs the action was applied on
+        :rtype : list[basestring]
+        """
+        job_ids = list(job_ids)
+        results = utils.concurrent_map(lambda job_id: self.do_job_action(job_id, action, config), job_ids,
+                                       self._bulk_concurrency(concurrency))
+        return [job_id for job_id, (_, error) in zip(job_ids, results) if error is None]
+
+    def bulk_job_action(self, action, job_type=JobType.WORKFLOW, name=None, user=None, status=None,
+                        start_created_time=None, end_created_time=None, fallback=True,
+                        page_length=DEFAULT_PAGE_LENGTH, concurrency=None):
+        """
+        Kill, suspend or resume all the jobs matching a filter using the jobs end point.
+        Each filter argument can be a single value or a list of values. Only the jobs in a status the action
+        changes are matched (e.g: killing does not list the jobs that already ended, with or without a status filter).
+        If the server does not support bulk actions and fallback is True, the matching jobs are listed and the
+        action is applied on each of them concurrently.
+
+        :param action: The action to do ('kill', 'suspend' or 'resume')
+        :type action: str
+        :param job_type: The type of the jobs to act on (one of JobType)
+        :type job_type: str
+        :param name: application name(s) of the jobs
+        :type name: basestring or list[basestring]
+        :param user: user(s) that submitted the jobs
+        :type user: basestring or list[basestring]
+        :param status: status(es) of the jobs
+        :type status: basestring or list[basestring]
+        :param start_created_time: only jobs created at or after this time (UTC datetime or oozie time string)
+        :type start_created_time: datetime.datetime or basestring
+        :param end_created_time: only jobs created at or before this time (UTC datetime or oozie time string)
+        :type end_created_time: datetime.datetime or basestring
+        :param fallback: act on each job separately if the server does not support bulk actions
+        :type fallback: bool
+        :param page_length: number of jobs to act on per request
+        :type page_length: int
+        :param concurrency: maximal number of concurrent requests when falling back to acting on each job
+                            (see _bulk_concurrency)
+        :type concurrency: int
+        :return: The number of jobs affected (the jobs whose status changed)
+        :rtype : int
+        :raise errors.OozieError: if the server does not response with an OK response
+        """
+        if action not in BULK_JOB_ACTIONS:
+            raise ValueError('%s is not a legal bulk action' % action)
+        if not _jobs_filter(name, user, status, start_created_time, end_created_time):
+            raise ValueError('a bulk action requires at least one filter')
+        if status:
+            statuses = [status] if isinstance(status, basestring) else status
+            status = [value for value in statuses if value in _BULK_ACTION_STATUSES[action]]
+            if not status:
+                return 0
+        else:
+            status = list(_BULK_ACTION_STATUSES[action])
+        jobs_filter = _jobs_filter(name, user, status, start_created_time, end_created_time)
+
+        # the jobs the action is applied on leave the matched statuses, the next jobs move up to the
+        # current page. the page is listed again until it only has jobs seen before (the action did not change
+        # them), then the offset moves past it
+        seen = set()
+        offset = 1
+        while True:
+            response = self._request('PUT', JobsEndPoint,
+                                     params={'action': action, 'jobtype': job_type, 'filter': jobs_filter,
+                                             'offset': offset, 'len': page_length})
+            if response.status_code in _BULK_UNSUPPORTED_STATUSES and fallback and not seen:
+                job_ids = [job[_JOB_ID_KEYS[job_type]] for job in
+                           self.iter_jobs_information(job_type, name, user, status, start_created_time,
+                                                      end_created_time, page_length=page_length)]
+                return len(self.do_jobs_action(job_ids, action, concurrency=concurrency))
+            elif response.status_code != httplib.OK:
+                raise errors.OozieError(errors.error_message_from_response(response))
+
+            jobs = response.json().get(_JOBS_KEYS[job_type]) or []
+            job_ids = set(job[_JOB_ID_KEYS[job_type]] for job in jobs)
+            new_ids = job_ids - seen
+            seen.update(job_ids)
+            if len(jobs) < page_length:
+                break
+            if not new_ids:
+                offset += page_length
+
+        if not seen:
+            return 0
+        # the jobs still matching the filter were not changed by the action
+        unchanged = set(job[_JOB_ID_KEYS[job_type]] for job in
+                        self.iter_jobs_information(job_type, name, user, status, start_created_time,
+                                                   end_created_time, page_length=page_length))
+        return len(seen - unchanged)
+
+    def rerun_failed_nodes(self, job_id, properties=None, use_fail_nodes=False):
+        """
+        Rerun a workflow job, skipping all the actions that already completed successfully.
+        The rerun configuration is the job's original configuration updated with properties.
+
+        :param job_id: The workflow job to rerun (must be in a final state)
+        :type job_id: basestring
+        :param properties: properties to add or replace in the job's configuration
+        :type properties: dict
+        :param use_fail_nodes: let the server compute the nodes to rerun (oozie.wf.rerun.failnodes) instead of
+                               sending the list of nodes to skip
+        :type use_fail_nodes: bool
+        :return: The names of the nodes that were skipped (an empty list when use_fail_nodes is set)
+        :rtype : list[basestring]
+        :raise ValueError: if none of the job's actions failed
+        """
+        job_info = self.get_job_information(job_id)
+        actions = job_info.get('actions') or []
+        if all(action['status'] in (ActionStatus.OK, ActionStatus.DONE) for action in actions):
+            raise ValueError('%s has no failed actions to rerun' % job_id)
+
+        rerun_properties = utils.config_to_properties(job_info['conf']) if job_info.get('conf') else {}
+        rerun_properties.update(properties or {})
+        rerun_properties.pop(RERUN_SKIP_NODES, None)
+        rerun_properties.pop(RERUN_FAIL_NODES, None)
+
+        skip_nodes = []
+        if use_fail_nodes:
+            rerun_properties[RERUN_FAIL_NODES] = 'true'
+        else:
+            # control nodes (e.g: ':start:') are always executed again
+            skip_nodes = [action['name'] for action in actions
+                          if action['status'] == ActionStatus.OK and not action['name'].startswith(':')]
+            rerun_properties[RERUN_SKIP_NODES] = ','.join(skip_nodes)
+
+        self.do_job_action(job_id, JobAction.RERUN, utils.properties_to_config(rerun_properties))
+        return skip_nodes
+
+    def rerun_failed_nodes_of_jobs(self, job_ids, properties=None, use_fail_nodes=False,
+                                   concurrency=None):
+        """
+        Rerun the failed nodes of many workflow jobs concurrently (see rerun_failed_nodes).
+        Jobs that could not be rerun (e.g: nothing failed or the job is still running) are skipped.
+
+        :param job_ids: The workflow jobs to rerun
+        :type job_ids: list[basestring]
+        :param properties: properties to add or replace in the configuration of every job
+        :type properties: dict
+        :param use_fail_nodes: let the server compute the nodes to rerun (oozie.wf.rerun.failnodes)
+        :type use_fail_nodes: bool
+        :param concurrency: maximal number of jobs to handle concurrently (see _bulk_concurrency)
+        :type concurrency: int
+        :return: The ids of the jobs that were rerun
+        :rtype : list[basestring]
+        """
+        job_ids = list(job_ids)
+        results = utils.concurrent_map(lambda job_id: self.rerun_failed_nodes(job_id, properties, use_fail_nodes),
+                                       job_ids, self._bulk_concurrency(concurrency))
+        return [job_id for job_id, (_, error) in zip(job_ids, results) if error is None]
+
+    def get_coordinator_actions(self, job_id, status=None, offset=1, length=DEFAULT_PAGE_LENGTH, timezone='GMT'):
+        """
+        Retrieves a page of the materialized actions of a coordinator job.
+
+        :param job_id: The coordinator JOB ID
+        :type job_id: basestring
+        :param status: only actions in these status(es) (e.g: 'KILLED' or ['KILLED', 'FAILED'])
+        :type status: basestring or list[basestring]
+        :param offset: The first action to retrieve (starting from 1)
+        :type offset: int
+        :param length: The number of actions to retrieve
+        :type length: int
+        :param timezone: The timezone to use for times
+        :type timezone: basestring
+        :return: A list of coordinator actions information
+        :rtype : list[dict]
+        """
+        params = {'show': 'info', 'offset': offset, 'len': length, 'timezone': timezone}
+        actions_filter = _jobs_filter(status=status)
+        if actions_filter:
+            params['filter'] = actions_filter
+        response = self._request('GET', JobEndPoint + "/" + job_id, params=params)
+        if response.status_code == httplib.OK:
+            return response.json().get('actions') or []
+        elif response.status_code == httplib.BAD_REQUEST:
+            raise ValueError('%s is a bad job id' % job_id)
+        else:
+            raise errors.OozieError(errors.error_message_from_response(response))
+
+    def iter_coordinator_actions(self, job_id, status=None, page_length=DEFAULT_PAGE_LENGTH, timezone='GMT'):
+        """
+        Iterate over the materialized actions of a coordinator job, retrieving them a page at a time.
+
+        :param job_id: The coordinator JOB ID
+        :type job_id: basestring
+        :param status: only actions in these status(es) (e.g: 'KILLED' or ['KILLED', 'FAILED'])
+        :type status: basestring or list[basestring]
+        :param page_length: The number of actions to retrieve per request
+        :type page_length: int
+        :param timezone: The timezone to use for times
+        :type timezone: basestring
+        :rtype : collections.Iterable[dict]
+        """
+        offset = 1
+        while True:
+            actions = self.get_coordinator_actions(job_id, status, offset, page_length, timezone)
+            for action in actions:
+                yield action
+            if len(actions) < page_length:
+                break
+            offset += page_length
+
+    def rerun_coordinator_actions(self, job_id, action_ranges=None, date_ranges=None, refresh=False,
+                                  no_cleanup=False, failed=False):
+        """
+        Rerun a range of coordinator actions, selected either by action numbers or by nominal time.
+
+        :param job_id: The coordinator JOB ID
+        :type job_id: basestring
+        :param action_ranges: action numbers and (first, last) ranges of action numbers, e.g: [(1, 10), 15]
+        :type action_ranges: list[int or tuple(int, int)]
+        :param date_ranges: nominal times and (start, end) ranges of nominal times (UTC datetimes or oozie time
+                            strings), e.g: [(datetime(2014, 1, 1), datetime(2014, 2, 1))]
+        :type date_ranges: list[datetime.datetime or tuple]
+        :param refresh: re-check the input dependencies of the actions
+        :type refresh: bool
+        :param no_cleanup: do not delete the output events of the actions before rerunning them
+        :type no_cleanup: bool
+        :param failed: only rerun the actions of the range that failed
+        :type failed: bool
+        :return: The information of the rerun coordinator actions
+        :rtype : list[dict]
+        :raise errors.OozieError: if the server does not response with an OK response
+        """
+        if (action_ranges is None) == (date_ranges is None):
+            raise ValueError('exactly one of action_ranges and date_ranges must be given')
+        if action_ranges is not None:
+            rerun_type, scope = RerunType.ACTION, _rerun_scope(action_ranges, str, '-')
+        else:
+            rerun_type, scope = RerunType.DATE, _rerun_scope(date_ranges, utils.format_time, '::')
+
+        params = {'action': JobAction.COORD_RERUN, 'type': rerun_type, 'scope': scope,
+                  'refresh': str(refresh).lower(), 'nocleanup': str(no_cleanup).lower()}
+        if failed:
+            params['failed'] = 'true'
+        response = self._request('PUT', JobEndPoint + "/" + job_id, params=params)
+        if response.status_code != httplib.OK:
+            raise errors.OozieError(errors.error_message_from_response(response))
+        return response.json().get('coordinatoractions') or []
+
     def get_job_information(self, job_id, timezone='GMT'):
         """
         Retrieves the job information.
@@ -269,8 +724,8 @@ class Oozie(object):
         :return: The information of the job
         :rtype : dict
         """
-        response = requests.get(self.base_uri + JobEndPoint + "/" + job_id,
-                                params={'show': 'info', 'timezone': timezone})
+        response = self._request('GET', JobEndPoint + "/" + job_id,
+                                 params={'show': 'info', 'timezone': timezone})
         if response.status_code == httplib.OK:
             return response.json()
         elif response.status_code == httplib.BAD_REQUEST:
@@ -287,8 +742,8 @@ class Oozie(object):
         :return: The XML definition file
         :rtype : basestring
         """
-        response = requests.get(self.base_uri + JobEndPoint + "/" + job_id,
-                                params={'show': 'definition'})
+        response = self._request('GET', JobEndPoint + "/" + job_id,
+                                 params={'show': 'definition'})
         if response.status_code == httplib.OK:
             return response.content
         elif response.status_code == httplib.BAD_REQUEST:
@@ -305,8 +760,8 @@ class Oozie(object):
         :return: The job log
         :rtype : basestring
         """
-        response = requests.get(self.base_uri + JobEndPoint + "/" + job_id,
-                                params={'show': 'log'})
+        response = self._request('GET', JobEndPoint + "/" + job_id,
+                                 params={'show': 'log'})
         if response.status_code == httplib.OK:
             return response.content
         elif response.status_code == httplib.BAD_REQUEST:
@@ -314,6 +769,29 @@ class Oozie(object):
         else:
             raise errors.OozieError(errors.error_message_from_response(response))
 
+    def iter_job_log(self, job_id, chunk_size=64 * 1024):
+        """
+        Retrieves the job log line by line, as it is received from the server.
+
+        :param job_id: The JOB ID
+        :type job_id: basestring
+        :param chunk_size: The number of bytes to read at once
+        :type chunk_size: int
+        :return: The lines of the job log
+        :rtype : collections.Iterable[basestring]
+        """
+        response = self._request('GET', JobEndPoint + "/" + job_id,
+                                 params={'show': 'log'}, stream=True)
+        try:
+            if response.status_code == httplib.BAD_REQUEST:
+                raise ValueError('%s is a bad job id' % job_id)
+            elif response.status_code != httplib.OK:
+                raise errors.OozieError(errors.error_message_from_response(response))
+            for line in response.iter_lines(chunk_size=chunk_size):
+                yield line
+        finally:
+            response.close()
+
     def get_all_jobs_information(self, timezone='GMT'):
         """
         Retrieves workflow and coordinator jobs information
@@ -323,20 +801,79 @@ class Oozie(object):
         :return: A list of all jobs information
         :rtype : list[dict]
         """
-        response = requests.get(self.base_uri + JobsEndPoint, params={'timezone': timezone})
+        response = self._request('GET', JobsEndPoint, params={'timezone': timezone})
         if response.status_code == httplib.OK:
             return response.json['jobs']
         else:
             raise errors.OozieError(errors.error_message_from_response(response))
 
+    def get_jobs_information(self, job_type=JobType.WORKFLOW, name=None, user=None, status=None,
+                             start_created_time=None, end_created_time=None, offset=1, length=DEFAULT_PAGE_LENGTH,
+                             timezone='GMT'):
+        """
+        Retrieves a page of the jobs matching a filter.
+        Each filter argument can be a single value or a list of values.
+
+        :param job_type: The type of the jobs to retrieve (one of JobType)
+        :type job_type: str
+        :param name: application name(s) of the jobs
+        :type name: basestring or list[basestring]
+        :param user: user(s) that submitted the jobs
+        :type user: basestring or list[basestring]
+        :param status: status(es) of the jobs
+        :type status: basestring or list[basestring]
+        :param start_created_time: only jobs created at or after this time (UTC datetime or oozie time string)
+        :type start_created_time: datetime.datetime or basestring
+        :param end_created_time: only jobs created at or before this time (UTC datetime or oozie time string)
+        :type end_created_time: datetime.datetime or basestring
+        :param offset: The first job to retrieve (starting from 1)
+        :type offset: int
+        :param length: The number of jobs to retrieve
+        :type length: int
+        :param timezone: The timezone to use for times
+        :type timezone: basestring
+        :return: A list of jobs information
+        :rtype : list[dict]
+        """
+        params = {'jobtype': job_type, 'offset': offset, 'len': length, 'timezone': timezone}
+        jobs_filter = _jobs_filter(name, user, status, start_created_time, end_created_time)
+        if jobs_filter:
+            params['filter'] = jobs_filter
+        response = self._request('GET', JobsEndPoint, params=params)
+        if response.status_code == httplib.OK:
+            return response.json().get(_JOBS_KEYS[job_type]) or []
+        else:
+            raise errors.OozieError(errors.error_message_from_response(response))
+
+    def iter_jobs_information(self, job_type=JobType.WORKFLOW, name=None, user=None, status=None,
+                              start_created_time=None, end_created_time=None, page_length=DEFAULT_PAGE_LENGTH,
+                              timezone='GMT'):
+        """
+        Iterate over all the jobs matching a filter, retrieving them a page at a time.
+        See get_jobs_information for the filter arguments.
+
+        :param page_length: The number of jobs to retrieve per request
+        :type page_length: int
+        :rtype : collections.Iterable[dict]
+        """
+        offset = 1
+        while True:
+            jobs = self.get_jobs_information(job_type, name, user, status, start_created_time, end_created_time,
+                                             offset, page_length, timezone)
+            for job in jobs:
+                yield job
+            if len(jobs) < page_length:
+                break
+            offset += page_length
+
     def _get_system_status(self):
-        response = requests.get(self.base_uri + AdminEndPoint.SYSTEM_STATUS)
+        response = self._request('GET', AdminEndPoint.SYSTEM_STATUS)
         return response.json()['systemMode']
 
     def _set_system_status(self, status):
         if status not in (SystemStatus.NORMAL, SystemStatus.NOWEBSERVICE, SystemStatus.SAFEMODE):
             raise ValueError('%s is not a legall status' % status)
-        response = requests.put(self.base_uri + AdminEndPoint.SYSTEM_STATUS, params={'systemmode': status})
+        response = self._request('PUT', AdminEndPoint.SYSTEM_STATUS, params={'systemmode': status})
         if response.status_code != httplib.OK:
             raise errors.OozieError(errors.error_message_from_response(response))
 
@@ -346,7 +883,7 @@ class Oozie(object):
         Oozie system OS environment
         :rtype : dict
         """
-        return requests.get(self.base_uri + AdminEndPoint.OS_ENV).json()
+        return self._request('GET', AdminEndPoint.OS_ENV).json()
 
     @property
     def java_system_properties(self):
@@ -354,7 +891,7 @@ class Oozie(object):
         Oozie Java system properties.
         :rtype : dict
         """
-        return requests.get(self.base_uri + AdminEndPoint.JAVA_SYS_PROPERTIES).json()
+        return self._request('GET', AdminEndPoint.JAVA_SYS_PROPERTIES).json()
 
     @property
     def configuration(self):
@@ -362,7 +899,7 @@ class Oozie(object):
         Oozie system configuration
         :rtype : dict
         """
-        return requests.get(self.base_uri + AdminEndPoint.CONFIGURATION).json()
+        return self._request('GET', AdminEndPoint.CONFIGURATION).json()
 
     @property
     def instrumentation(self):
@@ -370,7 +907,7 @@ class Oozie(object):
         Oozie instrumentation information
         :rtype : dict
         """
-        return requests.get(self.base_uri + AdminEndPoint.INSTRUMENTATION).json()
+        return self._request('GET', AdminEndPoint.INSTRUMENTATION).json()
 
     @property
     def version(self):
@@ -378,7 +915,7 @@ class Oozie(object):
         Oozie build version
         :rtype : basestring
         """
-        return requests.get(self.base_uri + AdminEndPoint.VERSION).json()['buildVersion']
+        return self._request('GET', AdminEndPoint.VERSION).json()['buildVersion']
 
     @property
     def time_zones(self):
@@ -386,7 +923,7 @@ class Oozie(object):
         available time zones
         :rtype : list[dict]
         """
-        return requests.get(self.base_uri + AdminEndPoint.TIME_ZONES).json()['available-timezones']
+        return self._request('GET', AdminEndPoint.TIME_ZONES).json()['available-timezones']
 
 
 
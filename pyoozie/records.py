@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compact, typed records of the job information returned by the oozie server.
+
+Records keep only the fields commonly used for monitoring in slots, parse their timestamps on first access
+(caching the result), and intern their statuses so they can be compared by identity with JobStatus and ActionStatus
+(e.g: ``job.status is JobStatus.RUNNING``).
+"""
+import calendar
+import email.utils
+
+from oozie import JobType
+
+__author__ = 'pavel'
+__all__ = ['JobInfo', 'ActionInfo', 'parse_time', 'parse_jobs']
+
+_MONTHS = dict((name, number) for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1))
+
+_JOB_TYPES_BY_SUFFIX = {'W': JobType.WORKFLOW, 'C': JobType.COORDINATOR, 'B': JobType.BUNDLE}
+
+
+def parse_time(value):
+    """
+    Parse a time returned by the oozie server (e.g: 'Wed, 01 Jan 2014 10:00:00 GMT')
+
+    :param value: the time string
+    :type value: basestring
+    :return: seconds since the epoch (UTC), None if value is None
+    :rtype : float
+    """
+    if value is None:
+        return None
+    try:
+        _, day, month, year, clock, zone = value.split()
+        hours, minutes, seconds = clock.split(':')
+        if zone == 'GMT':
+            return float(calendar.timegm((int(year), _MONTHS[month], int(day), int(hours), int(minutes),
+                                          int(seconds))))
+    except (ValueError, KeyError):
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        raise ValueError('%s is not a legal time' % value)
+    return float(email.utils.mktime_tz(parsed))
+
+
+def _intern(value):
+    # statuses and types are ASCII, intern() only takes byte strings (anything else is kept as is)
+    if isinstance(value, unicode):
+        try:
+            value = value.encode('ascii')
+        except UnicodeEncodeError:
+            return value
+    return intern(value) if isinstance(value, str) else value
+
+
+def _lazy_time(slot):
+    """
+    A property parsing the time string stored in slot on first access and caching the result in the same slot
+    """
+    def get(self):
+        value = getattr(self, slot)
+        if isinstance(value, basestring):
+            value = parse_time(value)
+            setattr(self, slot, value)
+        return value
+
+    return property(get)
+
+
+class ActionInfo(object):
+    """
+    The information of a workflow action or of a coordinator action
+    """
+    __slots__ = ('id', 'name', 'type', 'status', 'error_code', 'error_message', 'external_id', '_start_time',
+                 '_end_time', '_nominal_time')
+
+    def __init__(self, action_id, name, action_type, status, start_time=None, end_time=None, error_code=None,
+                 error_message=None, external_id=None, nominal_time=None):
+        """
+        :param start_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        :param end_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        :param nominal_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        """
+        self.id = action_id
+        self.name = name
+        self.type = _intern(action_type)
+        self.status = _intern(status)
+        self.error_code = error_code
+        self.error_message = error_message
+        self.external_id = external_id
+        self._start_time = start_time
+        self._end_time = end_time
+        self._nominal_time = nominal_time
+
+    start_time = _lazy_time('_start_time')
+    end_time = _lazy_time('_end_time')
+    nominal_time = _lazy_time('_nominal_time')
+
+    @property
+    def duration(self):
+        """
+        :return: seconds the action ran, None if it did not end
+        :rtype : float
+        """
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    @classmethod
+    def from_json(cls, action):
+        """
+        :param action: a workflow action or a coordinator action as returned by the server
+        :type action: dict
+        :rtype : ActionInfo
+        """
+        if 'actionNumber' in action:
+            return cls(action['id'], str(action['actionNumber']), 'coordinator-action', action.get('status'),
+                       action.get('createdTime'), action.get('lastModifiedTime'), action.get('errorCode'),
+                       action.get('errorMessage'), action.get('externalId'), action.get('nominalTime'))
+        return cls(action['id'], action.get('name'), action.get('type'), action.get('status'),
+                   action.get('startTime'), action.get('endTime'), action.get('errorCode'),
+                   action.get('errorMessage'), action.get('externalId'))
+
+    def __repr__(self):
+        return 'ActionInfo(id=%r, status=%r)' % (self.id, self.status)
+
+
+class JobInfo(object):
+    """
+    The information of a workflow, coordinator or bundle job
+    """
+    __slots__ = ('id', 'type', 'app_name', 'app_path', 'user', 'status', 'run', 'parent_id', 'actions',
+                 '_created_time', '_start_time', '_end_time', '_last_modified_time')
+
+    def __init__(self, job_id, app_name, status, user=None, app_path=None, run=0, parent_id=None,
+                 created_time=None, start_time=None, end_time=None, last_modified_time=None, actions=None):
+        """
+        :param created_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        :param start_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        :param end_time: seconds since the epoch, or a time string as returned by the server (parsed lazily)
+        :param last_modified_time: seconds since the epoch, or a time string as returned by the server
+        :param actions: the actions of the job, None if they were not retrieved
+        :type actions: list[ActionInfo]
+        """
+        self.id = job_id
+        self.type = _JOB_TYPES_BY_SUFFIX.get(job_id.rsplit('-', 1)[-1], JobType.WORKFLOW)
+        self.app_name = app_name
+        self.app_path = app_path
+        self.user = user
+        self.status = _intern(status)
+        self.run = run
+        self.parent_id = parent_id
+        self.actions = tuple(actions) if actions is not None else None
+        self._created_time = created_time
+        self._start_time = start_time
+        self._end_time = end_time
+        self._last_modified_time = last_modified_time
+
+    created_time = _lazy_time('_created_time')
+    start_time = _lazy_time('_start_time')
+    end_time = _lazy_time('_end_time')
+    last_modified_time = _lazy_time('_last_modified_time')
+
+    @property
+    def duration(self):
+        """
+        :return: seconds the job ran, None if it did not end
+        :rtype : float
+        """
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    @classmethod
+    def from_json(cls, job):
+        """
+        :param job: a job as returned by the jobs or job end points (workflow, coordinator or bundle)
+        :type job: dict
+        :rtype : JobInfo
+        """
+        prefix = 'coordJob' if 'coordJobId' in job else 'bundleJob' if 'bundleJobId' in job else None
+        if prefix:
+            job_id, app_name, app_path = job[prefix + 'Id'], job.get(prefix + 'Name'), job.get(prefix + 'Path')
+        else:
+            job_id, app_name, app_path = job['id'], job.get('appName'), job.get('appPath')
+        actions = job.get('actions')
+        return cls(job_id, app_name, job.get('status'), job.get('user'), app_path, job.get('run') or 0,
+                   job.get('parentId'), job.get('createdTime'), job.get('startTime'), job.get('endTime'),
+                   job.get('lastModTime') or job.get('lastModifiedTime'),
+                   [ActionInfo.from_json(action) for action in actions] if actions else None)
+
+    def __repr__(self):
+        return 'JobInfo(id=%r, app_name=%r, status=%r)' % (self.id, self.app_name, self.status)
+
+
+def parse_jobs(jobs):
+    """
+    :param jobs: jobs as returned by the server (e.g: by Oozie.get_jobs_information)
+    :type jobs: list[dict]
+    :rtype : list[JobInfo]
+    """
+    return [JobInfo.from_json(job) for job in jobs]
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Submit a DAG of oozie jobs, every job as soon as the jobs it depends on succeeded.
+
+The jobs are tracked by a single poller and the state of the run is persisted after every change, so a run
+interrupted by a crash resumes from where it stopped (submitted jobs are tracked, not submitted again).
+A job is persisted as SUBMITTING between its creation and its start, a resumed run checks its status instead of
+creating it again (and starts it only if it is still in PREP)::
+
+    scheduler = DagScheduler(Oozie('oozie-host'), [
+        ScheduledJob('extract', {'oozie.wf.application.path': '/apps/extract'}),
+        ScheduledJob('load', {'oozie.wf.application.path': '/apps/load'}, depends_on=['extract'], queue='etl'),
+    ], quotas={'etl': 10}, state_path='/var/run/daily.json')
+    states = scheduler.run()
+"""
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+import errors
+import utils
+from oozie import JobAction, JobStatus, FINAL_JOB_STATUSES
+
+__author__ = 'pavel'
+__all__ = ['FailurePolicy', 'TaskState', 'ScheduledJob', 'DagScheduler']
+
+
+class FailurePolicy:
+    # submit nothing more after a failure, wait for the submitted jobs to end
+    HALT = 'halt'
+    # skip the jobs depending on the failed job (directly or not), keep running the others
+    SKIP_DOWNSTREAM = 'skip-downstream'
+
+
+class TaskState:
+    WAITING = 'WAITING'
+    # created on the server (PREP) but not started yet
+    SUBMITTING = 'SUBMITTING'
+    SUBMITTED = 'SUBMITTED'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    SKIPPED = 'SKIPPED'
+
+
+FINAL_TASK_STATES = (TaskState.SUCCEEDED, TaskState.FAILED, TaskState.SKIPPED)
+
+
+class ScheduledJob(object):
+    def __init__(self, name, properties, depends_on=None, queue='default'):
+        """
+        A job of the DAG
+
+        :param name: unique name of the job in the DAG
+        :type name: str
+        :param properties: the job configuration (e.g: oozie.wf.application.path, user.name)
+        :type properties: dict
+        :param depends_on: names of the jobs that must succeed before the job is submitted
+        :type depends_on: list[str]
+        :param queue: name of the quota the job counts against while running
+        :type queue: str
+        """
+        self.name = name
+        self.properties = properties
+        self.depends_on = list(depends_on or [])
+        self.queue = queue
+        self.state = TaskState.WAITING
+        self.job_id = None
+        self.status = None
+        self.error = None
+
+    def to_json(self):
+        return {'state': self.state, 'job_id': self.job_id, 'status': self.status, 'error': self.error}
+
+    def __repr__(self):
+        return '<ScheduledJob %s %s>' % (self.name, self.state)
+
+
+class DagScheduler(object):
+    DEFAULT_POLL_INTERVAL = 30
+
+    def __init__(self, oozie, jobs, quotas=None, failure_policy=FailurePolicy.SKIP_DOWNSTREAM, state_path=None,
+                 poll_interval=DEFAULT_POLL_INTERVAL, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Create a scheduler (resuming the persisted state of a previous run if state_path exists)
+
+        :param oozie: the client to submit with
+        :type oozie: pyoozie.Oozie
+        :type jobs: list[ScheduledJob]
+        :param quotas: maximal number of running jobs by queue name, queues without a quota are unlimited
+        :type quotas: dict[str, int]
+        :param failure_policy: what to do when a job fails (see FailurePolicy)
+        :type failure_policy: str
+        :param state_path: path of a JSON file to persist the state of the run to
+        :type state_path: basestring
+        :param poll_interval: seconds between polls of the submitted jobs
+        :type poll_interval: float
+        :param concurrency: maximal number of concurrent requests when polling
+        :type concurrency: int
+        :raise ValueError: if the jobs do not form a DAG (unknown dependencies, duplicate names or cycles)
+        """
+        self.oozie = oozie
+        self.jobs = list(jobs)
+        self.quotas = dict(quotas or {})
+        self.failure_policy = failure_policy
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.halted = False
+        self._jobs_by_name = {}
+        self._downstream = {}
+        self._validate()
+        if state_path is not None and os.path.exists(state_path):
+            self._load_state()
+
+    def _validate(self):
+        for job in self.jobs:
+            if job.name in self._jobs_by_name:
+                raise ValueError('duplicate job name %s' % job.name)
+            self._jobs_by_name[job.name] = job
+            self._downstream[job.name] = []
+        for job in self.jobs:
+            for upstream in job.depends_on:
+                if upstream not in self._jobs_by_name:
+                    raise ValueError('%s depends on an unknown job %s' % (job.name, upstream))
+                self._downstream[upstream].append(job.name)
+
+        # Kahn's algorithm, the jobs left unvisited are on a cycle
+        pending = dict((job.name, len(set(job.depends_on))) for job in self.jobs)
+        ready = [name for name, count in pending.iteritems() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for downstream in set(self._downstream[name]):
+                pending[downstream] -= 1
+                if pending[downstream] == 0:
+                    ready.append(downstream)
+        if visited != len(self.jobs):
+            raise ValueError('dependency cycle between %s' % ', '.join(sorted(n for n, c in pending.iteritems() if c)))
+
+    def _load_state(self):
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        self.halted = state.get('halted', False)
+        for name, job_state in state.get('jobs', {}).iteritems():
+            job = self._jobs_by_name.get(name)
+            if job is not None:
+                job.state = job_state['state']
+                job.job_id = job_state['job_id']
+                job.status = job_state['status']
+                job.error = job_state['error']
+
+    def save_state(self):
+        """
+        Persist the state of the run (atomically, a crash never leaves a partial state file)
+        """
+        if self.state_path is None:
+            return
+        state = {'halted': self.halted, 'jobs': dict((job.name, job.to_json()) for job in self.jobs)}
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(self.state_path))
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(state, temp_file, indent=1, sort_keys=True)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.rename(temp_path, self.state_path)
+        except:
+            os.remove(temp_path)
+            raise
+
+    def reset(self, names=None):
+        """
+        Let failed and skipped jobs run again (e.g: after fixing the cause of a failure before resuming).
+        Clears a halt.
+
+        :param names: the jobs to reset, all the failed and skipped jobs if None
+        :type names: list[str]
+        """
+        for job in self.jobs:
+            if (names is None or job.name in names) and job.state in (TaskState.FAILED, TaskState.SKIPPED):
+                job.state, job.job_id, job.status, job.error = TaskState.WAITING, None, None, None
+        if names is None:
+            self.halted = False
+        self._skip_downstream_of_failures()
+        self.save_state()
+
+    def get_states(self):
+        """
+        :return: the state of every job by name
+        :rtype : dict[str, str]
+        """
+        return dict((job.name, job.state) for job in self.jobs)
+
+    def is_done(self):
+        """
+        :return: True if no job is running and no job can be submitted anymore
+        """
+        if any(job.state in (TaskState.SUBMITTING, TaskState.SUBMITTED) for job in self.jobs):
+            return False
+        return self.halted or not self._ready_jobs()
+
+    def run(self):
+        """
+        Submit and track the jobs until the run is done
+
+        :return: the state of every job by name
+        :rtype : dict[str, str]
+        """
+        self.step()
+        while not self.is_done():
+            time.sleep(self.poll_interval)
+            self.step()
+        return self.get_states()
+
+    def step(self):
+        """
+        Poll the submitted jobs once, then submit the jobs that became ready
+        """
+        self._poll()
+        self._submit_ready_jobs()
+
+    def _ready_jobs(self):
+        return [job for job in self.jobs if job.state == TaskState.WAITING and
+                all(self._jobs_by_name[upstream].state == TaskState.SUCCEEDED for upstream in job.depends_on)]
+
+    def _submit_ready_jobs(self):
+        running = {}
+        for job in self.jobs:
+            if job.state in (TaskState.SUBMITTING, TaskState.SUBMITTED):
+                running[job.queue] = running.get(job.queue, 0) + 1
+
+        # jobs created by an interrupted run (or whose start failed) are never created again
+        for job in self.jobs:
+            if job.state == TaskState.SUBMITTING:
+                self._recover(job)
+
+        for job in self._ready_jobs():
+            if self.halted:
+                return
+            quota = self.quotas.get(job.queue)
+            if quota is not None and running.get(job.queue, 0) >= quota:
+                continue
+            try:
+                job.job_id = self.oozie.create_job(job.properties)
+            except (errors.OozieError, requests.RequestException, ValueError) as e:
+                job.error = str(e)
+                self._on_failure(job)
+                self.save_state()
+                continue
+            # persisted before starting, a crash from here on never creates the job twice
+            job.state = TaskState.SUBMITTING
+            running[job.queue] = running.get(job.queue, 0) + 1
+            self.save_state()
+            self._start(job)
+
+    def _start(self, job):
+        """
+        Start a created job (in PREP)
+        """
+        try:
+            self.oozie.do_job_action(job.job_id, JobAction.START)
+        except requests.RequestException as e:
+            # the start may have reached the server, the job is recovered on the next step
+            job.error = str(e)
+        except errors.OozieError as e:
+            job.error = str(e)
+            self._recover(job, start=False)
+        else:
+            job.state, job.status, job.error = TaskState.SUBMITTED, JobStatus.RUNNING, None
+        self.save_state()
+
+    def _recover(self, job, start=True):
+        """
+        Continue with a SUBMITTING job by its status on the server, it may have been started before a crash.
+        A job still in PREP is started, or killed if start is False (the server refused to start it) so it never
+        runs untracked. The job stays SUBMITTING if its status is unknown, it is recovered again on the next step.
+        """
+        try:
+            status = self.oozie.get_job_information(job.job_id)['status']
+        except (errors.OozieError, requests.RequestException) as e:
+            job.error = str(e)
+            return
+        if status == JobStatus.PREP and start:
+            self._start(job)
+            return
+        if status == JobStatus.PREP:
+            try:
+                self.oozie.do_job_action(job.job_id, JobAction.KILL)
+            except (errors.OozieError, requests.RequestException):
+                return
+            job.status, job.error = JobStatus.KILLED, 'job %s failed to start: %s' % (job.job_id, job.error)
+            self._on_failure(job)
+        else:
+            job.state, job.error = TaskState.SUBMITTED, None
+            self._update_status(job, status)
+        self.save_state()
+
+    def _poll(self):
+        submitted = [job for job in self.jobs if job.state == TaskState.SUBMITTED]
+        if not submitted:
+            return
+        results = utils.concurrent_map(lambda job: self.oozie.get_job_information(job.job_id), submitted,
+                                       self.concurrency)
+        changed = False
+        for job, (info, error) in zip(submitted, results):
+            if error is not None:
+                # a transient error, the job is polled again next time
+                continue
+            changed = self._update_status(job, info['status']) or changed
+        if changed:
+            self.save_state()
+
+    def _update_status(self, job, status):
+        """
+        :return: True if the status of the submitted job changed
+        """
+        if status == job.status:
+            return False
+        job.status = status
+        if status == JobStatus.SUCCEEDED:
+            job.state = TaskState.SUCCEEDED
+        elif status in FINAL_JOB_STATUSES:
+            job.error = 'job %s ended %s' % (job.job_id, status)
+            self._on_failure(job)
+        return True
+
+    def _on_failure(self, job):
+        job.state = TaskState.FAILED
+        if self.failure_policy == FailurePolicy.HALT:
+            self.halted = True
+        else:
+            self._skip_downstream_of_failures()
+
+    def _skip_downstream_of_failures(self):
+        if self.failure_policy == FailurePolicy.HALT:
+            return
+        stack = [job.name for job in self.jobs if job.state in (TaskState.FAILED, TaskState.SKIPPED)]
+        while stack:
+            for name in self._downstream[stack.pop()]:
+                downstream = self._jobs_by_name[name]
+                if downstream.state == TaskState.WAITING:
+                    downstream.state = TaskState.SKIPPED
+                    stack.append(name)
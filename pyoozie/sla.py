@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Client side detection of SLA misses.
+
+An SLAEvaluator tracks jobs (or their actions) against their SLAs. Every evaluation polls the tracked jobs once, in
+bulk, and reports both the misses that happened and the misses that are likely given the expected durations of the
+jobs, with the projected lateness, long before the SLA deadline passes::
+
+    evaluator = SLAEvaluator(client)
+    evaluator.track(job_id, SLA(datetime.datetime(2014, 1, 1, 2), should_end=6 * 60), expected_duration=4 * 3600)
+    for miss in evaluator.evaluate():
+        print miss.job_id, miss.event, miss.state, miss.lateness
+"""
+import calendar
+import datetime
+import threading
+import time
+
+import utils
+from oozie import FINAL_JOB_STATUSES
+from records import JobInfo
+
+__author__ = 'pavel'
+__all__ = ['SLAEvent', 'MissState', 'SLAMiss', 'SLAEvaluator']
+
+
+class SLAEvent:
+    START_MISS = 'start_miss'
+    END_MISS = 'end_miss'
+    DURATION_MISS = 'duration_miss'
+
+
+class MissState:
+    # the job will miss the SLA if it runs for its expected duration
+    LIKELY = 'likely'
+    # the SLA was missed
+    ACTUAL = 'actual'
+
+
+class SLAMiss(object):
+    __slots__ = ('job_id', 'action_name', 'event', 'state', 'deadline', 'lateness')
+
+    def __init__(self, job_id, action_name, event, state, deadline, lateness):
+        """
+        :param event: see SLAEvent
+        :param state: see MissState
+        :param deadline: seconds since the epoch the job should have started or ended by,
+                         the maximal duration in seconds for a duration miss
+        :param lateness: seconds the job is (or is projected to be) late by
+        """
+        self.job_id = job_id
+        self.action_name = action_name
+        self.event = event
+        self.state = state
+        self.deadline = deadline
+        self.lateness = lateness
+
+    def __repr__(self):
+        return 'SLAMiss(job_id=%r, action_name=%r, event=%r, state=%r, lateness=%r)' % (
+            self.job_id, self.action_name, self.event, self.state, self.lateness)
+
+
+def _seconds_since_epoch(value):
+    if isinstance(value, datetime.datetime):
+        return calendar.timegm(value.utctimetuple())
+    if isinstance(value, basestring):
+        try:
+            return calendar.timegm(time.strptime(value, utils.OOZIE_TIME_FORMAT))
+        except ValueError:
+            raise ValueError('the nominal time %s can not be evaluated by the client' % value)
+    return value
+
+
+def _minutes_to_seconds(value, name):
+    if value is None:
+        return None
+    if not isinstance(value, (int, long, float)):
+        raise ValueError('%s %s can not be evaluated by the client, use minutes' % (name, value))
+    return value * 60.0
+
+
+class _Target(object):
+    __slots__ = ('job_id', 'action_name', 'start_deadline', 'end_deadline', 'max_duration', 'expected_duration')
+
+    def __init__(self, job_id, action_name, start_deadline, end_deadline, max_duration, expected_duration):
+        self.job_id = job_id
+        self.action_name = action_name
+        self.start_deadline = start_deadline
+        self.end_deadline = end_deadline
+        self.max_duration = max_duration
+        self.expected_duration = expected_duration
+
+
+class SLAEvaluator(object):
+    def __init__(self, oozie, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        :param oozie: the client to poll the jobs with
+        :type oozie: pyoozie.Oozie
+        :param concurrency: maximal number of concurrent requests when polling
+        :type concurrency: int
+        """
+        self.oozie = oozie
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._targets = []
+
+    def track(self, job_id, sla, action_name=None, expected_duration=None, nominal_time=None):
+        """
+        Track a job or one of its actions against an SLA
+
+        :param sla: the SLA, its times in minutes (EL expressions can not be evaluated by the client)
+        :type sla: pyoozie.workflow.SLA
+        :param action_name: the action the SLA is of, the whole job if None
+        :param expected_duration: the seconds the job usually runs, likely misses are projected with it
+        :type expected_duration: float
+        :param nominal_time: the nominal time, if the SLA's is an EL expression
+                             (e.g: the nominal time of the coordinator action that created the job)
+        :type nominal_time: datetime.datetime or float
+        :raise ValueError: if the SLA can not be evaluated by the client
+        """
+        nominal_time = _seconds_since_epoch(nominal_time if nominal_time is not None else sla.nominal_time)
+        should_start = _minutes_to_seconds(sla.should_start, 'should-start')
+        target = _Target(job_id, action_name,
+                         nominal_time + should_start if should_start is not None else None,
+                         nominal_time + _minutes_to_seconds(sla.should_end, 'should-end'),
+                         _minutes_to_seconds(sla.max_duration, 'max-duration'), expected_duration)
+        with self._lock:
+            self._targets.append(target)
+
+    def track_workflow(self, job_id, workflow, nominal_time=None, expected_durations=None):
+        """
+        Track a workflow job against the SLAs of its workflow and of its actions
+
+        :type workflow: pyoozie.workflow.Workflow
+        :param expected_durations: the seconds every action (by name) and the whole job (under None) usually run
+        :type expected_durations: dict
+        """
+        expected_durations = expected_durations or {}
+        if workflow.sla is not None:
+            self.track(job_id, workflow.sla, None, expected_durations.get(None), nominal_time)
+        for node in workflow._collect_all_nodes():
+            if getattr(node, 'sla', None) is not None:
+                self.track(job_id, node.sla, node.name, expected_durations.get(node.name), nominal_time)
+
+    def untrack(self, job_id):
+        with self._lock:
+            self._targets = [target for target in self._targets if target.job_id != job_id]
+
+    def get_tracked_jobs(self):
+        """
+        :rtype : list[basestring]
+        """
+        with self._lock:
+            return sorted(set(target.job_id for target in self._targets))
+
+    def evaluate(self, now=None):
+        """
+        Poll the tracked jobs and find their SLA misses.
+        Jobs that ended are no longer tracked after their last evaluation.
+
+        :param now: the time to evaluate at, seconds since the epoch
+        :return: the actual and likely misses
+        :rtype : list[SLAMiss]
+        """
+        job_ids = self.get_tracked_jobs()
+        results = utils.concurrent_map(self.oozie.get_job_information, job_ids, self.concurrency)
+        jobs = dict((job_id, JobInfo.from_json(info)) for job_id, (info, error) in zip(job_ids, results)
+                    if error is None)
+        misses = self.evaluate_jobs(jobs, now)
+        ended = set(job_id for job_id, job in jobs.iteritems() if job.status in FINAL_JOB_STATUSES)
+        with self._lock:
+            self._targets = [target for target in self._targets if target.job_id not in ended]
+        return misses
+
+    def evaluate_jobs(self, jobs, now=None):
+        """
+        Find the SLA misses of the tracked jobs given their information (without polling)
+
+        :param jobs: the information of the tracked jobs by job id, jobs that are missing are skipped
+        :type jobs: dict[basestring, JobInfo]
+        :rtype : list[SLAMiss]
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            targets = list(self._targets)
+        misses = []
+        for target in targets:
+            job = jobs.get(target.job_id)
+            if job is None:
+                continue
+            start_time, end_time = job.start_time, job.end_time
+            if target.action_name is not None:
+                actions = [action for action in job.actions or () if action.name == target.action_name]
+                start_time, end_time = (actions[0].start_time, actions[0].end_time) if actions else (None, None)
+            misses.extend(self._misses(target, start_time, end_time, now))
+        return misses
+
+    @staticmethod
+    def _misses(target, start_time, end_time, now):
+        def miss(event, state, deadline, lateness):
+            return SLAMiss(target.job_id, target.action_name, event, state, deadline, lateness)
+
+        expected = target.expected_duration
+        if target.start_deadline is not None:
+            started = start_time if start_time is not None else now
+            if started > target.start_deadline:
+                yield miss(SLAEvent.START_MISS, MissState.ACTUAL, target.start_deadline,
+                           started - target.start_deadline)
+
+        if end_time is not None:
+            if end_time > target.end_deadline:
+                yield miss(SLAEvent.END_MISS, MissState.ACTUAL, target.end_deadline, end_time - target.end_deadline)
+        elif now > target.end_deadline:
+            yield miss(SLAEvent.END_MISS, MissState.ACTUAL, target.end_deadline, now - target.end_deadline)
+        elif expected is not None:
+            projected_end = max(now, start_time + expected) if start_time is not None else now + expected
+            if projected_end > target.end_deadline:
+                yield miss(SLAEvent.END_MISS, MissState.LIKELY, target.end_deadline,
+                           projected_end - target.end_deadline)
+
+        if target.max_duration is not None:
+            if start_time is not None:
+                duration = (end_time if end_time is not None else now) - start_time
+                if duration > target.max_duration:
+                    yield miss(SLAEvent.DURATION_MISS, MissState.ACTUAL, target.max_duration,
+                               duration - target.max_duration)
+                    return
+            if end_time is None and expected is not None and expected > target.max_duration:
+                yield miss(SLAEvent.DURATION_MISS, MissState.LIKELY, target.max_duration,
+                           expected - target.max_duration)
@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Split workflows that are too large for the oozie server into a parent workflow and chained sub-workflows.
+
+The server rejects workflow definitions longer than its maximal length
+(oozie.service.WorkflowAppService.WorkflowDefinitionMaxLength) and may limit the number of actions. A workflow over
+the limits is split at its series cut points (nodes every successful path passes through) into children run one
+after the other by sub-workflow actions. A block that does not fit alone (e.g: a large fork) keeps its fork or
+decision in the parent and moves its branches into children, so branches still run in parallel. A parent that is
+still over the limits is split the same way, consecutive sub-workflow actions moving into intermediate children::
+
+    for directory, child in split_workflow(workflow, max_length=100000, max_actions=500):
+        upload(posixpath.join(app_path, directory, 'workflow.xml'), child.to_string())
+
+The children are referenced relative to the application path of their parent (${wf:appPath()}/<child name>), the
+root workflow must be submitted with its application directory as its path. Error handling nodes (the nodes that
+can not reach the end node, e.g: kill nodes) are copied to every child transitioning to them; a child that fails
+fails the sub-workflow action in its parent, which transitions to a kill node.
+"""
+import heapq
+import posixpath
+
+from lxml import etree
+
+from workflow import (ActionNode, StartNode, EndNode, KillNode, DecisionNode, ForkNode, JoinNode, SubWorkflowAction,
+                      Workflow, FrozenWorkflow, _Frozen, _transitions, _workflow_to_xml)
+
+__author__ = 'pavel'
+__all__ = ['estimate_size', 'split_workflow']
+
+# the default of oozie.service.WorkflowAppService.WorkflowDefinitionMaxLength
+DEFAULT_MAX_LENGTH = 100000
+
+CHILD_APP_PATH = '${wf:appPath()}/%s'
+
+
+def estimate_size(workflow):
+    """
+    :type workflow: Workflow or FrozenWorkflow
+    :return: (length of the serialized workflow, number of nodes, number of actions)
+    :rtype : tuple
+    :raise ValueError: if the workflow is not valid
+    """
+    frozen = workflow if isinstance(workflow, FrozenWorkflow) else workflow.freeze()
+    return len(frozen.to_string()), len(frozen.nodes), len(frozen.actions)
+
+
+def split_workflow(workflow, max_length=DEFAULT_MAX_LENGTH, max_actions=None):
+    """
+    Split a workflow into workflows that fit the server's limits (see the module documentation).
+    The workflow itself is not changed, a workflow that fits is returned as is.
+
+    :type workflow: Workflow
+    :param max_length: the maximal length of a (pretty printed) workflow definition
+    :type max_length: int
+    :param max_actions: the maximal number of actions of a workflow, None for no limit
+    :type max_actions: int
+    :return: (directory of the workflow relative to the root's application directory, the workflow),
+             the root first
+    :rtype : list[(str, Workflow)]
+    :raise ValueError: if the workflow is not valid, or has a single node (or a block with no cut points)
+                       that does not fit the limits
+    """
+    splitter = _Splitter(max_length, max_actions)
+    splitter.split(workflow, '')
+    for _, split in splitter.workflows:
+        if not splitter.fits(*estimate_size(split)[::2]):
+            raise ValueError('workflow %s could not be split to fit the limits' % split.name)
+    return splitter.workflows
+
+
+def _element_length(element):
+    string = etree.tostring(element, pretty_print=True)
+    # nodes are indented (by 2 spaces) in the workflow
+    return len(string) + 2 * string.count('\n')
+
+
+def _node_length(node, global_section):
+    if isinstance(node, ActionNode):
+        element = node.to_xml(global_section)
+        if node.sla is not None:
+            element.append(node.sla.to_xml())
+        return _element_length(element)
+    return _element_length(node.to_xml())
+
+
+def _thaw(value):
+    if isinstance(value, _Frozen):
+        return _copy(value)
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
+
+
+def _copy(frozen):
+    """
+    A mutable copy of a frozen node (or global section), its transitions are still names
+    """
+    copy = object.__new__(frozen.__class__.__bases__[1])
+    copy.__dict__.update((name, _thaw(value)) for name, value in frozen.__dict__.iteritems())
+    return copy
+
+
+def _link(node, nodes):
+    """
+    Replace the names a node transitions to with the nodes
+    :type nodes: dict[str, Node]
+    """
+    if isinstance(node, ActionNode):
+        node.ok, node.error = nodes[node.ok], nodes[node.error]
+    elif isinstance(node, DecisionNode):
+        node.cases = [(nodes[case_to], predicate) for case_to, predicate in node.cases]
+        node.default = nodes[node.default]
+    elif isinstance(node, ForkNode):
+        node.paths = [nodes[path] for path in node.paths]
+    elif isinstance(node, JoinNode):
+        node.to = nodes[node.to]
+
+
+class _Splitter(object):
+    def __init__(self, max_length, max_actions):
+        self.max_length = max_length
+        self.max_actions = max_actions
+        self.workflows = []
+
+    def fits(self, length, actions):
+        return length <= self.max_length and (self.max_actions is None or actions <= self.max_actions)
+
+    def split(self, workflow, directory):
+        frozen = workflow.freeze()
+        length, _, actions = estimate_size(frozen)
+        if self.fits(length, actions):
+            self.workflows.append((directory, workflow))
+            return
+        parent, children = _Graph(frozen, self).split()
+        if estimate_size(parent)[::2] >= (length, actions):
+            raise ValueError('workflow %s could not be split to fit the limits' % workflow.name)
+
+        # a parent over the limits is split too, its sub-workflow actions move to children of their own
+        start = len(self.workflows)
+        self.split(parent, directory)
+        directories = {}
+        for split_directory, split in self.workflows[start:]:
+            for action in split.freeze().actions:
+                if isinstance(action, SubWorkflowAction):
+                    directories[action.app_path] = split_directory
+        for child in children:
+            self.split(child, posixpath.join(directories[CHILD_APP_PATH % child.name], child.name))
+
+
+class _Graph(object):
+    """
+    The nodes of a frozen workflow by name, with their estimated lengths
+    """
+
+    def __init__(self, frozen, splitter):
+        self.frozen = frozen
+        self.splitter = splitter
+        self.global_section = frozen.global_section
+        self.nodes = dict((node.name, node) for node in frozen.nodes[1:])
+        self.entry = frozen.nodes[0].name
+        self.positions = dict((node.name, position) for position, node in enumerate(frozen.nodes[1:]))
+        self.lengths = dict((name, _node_length(node, self.global_section)) for name, node in self.nodes.iteritems())
+        self.end = [name for name, node in self.nodes.iteritems() if isinstance(node, EndNode)][0]
+
+        # the error handling nodes can not reach the end node
+        predecessors = dict((name, []) for name in self.nodes)
+        for name, node in self.nodes.iteritems():
+            for target in _transitions(node):
+                predecessors[target].append(name)
+        reaching, stack = set([self.end]), [self.end]
+        while stack:
+            for predecessor in predecessors[stack.pop()]:
+                if predecessor not in reaching:
+                    reaching.add(predecessor)
+                    stack.append(predecessor)
+        self.failure = sorted(set(self.nodes) - reaching, key=self.positions.get)
+        kills = [name for name in self.failure if isinstance(self.nodes[name], KillNode)]
+
+        self._taken = set(self.nodes)
+        self._children = 0
+        # the kill node the sub-workflow actions transition to on error
+        self.kill = kills[0] if kills else self._unique_name('kill')
+        self._new_kill = not kills
+
+        # the fixed cost of a child: the workflow element, its global section, the end and the error handling nodes
+        base = _workflow_to_xml(frozen.name, [], self.global_section, frozen.sla)
+        self.child_length = (len(etree.tostring(base, pretty_print=True)) + len('</workflow-app>') +
+                             _element_length(StartNode(self.entry).to_xml()) + self.lengths[self.end] +
+                             sum(self.lengths[name] for name in self.failure))
+        self.child_actions = sum(1 for name in self.failure if isinstance(self.nodes[name], ActionNode))
+        placeholder = frozen.name + '-000'
+        self.sub_workflow_length = _node_length(
+            SubWorkflowAction(placeholder, self.end, self.kill, CHILD_APP_PATH % placeholder), self.global_section)
+
+    def _unique_name(self, name):
+        unique, suffix = name, 1
+        while unique in self._taken:
+            suffix += 1
+            unique = '%s-%d' % (name, suffix)
+        self._taken.add(unique)
+        return unique
+
+    def _child_name(self):
+        self._children += 1
+        return self._unique_name('%s-%d' % (self.frozen.name, self._children))
+
+    def targets(self, name):
+        """
+        :return: the nodes a node transitions to, except the error handling nodes
+        """
+        return [target for target in _transitions(self.nodes[name]) if target not in self.failure]
+
+    def size(self, names):
+        return (sum(self.lengths[name] for name in names),
+                sum(1 for name in names if isinstance(self.nodes[name], ActionNode)))
+
+    def child_fits(self, names, extra_length=0):
+        length, actions = self.size(names)
+        return self.splitter.fits(self.child_length + length + extra_length, self.child_actions + actions)
+
+    def series(self, region, exit_name):
+        """
+        Split a region into blocks at its cut points
+        (the nodes all the paths from the region's entry pass through, outside of fork/join pairs)
+
+        :param region: the names of the nodes of the region
+        :type region: set
+        :param exit_name: the node following the region
+        :return: the blocks, the names of the nodes of every block in topological order
+        :rtype : list[list[str]]
+        """
+        in_degrees = dict((name, 0) for name in region)
+        for name in region:
+            for target in self.targets(name):
+                if target in region:
+                    in_degrees[target] += 1
+        ready = [(self.positions[name], name) for name, degree in in_degrees.iteritems() if degree == 0]
+        heapq.heapify(ready)
+        # a fork and its join are never separated (oozie requires every fork path to end at the join)
+        blocks, pending, open_forks = [], set(), 0
+        while ready:
+            _, name = heapq.heappop(ready)
+            if not blocks or (pending == set([name]) and not open_forks):
+                blocks.append([])
+            blocks[-1].append(name)
+            pending.discard(name)
+            if isinstance(self.nodes[name], ForkNode):
+                open_forks += 1
+            elif isinstance(self.nodes[name], JoinNode):
+                open_forks -= 1
+            for target in self.targets(name):
+                if target in region or target == exit_name:
+                    pending.add(target)
+                if target in region:
+                    in_degrees[target] -= 1
+                    if not in_degrees[target]:
+                        heapq.heappush(ready, (self.positions[target], target))
+        if sum(len(block) for block in blocks) != len(region):
+            raise ValueError('workflow %s has a cycle' % self.frozen.name)
+        return blocks
+
+    def split(self):
+        """
+        :return: the parent workflow and its children
+        :rtype : (Workflow, list[Workflow])
+        """
+        region = set(self.nodes) - set(self.failure) - set([self.end])
+        blocks = self.series(region, self.end)
+        if len(blocks) > 1:
+            return self._split_series(blocks)
+        return self._split_branches(blocks[0], self.end)
+
+    def _split_series(self, blocks):
+        groups = [[]]
+        for block in blocks:
+            if groups[-1] and not self.child_fits(sum(groups[-1], []) + block):
+                groups.append([])
+            groups[-1].append(block)
+        if len(groups) == 1:
+            groups = [blocks[:len(blocks) // 2], blocks[len(blocks) // 2:]]
+
+        names = [self._child_name() for _ in groups]
+        entries = [group[0][0] for group in groups] + [self.end]
+        children = [self._build(name, entries[i], sum(groups[i], []),
+                                {entries[i + 1]: EndNode(self.end)}) for i, name in enumerate(names)]
+        actions = dict((name, SubWorkflowAction(name, names[i + 1] if i + 1 < len(names) else self.end, self.kill,
+                                                CHILD_APP_PATH % name)) for i, name in enumerate(names))
+        parent = self._build(self.frozen.name, names[0], [self.end], actions, parent=True)
+        return parent, children
+
+    def _reachable(self, start, allowed, stop=None):
+        reached, stack = set(), [start]
+        while stack:
+            name = stack.pop()
+            if name in reached or name == stop or name not in allowed:
+                continue
+            reached.add(name)
+            stack.extend(self.targets(name))
+        return reached
+
+    def _branches(self, block, exit_name):
+        """
+        :return: the node the branches of the block's fork or decision merge at, and the branches that are
+                 single entry regions as (entry, names of the nodes) tuples
+        """
+        head = block[0]
+        allowed = set(block) | set([exit_name])
+        targets = []
+        for target in self.targets(head):
+            if target not in targets:
+                targets.append(target)
+        common = set.intersection(*[self._reachable(target, allowed) for target in targets])
+        # the block is in topological order, the exit follows it
+        merge = min(common, key=lambda name: block.index(name) if name != exit_name else len(block))
+
+        branches = []
+        for target in targets:
+            if target == merge:
+                continue
+            region = self._reachable(target, allowed, merge)
+            single_exit = all(successor in region or successor == merge
+                              for name in region for successor in self.targets(name))
+            single_entry = (all(other not in region for other in targets if other != target) and
+                            all(successor not in region for name in set(block) - region - set([head])
+                                for successor in self.targets(name)))
+            if single_exit and single_entry:
+                branches.append((target, region))
+        branches.sort(key=lambda branch: self.size(branch[1])[0], reverse=True)
+        return merge, branches
+
+    def _split_branches(self, block, exit_name):
+        head = self.nodes[block[0]]
+        if not isinstance(head, (ForkNode, DecisionNode)):
+            raise ValueError('%s of workflow %s does not fit the limits and can not be split' %
+                             (block[0], self.frozen.name))
+        merge, branches = self._branches(block, exit_name)
+        is_fork = isinstance(head, ForkNode)
+
+        def pack(extracted):
+            # first fit decreasing, a child of several fork paths has its own fork and join
+            groups = []
+            for branch in extracted:
+                for group in groups:
+                    entries = [entry for entry, _ in group] + [branch[0]]
+                    fork_length = (_element_length(ForkNode(head.name, entries).to_xml()) +
+                                   _element_length(JoinNode(merge, self.end).to_xml()))
+                    if is_fork and self.child_fits(set.union(branch[1], *[names for _, names in group]),
+                                                   fork_length):
+                        group.append(branch)
+                        break
+                else:
+                    groups.append([branch])
+            return groups
+
+        length, actions = self.size(set(self.nodes) - set(self.failure))
+        parent_length = self.child_length - self.lengths[self.end] + length
+        extracted, groups = [], []
+        while not self.splitter.fits(
+                parent_length - sum(self.size(names)[0] for _, names in extracted) +
+                len(groups) * self.sub_workflow_length,
+                self.child_actions + actions - sum(self.size(names)[1] for _, names in extracted) + len(groups)):
+            if len(extracted) == len(branches):
+                raise ValueError('%s of workflow %s does not fit the limits and can not be split' %
+                                 (block[0], self.frozen.name))
+            extracted.append(branches[len(extracted)])
+            groups = pack(extracted)
+
+        children, extra, replaced = [], {}, {}
+        for group in groups:
+            name = self._child_name()
+            entries = [entry for entry, _ in group]
+            names = sorted(set.union(*[names for _, names in group]), key=self.positions.get)
+            if len(group) == 1:
+                children.append(self._build(name, entries[0], names, {merge: EndNode(self.end)}))
+            else:
+                # the fork and join keep their names, so the paths serialize as estimated
+                children.append(self._build(name, head.name, names, {head.name: ForkNode(head.name, entries),
+                                                                     merge: JoinNode(merge, self.end),
+                                                                     self.end: EndNode(self.end)}))
+            extra[name] = SubWorkflowAction(name, merge, self.kill, CHILD_APP_PATH % name)
+            replaced[entries[0]] = name
+            for entry in entries[1:]:
+                replaced[entry] = None
+
+        head = _copy(head)
+        if is_fork:
+            head.paths = [replaced.get(path, path) for path in head.paths if replaced.get(path, path) is not None]
+        else:
+            head.cases = [(replaced.get(case_to, case_to), predicate) for case_to, predicate in head.cases]
+            head.default = replaced.get(head.default, head.default)
+        extra[head.name] = head
+        removed = set.union(*[names for _, names in extracted])
+        kept = [name for name in self.nodes if name not in removed and name != head.name and
+                name not in self.failure]
+        parent = self._build(self.frozen.name, self.entry, kept, extra, parent=True)
+        return parent, children
+
+    def _build(self, name, entry, names, extra, parent=False):
+        """
+        A workflow of mutable copies of nodes and of the error handling nodes
+
+        :param entry: the name of the first node
+        :param names: the names of the nodes to copy
+        :param extra: new nodes by name (transitioning to names), they replace the nodes of the same names
+        :param parent: the workflow keeps the SLA of the workflow being split
+        :rtype : Workflow
+        """
+        nodes = dict((node_name, _copy(self.nodes[node_name])) for node_name in list(names) + self.failure)
+        if self._new_kill:
+            nodes[self.kill] = KillNode(self.kill)
+        nodes.update(extra)
+        for node in set(nodes.itervalues()):
+            _link(node, nodes)
+        return Workflow(name, StartNode(nodes[entry]), dict(self.frozen.parameters), _copy(self.global_section),
+                        sla=_thaw(self.frozen.sla) if parent else None)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Per action statistics over an ActionHistory: duration percentiles, duration trends and failure rates.
+
+The statistics of all the actions are computed together, column-wise, with numpy when it is installed
+(a pure python implementation computing the same values is used otherwise)::
+
+    baseline = compute_stats(history, until=time.time() - 7 * 86400)
+    current = compute_stats(history, since=time.time() - 7 * 86400)
+    for before, after in find_regressions(baseline, current):
+        print after.app_name, after.action_name, before.percentiles[95], after.percentiles[95]
+"""
+import math
+
+from oozie import ActionStatus
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__author__ = 'pavel'
+__all__ = ['ActionStats', 'compute_stats', 'find_regressions']
+
+DEFAULT_PERCENTILES = (50, 95)
+
+_FAILED_STATUSES = (ActionStatus.ERROR, ActionStatus.FAILED, ActionStatus.KILLED)
+
+_SECONDS_PER_DAY = 86400.0
+
+
+class ActionStats(object):
+    __slots__ = ('app_name', 'action_name', 'runs', 'failures', 'failure_rate', 'percentiles', 'mean', 'trend')
+
+    def __init__(self, app_name, action_name, runs, failures, percentiles, mean, trend):
+        """
+        :param runs: number of executions that succeeded or failed
+        :param failures: number of executions that failed (ERROR, FAILED or KILLED)
+        :param percentiles: percentile -> seconds, of the durations of the successful executions
+        :type percentiles: dict[int, float]
+        :param mean: mean seconds of the successful executions
+        :param trend: the least squares slope of the successful durations over time, in seconds per day
+        """
+        self.app_name = app_name
+        self.action_name = action_name
+        self.runs = runs
+        self.failures = failures
+        self.failure_rate = float(failures) / runs if runs else None
+        self.percentiles = percentiles
+        self.mean = mean
+        self.trend = trend
+
+    def __repr__(self):
+        return 'ActionStats(app_name=%r, action_name=%r, runs=%r, failure_rate=%r, percentiles=%r, trend=%r)' % (
+            self.app_name, self.action_name, self.runs, self.failure_rate, self.percentiles, self.trend)
+
+
+def compute_stats(history, percentiles=DEFAULT_PERCENTILES, since=None, until=None, use_numpy=None):
+    """
+    Compute the statistics of every action (of every application) in a history
+
+    :type history: pyoozie.history.ActionHistory
+    :param percentiles: the duration percentiles to compute (linearly interpolated, 0-100)
+    :type percentiles: list[float]
+    :param since: only executions that started at or after this time (seconds since the epoch)
+    :param until: only executions that started before this time (seconds since the epoch)
+    :param use_numpy: compute with numpy, by default if it is installed
+    :type use_numpy: bool
+    :return: the statistics, sorted by application and action name. Missing values are None.
+    :rtype : list[ActionStats]
+    """
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    if use_numpy and numpy is None:
+        raise ValueError('numpy is not installed')
+    if not len(history):
+        return []
+    ok_codes = set(code for code, status in enumerate(history.statuses) if status == ActionStatus.OK)
+    failed_codes = set(code for code, status in enumerate(history.statuses) if status in _FAILED_STATUSES)
+    compute = _numpy_stats if use_numpy else _python_stats
+    groups = compute(history, ok_codes, failed_codes, percentiles, since, until)
+    stats = [ActionStats(history.app_names[app_code], history.action_names[action_code], runs, failures,
+                         dict(zip(percentiles, values)), mean, trend)
+             for (app_code, action_code), runs, failures, values, mean, trend in groups]
+    stats.sort(key=lambda action_stats: (action_stats.app_name, action_stats.action_name))
+    return stats
+
+
+def _none_if_nan(value):
+    return None if value is None or math.isnan(value) else value
+
+
+def _numpy_stats(history, ok_codes, failed_codes, percentiles, since, until):
+    # zero copy views of the columns
+    app_codes = numpy.frombuffer(history.app_codes, dtype=history.app_codes.typecode)
+    action_codes = numpy.frombuffer(history.action_codes, dtype=history.action_codes.typecode)
+    status_codes = numpy.frombuffer(history.status_codes, dtype=history.status_codes.typecode)
+    start_times = numpy.frombuffer(history.start_times, dtype=history.start_times.typecode)
+    end_times = numpy.frombuffer(history.end_times, dtype=history.end_times.typecode)
+
+    selected = numpy.ones(len(start_times), dtype=bool)
+    if since is not None:
+        selected &= start_times >= since
+    if until is not None:
+        selected &= start_times < until
+    keys = app_codes.astype(numpy.int64) * max(len(history.action_names), 1) + action_codes
+    unique_keys, groups = numpy.unique(keys[selected], return_inverse=True)
+    group_count = len(unique_keys)
+    status_codes, start_times, end_times = status_codes[selected], start_times[selected], end_times[selected]
+
+    failed = numpy.in1d(status_codes, list(failed_codes))
+    succeeded = numpy.in1d(status_codes, list(ok_codes)) & ~numpy.isnan(end_times)
+    failures = numpy.bincount(groups[failed], minlength=group_count)
+    runs = numpy.bincount(groups[succeeded], minlength=group_count) + failures
+
+    durations = (end_times - start_times)[succeeded]
+    duration_groups = groups[succeeded]
+    counts = numpy.bincount(duration_groups, minlength=group_count)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        means = numpy.bincount(duration_groups, weights=durations, minlength=group_count) / counts
+
+        # the durations sorted within their groups, the groups in order
+        ordered = durations[numpy.lexsort((durations, duration_groups))]
+        firsts = numpy.cumsum(counts) - counts
+        percentile_values = []
+        for percentile in percentiles:
+            if not len(ordered):
+                percentile_values.append(numpy.full(group_count, numpy.nan))
+                continue
+            ranks = firsts + (counts - 1) * (percentile / 100.0)
+            lows = numpy.clip(numpy.floor(ranks).astype(numpy.int64), 0, len(ordered) - 1)
+            highs = numpy.clip(numpy.minimum(lows + 1, firsts + counts - 1), 0, len(ordered) - 1)
+            values = ordered[lows] + (ordered[highs] - ordered[lows]) * (ranks - lows)
+            percentile_values.append(numpy.where(counts > 0, values, numpy.nan))
+
+        # least squares slope of duration over time, from per group sums
+        days = (start_times[succeeded] - (start_times.min() if len(start_times) else 0)) / _SECONDS_PER_DAY
+        sum_x = numpy.bincount(duration_groups, weights=days, minlength=group_count)
+        sum_y = numpy.bincount(duration_groups, weights=durations, minlength=group_count)
+        sum_xy = numpy.bincount(duration_groups, weights=days * durations, minlength=group_count)
+        sum_xx = numpy.bincount(duration_groups, weights=days * days, minlength=group_count)
+        denominators = counts * sum_xx - sum_x * sum_x
+        trends = numpy.where(denominators > 0, (counts * sum_xy - sum_x * sum_y) / denominators, numpy.nan)
+
+    action_count = max(len(history.action_names), 1)
+    for group, key in enumerate(unique_keys.tolist()):
+        yield ((key // action_count, key % action_count), int(runs[group]), int(failures[group]),
+               [_none_if_nan(float(values[group])) for values in percentile_values],
+               _none_if_nan(float(means[group])), _none_if_nan(float(trends[group])))
+
+
+def _percentile(ordered, percentile):
+    rank = (len(ordered) - 1) * (percentile / 100.0)
+    low = int(math.floor(rank))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _python_stats(history, ok_codes, failed_codes, percentiles, since, until):
+    groups = {}
+    first_start = None
+    for app_code, action_code, status_code, start_time, end_time in zip(
+            history.app_codes, history.action_codes, history.status_codes, history.start_times, history.end_times):
+        if (since is not None and start_time < since) or (until is not None and start_time >= until):
+            continue
+        first_start = start_time if first_start is None else min(first_start, start_time)
+        group = groups.get((app_code, action_code))
+        if group is None:
+            # [failures, [(start time, duration) of the successful executions]]
+            group = groups[app_code, action_code] = [0, []]
+        if status_code in failed_codes:
+            group[0] += 1
+        elif status_code in ok_codes and not math.isnan(end_time):
+            group[1].append((start_time, end_time - start_time))
+
+    for key, (failures, executions) in groups.iteritems():
+        durations = sorted(duration for _, duration in executions)
+        count = len(durations)
+        values = [_percentile(durations, percentile) if durations else None for percentile in percentiles]
+        mean = sum(durations) / count if count else None
+        sum_x = sum_y = sum_xy = sum_xx = 0.0
+        for start_time, duration in executions:
+            day = (start_time - first_start) / _SECONDS_PER_DAY
+            sum_x += day
+            sum_y += duration
+            sum_xy += day * duration
+            sum_xx += day * day
+        denominator = count * sum_xx - sum_x * sum_x
+        trend = (count * sum_xy - sum_x * sum_y) / denominator if denominator > 0 else None
+        yield key, count + failures, failures, values, mean, trend
+
+
+def find_regressions(baseline, current, percentile=95, threshold=1.25, min_runs=10):
+    """
+    Find the actions whose duration percentile grew by a factor of at least threshold between two periods
+
+    :param baseline: the statistics of the earlier period
+    :type baseline: list[ActionStats]
+    :param current: the statistics of the later period
+    :type current: list[ActionStats]
+    :param percentile: the percentile to compare (must have been computed in both)
+    :param threshold: the minimal ratio of the current percentile to the baseline percentile
+    :param min_runs: the minimal number of runs in both periods for an action to be compared
+    :return: (baseline, current) statistics of the regressed actions, the largest regressions first
+    :rtype : list[(ActionStats, ActionStats)]
+    """
+    baseline_by_action = dict(((stats.app_name, stats.action_name), stats) for stats in baseline)
+    regressions = []
+    for after in current:
+        before = baseline_by_action.get((after.app_name, after.action_name))
+        if before is None or before.runs < min_runs or after.runs < min_runs:
+            continue
+        old, new = before.percentiles.get(percentile), after.percentiles.get(percentile)
+        if old and new is not None and new / old >= threshold:
+            regressions.append((before, after))
+    regressions.sort(key=lambda (before, after): after.percentiles[percentile] / before.percentiles[percentile],
+                     reverse=True)
+    return regressions
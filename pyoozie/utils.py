@@ -15,10 +15,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from lxml import etree
+import codecs
+import datetime
+import itertools
+import re
+from xml.sax.saxutils import escape
 
 __author__ = 'pavel'
 
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_CONFIGURATION_TAG = re.compile(r'<configuration(\s[^>]*?)?(/)?>')
+_XML_DECLARATION = "<?xml version='1.0' encoding='UTF-8'?>\n"
+OOZIE_TIME_FORMAT = '%Y-%m-%dT%H:%MZ'
+
 
 def properties_to_config(properties):
     """
@@ -29,6 +40,9 @@ def properties_to_config(properties):
     :rtype : basestring
     :return: AN XML configuration
     """
+    # lxml is imported only when needed, so importing the client stays fast
+    from lxml import etree
+
     root = etree.Element('configuration')
     for pname, pvalue in properties.iteritems():
         property_element = etree.Element('property')
@@ -41,3 +55,275 @@ def properties_to_config(properties):
         root.append(property_element)
 
     return etree.tostring(root, encoding='UTF-8', xml_declaration=True, pretty_print=True)
+
+
+def iter_config(properties, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generate an XML configuration file used by oozie in chunks, without holding all of it in memory
+    (the same document properties_to_config creates)
+
+    :param properties: a dict of properties or an iterable of (name, value) pairs (e.g: a generator)
+    :type properties: dict or collections.Iterable[tuple]
+    :param chunk_size: approximate size of the generated chunks in bytes
+    :type chunk_size: int
+    :return: a generator of UTF-8 encoded chunks
+    :rtype : collections.Iterator[str]
+    """
+    if isinstance(properties, dict):
+        properties = properties.iteritems()
+    parts = [_XML_DECLARATION + '<configuration>\n']
+    size = len(parts[0])
+    empty = True
+    for name, value in properties:
+        empty = False
+        part = _property_xml(name, value)
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(parts)
+            parts, size = [], 0
+    if empty:
+        # nothing was yielded yet, an empty element like properties_to_config writes it
+        yield _XML_DECLARATION + '<configuration/>\n'
+        return
+    parts.append('</configuration>\n')
+    yield ''.join(parts)
+
+
+def _property_xml(name, value):
+    return (u'  <property>\n    <name>%s</name>\n    <value>%s</value>\n  </property>\n' %
+            (escape(unicode(name)), escape(unicode(value)))).encode('UTF-8')
+
+
+def _inject_properties(chunks, properties):
+    """
+    Add properties at the start of a streamed XML configuration (so the configuration's own values override them)
+    """
+    chunks = iter(chunks)
+    if properties:
+        injected = ''.join(_property_xml(name, value) for name, value in properties.iteritems())
+        head = ''
+        for chunk in chunks:
+            head += chunk
+            tag = _CONFIGURATION_TAG.search(head)
+            if tag is not None:
+                if tag.group(2):
+                    # an empty <configuration/> element
+                    yield (head[:tag.start()] + '<configuration%s>\n' % (tag.group(1) or '') + injected +
+                           '</configuration>' + head[tag.end():])
+                else:
+                    yield head[:tag.end()] + '\n' + injected + head[tag.end():]
+                break
+        else:
+            # not a configuration, sent as is for the server to reject
+            if head:
+                yield head
+            return
+    for chunk in chunks:
+        yield chunk
+
+
+def iter_file(path_or_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generate the content of a file in chunks (a file opened by path is closed when the generator ends)
+
+    :param path_or_file: a file path or a file object
+    :rtype : collections.Iterator[str]
+    """
+    if isinstance(path_or_file, basestring):
+        with open(path_or_file, 'rb') as opened:
+            for chunk in iter_file(opened, chunk_size):
+                yield chunk
+        return
+    for chunk in iter(lambda: path_or_file.read(chunk_size), ''):
+        yield chunk
+
+
+def iter_properties(path):
+    """
+    Read a java properties file (e.g: job.properties) one property at a time.
+    Lines are decoded as UTF-8, or as ISO-8859-1 (the java default) when they are not valid UTF-8.
+
+    :param path: path of the properties file
+    :type path: basestring
+    :return: a generator of (name, value) unicode pairs
+    :rtype : collections.Iterator[tuple]
+    """
+    with open(path, 'rb') as properties_file:
+        logical_line = u''
+        for line in properties_file:
+            try:
+                line = line.decode('UTF-8')
+            except UnicodeDecodeError:
+                line = line.decode('ISO-8859-1')
+            line = line.lstrip(u'\ufeff').strip()
+            if not logical_line and (not line or line[0] in '#!'):
+                continue
+            # a line ending with a backslash continues on the next line
+            if line.endswith('\\') and not line.endswith('\\\\'):
+                logical_line += line[:-1]
+                continue
+            logical_line += line
+            separator = min(i for i in (logical_line.find('='), logical_line.find(':'), len(logical_line)) if i >= 0)
+            yield logical_line[:separator].strip(), logical_line[separator + 1:].strip()
+            logical_line = u''
+
+
+def load_properties(path):
+    """
+    Read a java properties file (e.g: job.properties)
+
+    :param path: path of the properties file
+    :type path: basestring
+    :rtype : dict
+    :return: a dict of properties
+    """
+    return dict(iter_properties(path))
+
+
+def config_body(config, extra_properties=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Get the body of a request sending a configuration to oozie.
+    Anything but an XML string is streamed (sent with chunked transfer encoding) instead of read into memory.
+
+    :param config: one of:
+                   an XML configuration string,
+                   a path of an XML configuration file or of a java properties file (ending with .properties),
+                   a file object of an XML configuration,
+                   a dict of properties or an iterable of (name, value) pairs (e.g: a generator)
+    :param extra_properties: properties to add to the configuration, the configuration's own values win
+    :type extra_properties: dict
+    :param chunk_size: approximate size of the streamed chunks in bytes
+    :type chunk_size: int
+    :return: the XML string or a generator of its chunks
+    :rtype : basestring or collections.Iterator[str]
+    :raise ValueError: if the configuration is an empty string
+    """
+    extra_properties = extra_properties or {}
+    if isinstance(config, basestring):
+        if isinstance(config, unicode):
+            stripped = config.lstrip(u'\ufeff').lstrip()
+        else:
+            stripped = config.lstrip().lstrip(codecs.BOM_UTF8).lstrip()
+        if not stripped:
+            raise ValueError('empty configuration')
+        if stripped.startswith('<'):
+            # nothing may precede the XML declaration
+            config = stripped
+            if extra_properties:
+                if isinstance(config, unicode):
+                    config = config.encode('UTF-8')
+                return ''.join(_inject_properties([config], extra_properties))
+            return config
+        if config.endswith('.properties'):
+            config = iter_properties(config)
+        else:
+            return _inject_properties(iter_file(config, chunk_size), extra_properties)
+    elif hasattr(config, 'read'):
+        return _inject_properties(iter_file(config, chunk_size), extra_properties)
+    elif isinstance(config, dict):
+        config = config.iteritems()
+    return iter_config(itertools.chain(extra_properties.iteritems(), config), chunk_size)
+
+
+def config_to_properties(config):
+    """
+    Transform an XML configuration file used by oozie to a dict of properties
+
+    :param config: An XML configuration
+    :type config: basestring
+    :rtype : dict
+    :return: a dict of properties
+    """
+    from lxml import etree
+
+    if isinstance(config, unicode):
+        config = config.encode('UTF-8')
+    properties = {}
+    for property_element in etree.fromstring(config).iter('property'):
+        properties[property_element.findtext('name')] = property_element.findtext('value') or ''
+    return properties
+
+
+def format_time(value):
+    """
+    Format a time the way oozie expects it in filters and rerun scopes (UTC, e.g: 2014-01-01T10:00Z)
+
+    :param value: a datetime (assumed to be UTC) or an already formatted string (e.g: a relative offset like -2d)
+    :type value: datetime.datetime or basestring
+    :rtype : basestring
+    """
+    if isinstance(value, datetime.datetime):
+        return value.strftime(OOZIE_TIME_FORMAT)
+    return value
+
+
+def concurrent_map(func, items, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Apply func to every item using a pool of threads.
+    An exception raised by func does not stop the other calls, it is returned alongside the item instead.
+
+    :param func: a function of one argument
+    :param items: the arguments to apply func on
+    :type items: list
+    :param concurrency: maximal number of concurrent calls
+    :type concurrency: int
+    :return: a list of (result, error) tuples in the order of items, error is None when func succeeded
+    :rtype : list[tuple]
+    """
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        return pool.map(call, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def iter_concurrent_map(func, items, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Apply func to every item using a pool of threads, generating the results as soon as they complete
+    (unlike concurrent_map, which returns when all the calls complete).
+    An exception raised by func does not stop the other calls, it is generated alongside the item instead.
+
+    :param func: a function of one argument
+    :param items: the arguments to apply func on
+    :type items: list
+    :param concurrency: maximal number of concurrent calls
+    :type concurrency: int
+    :return: a generator of (item, result, error) tuples in the order the calls complete,
+             error is None when func succeeded
+    :rtype : collections.Iterator[tuple]
+    """
+    def call(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        for item in items:
+            yield call(item)
+        return
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        for result in pool.imap_unordered(call, items):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
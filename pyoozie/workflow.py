@@ -14,10 +14,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import datetime
+import glob
 import os
+import tempfile
+import uuid
 
 from lxml import etree
 
+import utils
+from configuration import LayeredConfiguration
+
 __author__ = 'pavel'
 
 
@@ -75,21 +82,26 @@ class ActionNode(Node):
     Action nodes are the mechanism by which a workflow triggers the execution of a computation/processing task.
     """
 
-    def __init__(self, name, ok, error):
+    def __init__(self, name, ok, error, sla=None):
         """
             Construct an action node.
 
             :param name: name of the action
             :param ok: name to transition when successful
             :param error: name to transition when action fails to complete
+            :param sla: the service level agreement of the action
+            :type sla: SLA
             """
         super(ActionNode, self).__init__(name)
         self.ok = ok
         self.error = error
+        self.sla = sla
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
         ok = self.ok.name if isinstance(self.ok, Node) else self.ok
@@ -318,7 +330,7 @@ class JoinNode(ControlFlowNode):
 class PigAction(ActionNode):
     def __init__(self, name, ok, error, script, delete_paths=None, mkdir_paths=None, job_xml=None, properties=None,
                  params=None, arguments=None, files=None, archives=None, name_node='${nameNode}',
-                 job_tracker='${jobTracker}'):
+                 job_tracker='${jobTracker}', sla=None):
         """
         Create a PIG action
 
@@ -333,8 +345,9 @@ class PigAction(ActionNode):
         :type mkdir_paths: list[str]
         :param job_xml:  if present, must refer to a Hadoop JobConf job.xml file bundled in the workflow application.
         :type job_xml: str
-        :param properties: a dict of hadoop configuration properties in key=value format
-        :type properties: dict
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a configuration sharing layers of properties with other actions
+        :type properties: dict or LayeredConfiguration
         :param params: A dict of parameters (variable definition for the script) in 'key=value' format
         :type params: dict
         :param arguments: A list of arguments to pass to PIG
@@ -347,8 +360,10 @@ class PigAction(ActionNode):
         :type name_node: basestring
         :param job_tracker: The JobTracker (e.g: localhost:8021)
         :type job_tracker: basestring
+        :param sla: the service level agreement of the action
+        :type sla: SLA
         """
-        super(PigAction, self).__init__(name, ok, error)
+        super(PigAction, self).__init__(name, ok, error, sla)
         self.script = script
         self.delete_paths = delete_paths or []
         self.mkdir_paths = mkdir_paths or []
@@ -361,18 +376,21 @@ class PigAction(ActionNode):
         self.name_node = name_node
         self.job_tracker = job_tracker
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
-        action = super(PigAction, self).to_xml()
+        global_section = global_section or GlobalSection()
+        action = super(PigAction, self).to_xml(global_section)
         pig = etree.SubElement(action, 'pig')
 
-        if self.job_tracker:
+        if self.job_tracker and not global_section.provides('job_tracker', self.job_tracker):
             etree.SubElement(pig, 'job-tracker').text = self.job_tracker
 
-        if self.name_node:
+        if self.name_node and not global_section.provides('name_node', self.name_node):
             etree.SubElement(pig, 'name-node').text = self.name_node
 
         if self.delete_paths or self.mkdir_paths:
@@ -383,12 +401,16 @@ class PigAction(ActionNode):
             for mkdir_path in self.mkdir_paths:
                 etree.SubElement(prepare, 'mkdir', path=mkdir_path)
 
-        if self.job_xml:
+        if self.job_xml and not global_section.provides('job_xml', self.job_xml):
             etree.SubElement(pig, 'job-xml').text = self.job_xml
 
-        if self.properties:
+        for job_xml in global_section.get_local_job_xmls(self.properties):
+            etree.SubElement(pig, 'job-xml').text = job_xml
+
+        properties = global_section.get_local_properties(self.properties)
+        if properties:
             configuration = etree.SubElement(pig, 'configuration')
-            for name, value in self.properties.iteritems():
+            for name, value in properties.iteritems():
                 config_property = etree.SubElement(configuration, 'property')
                 etree.SubElement(config_property, 'name').text = name
                 etree.SubElement(config_property, 'value').text = value
@@ -412,7 +434,8 @@ class PigAction(ActionNode):
 
 class HiveAction(ActionNode):
     def __init__(self, name, ok, error, script, delete_paths=None, mkdir_paths=None, job_xml=None, properties=None,
-                 params=None, files=None, archives=None, name_node='${nameNode}', job_tracker='${jobTracker}'):
+                 params=None, files=None, archives=None, name_node='${nameNode}', job_tracker='${jobTracker}',
+                 sla=None):
         """
         Starts a HIVE job
 
@@ -427,8 +450,9 @@ class HiveAction(ActionNode):
         :type mkdir_paths: list[str]
         :param job_xml:  if present, must refer to a Hadoop JobConf job.xml file bundled in the workflow application.
         :type job_xml: str
-        :param properties: a dict of hadoop configuration properties in key=value format
-        :type properties: dict
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a configuration sharing layers of properties with other actions
+        :type properties: dict or LayeredConfiguration
         :param params: A dict of parameters (variable definition for the script) in 'key=value' format
         :type params: dict
         :param files: A list of files needed for the script (hdfs location)
@@ -439,8 +463,10 @@ class HiveAction(ActionNode):
         :type name_node: basestring
         :param job_tracker: The JobTracker (e.g: localhost:8021)
         :type job_tracker: basestring
+        :param sla: the service level agreement of the action
+        :type sla: SLA
         """
-        super(HiveAction, self).__init__(name, ok, error)
+        super(HiveAction, self).__init__(name, ok, error, sla)
         self.script = script
         self.delete_paths = delete_paths or []
         self.mkdir_paths = mkdir_paths or []
@@ -452,14 +478,18 @@ class HiveAction(ActionNode):
         self.name_node = name_node
         self.job_tracker = job_tracker
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
-        action = super(HiveAction, self).to_xml()
+        global_section = global_section or GlobalSection()
+        action = super(HiveAction, self).to_xml(global_section)
         hive = etree.SubElement(action, 'hive', xmlns='uri:oozie:hive-action:0.2')
 
+        # the hive action schema requires the job tracker and the name node even with a global section
         if self.job_tracker:
             etree.SubElement(hive, 'job-tracker').text = self.job_tracker
 
@@ -474,12 +504,16 @@ class HiveAction(ActionNode):
             for mkdir_path in self.mkdir_paths:
                 etree.SubElement(prepare, 'mkdir', path=mkdir_path)
 
-        if self.job_xml:
+        if self.job_xml and not global_section.provides('job_xml', self.job_xml):
             etree.SubElement(hive, 'job-xml').text = self.job_xml
 
-        if self.properties:
+        for job_xml in global_section.get_local_job_xmls(self.properties):
+            etree.SubElement(hive, 'job-xml').text = job_xml
+
+        properties = global_section.get_local_properties(self.properties)
+        if properties:
             configuration = etree.SubElement(hive, 'configuration')
-            for name, value in self.properties.iteritems():
+            for name, value in properties.iteritems():
                 property = etree.SubElement(configuration, 'property')
                 etree.SubElement(property, 'name').text = name
                 etree.SubElement(property, 'value').text = value
@@ -500,7 +534,7 @@ class HiveAction(ActionNode):
 
 class FsAction(ActionNode):
     def __init__(self, name, ok, error, delete_paths=None, mkdir_paths=None, moves=None, properties=None, job_xml=None,
-                 name_node='${nameNode}'):
+                 name_node='${nameNode}', sla=None):
         """
         Create a FS action
         :param name: name of the action
@@ -512,14 +546,17 @@ class FsAction(ActionNode):
         :type mkdir_paths: list[str]
         :param moves: a list of moves from src to dst. where each move is (src, dst)
         :type moves: list[tuple]
-        :param properties: a dict of hadoop configuration properties in key=value format
-        :type properties: dict
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a configuration sharing layers of properties with other actions
+        :type properties: dict or LayeredConfiguration
         :param job_xml:  if present, must refer to a Hadoop JobConf job.xml file bundled in the workflow application.
         :type job_xml: str
         :param name_node: The NameNode (e.g: hdfs://localhost:8020
         :type name_node: basestring
+        :param sla: the service level agreement of the action
+        :type sla: SLA
         """
-        super(FsAction, self).__init__(name, ok, error)
+        super(FsAction, self).__init__(name, ok, error, sla)
         self.delete_paths = delete_paths or []
         self.mkdir_paths = mkdir_paths or []
         self.moves = moves or []
@@ -527,15 +564,18 @@ class FsAction(ActionNode):
         self.job_xml = job_xml
         self.name_node = name_node
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
-        action = super(FsAction, self).to_xml()
+        global_section = global_section or GlobalSection()
+        action = super(FsAction, self).to_xml(global_section)
         fs = etree.SubElement(action, 'FS')
 
-        if self.name_node:
+        if self.name_node and not global_section.provides('name_node', self.name_node):
             etree.SubElement(fs, 'name-node').text = self.name_node
 
         for delete_path in self.delete_paths:
@@ -547,12 +587,16 @@ class FsAction(ActionNode):
         for src, dst in self.moves:
             etree.SubElement(fs, 'move', source=src, target=dst)
 
-        if self.job_xml:
+        if self.job_xml and not global_section.provides('job_xml', self.job_xml):
             etree.SubElement(fs, 'job-xml').text = self.job_xml
 
-        if self.properties:
+        for job_xml in global_section.get_local_job_xmls(self.properties):
+            etree.SubElement(fs, 'job-xml').text = job_xml
+
+        properties = global_section.get_local_properties(self.properties)
+        if properties:
             configuration = etree.SubElement(fs, 'configuration')
-            for name, value in self.properties.iteritems():
+            for name, value in properties.iteritems():
                 property = etree.SubElement(configuration, 'property')
                 etree.SubElement(property, 'name').text = name
                 etree.SubElement(property, 'value').text = value
@@ -564,7 +608,7 @@ class ShellAction(ActionNode):
     def __init__(self, name, ok, error, command, delete_paths=None, mkdir_paths=None, job_xml=None, properties=None,
                  arguments=None, env_vars=None, files=None, archives=None, capture_output=False,
                  name_node='${nameNode}',
-                 job_tracker='${jobTracker}'):
+                 job_tracker='${jobTracker}', sla=None):
         """
         Create a Shell action
 
@@ -579,8 +623,9 @@ class ShellAction(ActionNode):
         :type mkdir_paths: list[str]
         :param job_xml:  if present, must refer to a Hadoop JobConf job.xml file bundled in the workflow application.
         :type job_xml: str
-        :param properties: a dict of hadoop configuration properties in key=value format
-        :type properties: dict
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a configuration sharing layers of properties with other actions
+        :type properties: dict or LayeredConfiguration
         :param arguments: A list of arguments to pass to the shell.
         :type arguments: list[basestring]
         :param env_vars: A dict of environment variable in a key=value form
@@ -595,8 +640,10 @@ class ShellAction(ActionNode):
         :type name_node: basestring
         :param job_tracker: The JobTracker (e.g: localhost:8021)
         :type job_tracker: basestring
+        :param sla: the service level agreement of the action
+        :type sla: SLA
         """
-        super(ShellAction, self).__init__(name, ok, error)
+        super(ShellAction, self).__init__(name, ok, error, sla)
         self.command = command
         self.delete_paths = delete_paths or []
         self.mkdir_paths = mkdir_paths or []
@@ -610,14 +657,18 @@ class ShellAction(ActionNode):
         self.name_node = name_node
         self.job_tracker = job_tracker
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
-        action = super(ShellAction, self).to_xml()
+        global_section = global_section or GlobalSection()
+        action = super(ShellAction, self).to_xml(global_section)
         shell = etree.SubElement(action, 'shell', xmlns="uri:oozie:shell-action:0.1")
 
+        # the shell action schema requires the job tracker and the name node even with a global section
         if self.job_tracker:
             etree.SubElement(shell, 'job-tracker').text = self.job_tracker
 
@@ -632,12 +683,16 @@ class ShellAction(ActionNode):
             for mkdir_path in self.mkdir_paths:
                 etree.SubElement(prepare, 'mkdir', path=mkdir_path)
 
-        if self.job_xml:
+        if self.job_xml and not global_section.provides('job_xml', self.job_xml):
             etree.SubElement(shell, 'job-xml').text = self.job_xml
 
-        if self.properties:
+        for job_xml in global_section.get_local_job_xmls(self.properties):
+            etree.SubElement(shell, 'job-xml').text = job_xml
+
+        properties = global_section.get_local_properties(self.properties)
+        if properties:
             configuration = etree.SubElement(shell, 'configuration')
-            for name, value in self.properties.iteritems():
+            for name, value in properties.iteritems():
                 property = etree.SubElement(configuration, 'property')
                 etree.SubElement(property, 'name').text = name
                 etree.SubElement(property, 'value').text = value
@@ -662,8 +717,127 @@ class ShellAction(ActionNode):
         return action
 
 
+class DistCpAction(ActionNode):
+    def __init__(self, name, ok, error, sources, target, maps=None, bandwidth=None, update=False, overwrite=False,
+                 java_opts=None, delete_paths=None, mkdir_paths=None, properties=None, arguments=None,
+                 name_node='${nameNode}', job_tracker='${jobTracker}', sla=None):
+        """
+        Create a DistCp action, copying files with a map reduce job (distributed copy)
+
+        :param name: name of the action
+        :param ok: name to transition when successful
+        :param error: name to transition when action fails to complete
+        :param sources: the paths to copy (e.g: hdfs://cluster1:8020/data/a)
+        :type sources: list[basestring] or basestring
+        :param target: the path to copy to (e.g: hdfs://cluster2:8020/data)
+        :type target: basestring
+        :param maps: maximal number of simultaneous copies (map tasks)
+        :type maps: int
+        :param bandwidth: bandwidth per map in MB/second
+        :type bandwidth: int
+        :param update: only copy files that are missing or differ in the target
+        :type update: bool
+        :param overwrite: overwrite files that already exist in the target
+        :type overwrite: bool
+        :param java_opts: java options for the distcp launcher (e.g: -Xmx1024m)
+        :type java_opts: basestring
+        :param delete_paths: a list of paths (in hdfs) to delete before starting the copy
+        :type delete_paths: list[str]
+        :param mkdir_paths: a list of dir paths (in hdfs) to create before starting the copy
+        :type mkdir_paths: list[str]
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a configuration sharing layers of properties with other actions
+        :type properties: dict or LayeredConfiguration
+        :param arguments: A list of additional arguments to pass to distcp (e.g: ['-strategy', 'dynamic'])
+        :type arguments: list[basestring]
+        :param name_node: The NameNode (e.g: hdfs://localhost:8020
+        :type name_node: basestring
+        :param job_tracker: The JobTracker (e.g: localhost:8021)
+        :type job_tracker: basestring
+        :param sla: the service level agreement of the action
+        :type sla: SLA
+        """
+        super(DistCpAction, self).__init__(name, ok, error, sla)
+        if update and overwrite:
+            raise ValueError('update and overwrite can not be used together')
+        self.sources = [sources] if isinstance(sources, basestring) else list(sources)
+        self.target = target
+        self.maps = maps
+        self.bandwidth = bandwidth
+        self.update = update
+        self.overwrite = overwrite
+        self.java_opts = java_opts
+        self.delete_paths = delete_paths or []
+        self.mkdir_paths = mkdir_paths or []
+        self.properties = properties or {}
+        self.arguments = arguments or []
+        self.name_node = name_node
+        self.job_tracker = job_tracker
+
+    def get_distcp_arguments(self):
+        """
+        Get the command line arguments of distcp
+        :rtype : list[basestring]
+        """
+        arguments = []
+        if self.maps:
+            arguments.extend(['-m', str(self.maps)])
+        if self.bandwidth:
+            arguments.extend(['-bandwidth', str(self.bandwidth)])
+        if self.update:
+            arguments.append('-update')
+        if self.overwrite:
+            arguments.append('-overwrite')
+        arguments.extend(self.arguments)
+        arguments.extend(self.sources)
+        arguments.append(self.target)
+        return arguments
+
+    def to_xml(self, global_section=None):
+        """
+        Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
+        :rtype : etree.Element
+        """
+        global_section = global_section or GlobalSection()
+        action = super(DistCpAction, self).to_xml(global_section)
+        distcp = etree.SubElement(action, 'distcp', xmlns="uri:oozie:distcp-action:0.2")
+
+        if self.job_tracker and not global_section.provides('job_tracker', self.job_tracker):
+            etree.SubElement(distcp, 'job-tracker').text = self.job_tracker
+
+        if self.name_node and not global_section.provides('name_node', self.name_node):
+            etree.SubElement(distcp, 'name-node').text = self.name_node
+
+        if self.delete_paths or self.mkdir_paths:
+            prepare = etree.SubElement(distcp, 'prepare')
+            for delete_path in self.delete_paths:
+                etree.SubElement(prepare, 'delete', path=delete_path)
+
+            for mkdir_path in self.mkdir_paths:
+                etree.SubElement(prepare, 'mkdir', path=mkdir_path)
+
+        # the distcp action has no job-xml, the properties of every layer are serialized
+        properties = global_section.get_local_properties(self.properties, job_xml=False)
+        if properties:
+            configuration = etree.SubElement(distcp, 'configuration')
+            for name, value in properties.iteritems():
+                config_property = etree.SubElement(configuration, 'property')
+                etree.SubElement(config_property, 'name').text = name
+                etree.SubElement(config_property, 'value').text = value
+
+        if self.java_opts:
+            etree.SubElement(distcp, 'java-opts').text = self.java_opts
+
+        for argument in self.get_distcp_arguments():
+            etree.SubElement(distcp, 'arg').text = argument
+
+        return action
+
+
 class EmailAction(ActionNode):
-    def __init__(self, name, ok, error, to, subject, body, cc=None):
+    def __init__(self, name, ok, error, to, subject, body, cc=None, sla=None):
         """
         Create an Email action
 
@@ -677,19 +851,23 @@ class EmailAction(ActionNode):
         :param body: An email's body
         :param cc: an optional comma separated list of emails
         :type cc: str
+        :param sla: the service level agreement of the action
+        :type sla: SLA
         """
-        super(EmailAction, self).__init__(name, ok, error)
+        super(EmailAction, self).__init__(name, ok, error, sla)
         self.to = to
         self.subject = subject
         self.body = body
         self.cc = cc
 
-    def to_xml(self):
+    def to_xml(self, global_section=None):
         """
         Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
         :rtype : etree.Element
         """
-        action = super(EmailAction, self).to_xml()
+        action = super(EmailAction, self).to_xml(global_section)
         email = etree.SubElement(action, 'email', xmlns="uri:oozie:email-action:0.1")
         etree.SubElement(email, 'to').text = self.to
 
@@ -702,8 +880,267 @@ class EmailAction(ActionNode):
         return action
 
 
+class SubWorkflowAction(ActionNode):
+    def __init__(self, name, ok, error, app_path, propagate_configuration=True, configuration=None, sla=None):
+        """
+        Create a Sub-workflow action, running a child workflow job and waiting for it to complete
+
+        :param name: name of the action
+        :param ok: name to transition when successful
+        :param error: name to transition when action fails to complete
+        :param app_path: the path (in hdfs) of the child workflow application
+        :type app_path: basestring
+        :param propagate_configuration: pass the job configuration of the parent to the child
+        :type propagate_configuration: bool
+        :param configuration: a dict of properties to pass to the child in key=value format
+                              (the workflow's global section does not apply to them)
+        :type configuration: dict
+        :param sla: the service level agreement of the action
+        :type sla: SLA
+        """
+        super(SubWorkflowAction, self).__init__(name, ok, error, sla)
+        self.app_path = app_path
+        self.propagate_configuration = propagate_configuration
+        self.configuration = configuration or {}
+
+    def to_xml(self, global_section=None):
+        """
+        Serialize the node to XML element tree
+        :param global_section: the workflow's global section, settings it provides are omitted from the action
+        :type global_section: GlobalSection
+        :rtype : etree.Element
+        """
+        action = super(SubWorkflowAction, self).to_xml(global_section)
+        sub_workflow = etree.SubElement(action, 'sub-workflow')
+        etree.SubElement(sub_workflow, 'app-path').text = self.app_path
+
+        if self.propagate_configuration:
+            etree.SubElement(sub_workflow, 'propagate-configuration')
+
+        if self.configuration:
+            configuration = etree.SubElement(sub_workflow, 'configuration')
+            for name, value in self.configuration.iteritems():
+                config_property = etree.SubElement(configuration, 'property')
+                etree.SubElement(config_property, 'name').text = name
+                etree.SubElement(config_property, 'value').text = value
+
+        return action
+
+
+SLA_NAMESPACE = 'uri:oozie:sla:0.2'
+WORKFLOW_NAMESPACE = 'uri:oozie:workflow:0.4'
+# the first workflow schema accepting sla:info
+SLA_WORKFLOW_NAMESPACE = 'uri:oozie:workflow:0.5'
+
+
+class SLA(object):
+    def __init__(self, nominal_time, should_end, should_start=None, max_duration=None, alert_events=None,
+                 alert_contact=None, notification_msg=None, upstream_apps=None):
+        """
+        A service level agreement of an action or a workflow (serialized as sla:info)
+
+        :param nominal_time: the time the job is expected to run for, a UTC datetime or an EL expression
+                             (e.g: ${coord:nominalTime()})
+        :type nominal_time: datetime.datetime or basestring
+        :param should_end: minutes after the nominal time by which the job should end, or an EL expression
+        :type should_end: int or float or basestring
+        :param should_start: minutes after the nominal time by which the job should start, or an EL expression
+        :type should_start: int or float or basestring
+        :param max_duration: maximal minutes the job should run, or an EL expression
+        :type max_duration: int or float or basestring
+        :param alert_events: the misses to alert on (e.g: ['start_miss', 'end_miss', 'duration_miss'])
+        :type alert_events: list[str]
+        :param alert_contact: comma separated list of emails to alert
+        :type alert_contact: str
+        :param notification_msg: a message to add to the alerts
+        :param upstream_apps: the applications the job depends on
+        """
+        self.nominal_time = nominal_time
+        self.should_start = should_start
+        self.should_end = should_end
+        self.max_duration = max_duration
+        self.alert_events = alert_events or []
+        self.alert_contact = alert_contact
+        self.notification_msg = notification_msg
+        self.upstream_apps = upstream_apps
+
+    @staticmethod
+    def _minutes(value):
+        if isinstance(value, (int, long)):
+            return '${%d * MINUTES}' % value
+        if isinstance(value, float):
+            return '${%r * MINUTES}' % value
+        return value
+
+    def to_xml(self):
+        """
+        Serialize the SLA to XML element tree
+        :rtype : etree.Element
+        """
+        nominal_time = self.nominal_time
+        if isinstance(nominal_time, datetime.datetime):
+            nominal_time = nominal_time.strftime(utils.OOZIE_TIME_FORMAT)
+        info = etree.Element('{%s}info' % SLA_NAMESPACE, nsmap={'sla': SLA_NAMESPACE})
+        etree.SubElement(info, '{%s}nominal-time' % SLA_NAMESPACE).text = nominal_time
+        if self.should_start is not None:
+            etree.SubElement(info, '{%s}should-start' % SLA_NAMESPACE).text = self._minutes(self.should_start)
+        etree.SubElement(info, '{%s}should-end' % SLA_NAMESPACE).text = self._minutes(self.should_end)
+        if self.max_duration is not None:
+            etree.SubElement(info, '{%s}max-duration' % SLA_NAMESPACE).text = self._minutes(self.max_duration)
+        if self.alert_events:
+            etree.SubElement(info, '{%s}alert-events' % SLA_NAMESPACE).text = ','.join(self.alert_events)
+        if self.alert_contact:
+            etree.SubElement(info, '{%s}alert-contact' % SLA_NAMESPACE).text = self.alert_contact
+        if self.notification_msg:
+            etree.SubElement(info, '{%s}notification-msg' % SLA_NAMESPACE).text = self.notification_msg
+        if self.upstream_apps:
+            etree.SubElement(info, '{%s}upstream-apps' % SLA_NAMESPACE).text = self.upstream_apps
+        return info
+
+
+class GlobalSection(object):
+    def __init__(self, job_tracker=None, name_node=None, job_xml=None, properties=None):
+        """
+        The global section of a workflow holds settings shared by all of its actions.
+        An action omits every setting the global section provides with the same value.
+
+        :param job_tracker: The JobTracker (e.g: localhost:8021)
+        :type job_tracker: basestring
+        :param name_node: The NameNode (e.g: hdfs://localhost:8020
+        :type name_node: basestring
+        :param job_xml: a Hadoop JobConf job.xml file bundled in the workflow application
+        :type job_xml: str
+        :param properties: a dict of hadoop configuration properties in key=value format,
+                           or a layered configuration (its layers are not serialized by the actions sharing them)
+        :type properties: dict or LayeredConfiguration
+        """
+        self.job_tracker = job_tracker
+        self.name_node = name_node
+        self.job_xml = job_xml
+        self.properties = properties or {}
+
+    @classmethod
+    def from_actions(cls, actions):
+        """
+        Create a global section holding every setting that all the given actions share.
+        The job tracker and the name node are shared only if they have the same value in every action that
+        supports them (e.g: the job tracker is not checked for FS actions).
+        The job-xml and the properties apply to every action that has a configuration,
+        so the job-xml is shared only if all these actions define it (e.g: not with a DistCp action).
+
+        :param actions: the actions of a workflow
+        :type actions: list[ActionNode]
+        :rtype : GlobalSection
+        """
+        shared = {}
+        for attribute in ('job_tracker', 'name_node'):
+            values = set(getattr(action, attribute) for action in actions if hasattr(action, attribute))
+            if len(values) == 1:
+                shared[attribute] = values.pop()
+
+        job_xmls = set(getattr(action, 'job_xml', None) for action in actions if hasattr(action, 'properties'))
+        if len(job_xmls) == 1:
+            shared['job_xml'] = job_xmls.pop()
+
+        # the global configuration applies to every action that has a configuration, even an empty one
+        configured = [action.properties for action in actions if hasattr(action, 'properties')]
+        layered = [properties for properties in configured if isinstance(properties, LayeredConfiguration)]
+        if layered:
+            # the layers all the actions start with, without comparing their properties.
+            # an action with a dict of properties (or none) would inherit the layers, nothing is shared then
+            layers = layered[0].layers if len(layered) == len(configured) > 1 else ()
+            for properties in layered[1:]:
+                count = 0
+                while count < min(len(layers), len(properties.layers)) and layers[count] is properties.layers[count]:
+                    count += 1
+                layers = layers[:count]
+            if layers:
+                shared['properties'] = LayeredConfiguration(layers)
+        elif len(configured) > 1:
+            shared_properties = set(configured[0].iteritems())
+            for properties in configured[1:]:
+                shared_properties.intersection_update(properties.iteritems())
+            shared['properties'] = dict(shared_properties)
+
+        return cls(**shared)
+
+    def provides(self, attribute, value):
+        """
+        Check if the global section provides a setting with the given value
+        :param attribute: the name of the setting (e.g: 'job_tracker')
+        :param value: the value of the setting in an action
+        :rtype : bool
+        """
+        return value is not None and getattr(self, attribute) == value
+
+    def get_local_properties(self, properties, job_xml=True):
+        """
+        Get the properties an action must still define itself
+        :param properties: the properties of the action
+        :type properties: dict or LayeredConfiguration
+        :param job_xml: the action serializes the layers with a path as job-xml elements
+        :type job_xml: bool
+        :rtype : dict
+        """
+        if isinstance(properties, LayeredConfiguration):
+            return properties.get_local_properties(self.properties, job_xml)
+        if not self.properties:
+            return properties
+        return dict((name, value) for name, value in properties.iteritems()
+                    if name not in self.properties or self.properties[name] != value)
+
+    def get_local_job_xmls(self, properties):
+        """
+        Get the job-xml files of the layers an action must still reference itself
+        :param properties: the properties of the action
+        :type properties: dict or LayeredConfiguration
+        :rtype : list[basestring]
+        """
+        if isinstance(properties, LayeredConfiguration):
+            return properties.get_job_xmls(self.properties)
+        return []
+
+    def is_empty(self):
+        """
+        :return: True if the global section does not provide any setting
+        :rtype : bool
+        """
+        return not (self.job_tracker or self.name_node or self.job_xml or self.properties)
+
+    def to_xml(self):
+        """
+        Serialize the global section to XML element tree
+        :rtype : etree.Element
+        """
+        root = etree.Element('global')
+
+        if self.job_tracker:
+            etree.SubElement(root, 'job-tracker').text = self.job_tracker
+
+        if self.name_node:
+            etree.SubElement(root, 'name-node').text = self.name_node
+
+        if self.job_xml:
+            etree.SubElement(root, 'job-xml').text = self.job_xml
+
+        properties = self.properties
+        if isinstance(properties, LayeredConfiguration):
+            for job_xml in properties.get_job_xmls():
+                etree.SubElement(root, 'job-xml').text = job_xml
+            properties = properties.get_local_properties()
+
+        if properties:
+            configuration = etree.SubElement(root, 'configuration')
+            for name, value in properties.iteritems():
+                config_property = etree.SubElement(configuration, 'property')
+                etree.SubElement(config_property, 'name').text = name
+                etree.SubElement(config_property, 'value').text = value
+
+        return root
+
+
 class Workflow(object):
-    def __init__(self, name, start, parameters=None):
+    def __init__(self, name, start, parameters=None, global_section=None, hoist_shared_settings=True, sla=None):
         """
         Create an oozie workflow.
         The workflow is created from a base start node.
@@ -712,23 +1149,44 @@ class Workflow(object):
         :param start: A start node
         :param parameters: a dict of key=value parameters to be passed to a workflow. The key is the name and the value
                             is default value of the parameters
+        :param global_section: settings shared by all the actions of the workflow
+        :type global_section: GlobalSection
+        :param hoist_shared_settings: if no global section is given, move the settings shared by all the actions
+                                      to a global section when serializing
+        :type hoist_shared_settings: bool
+        :param sla: the service level agreement of the whole workflow
+        :type sla: SLA
         """
         self.nodes = []
         self.name = name
         self.start = start
         self.parameters = parameters or {}
+        self.global_section = global_section
+        self.hoist_shared_settings = hoist_shared_settings
+        self.sla = sla
+
+    def get_global_section(self, nodes=None):
+        """
+        Get the global section to serialize, either the given one or the one holding the actions' shared settings
+        :param nodes: the nodes of the workflow, collected from 'start' if None
+        :type nodes: list[Node]
+        :rtype : GlobalSection
+        """
+        if self.global_section is not None:
+            return self.global_section
+        if self.hoist_shared_settings:
+            if nodes is None:
+                nodes = self._collect_all_nodes()
+            return GlobalSection.from_actions([node for node in nodes if isinstance(node, ActionNode)])
+        return GlobalSection()
 
     def to_xml(self):
         """
         Serialize the node to XML element tree
         :rtype : etree.Element
         """
-        self._collect_all_nodes()
-        workflow = etree.Element('workflow-app', name=self.name, xmlns="uri:oozie:workflow:0.4")
-        for node in self.nodes:
-            workflow.append(node.to_xml())
-
-        return workflow
+        nodes = self._collect_all_nodes()
+        return _workflow_to_xml(self.name, nodes, self.get_global_section(nodes), self.sla)
 
     def to_string(self, encoding='UTF-8', pretty_print=True, xml_declaration=False):
         """
@@ -744,20 +1202,322 @@ class Workflow(object):
     def __str__(self):
         return self.to_string()
 
+    def freeze(self):
+        """
+        Take an immutable snapshot of the workflow.
+        Later changes to the workflow or its nodes do not affect the snapshot, and the snapshot can be serialized
+        from many threads at once.
+
+        :rtype : FrozenWorkflow
+        :raise ValueError: if the workflow is not valid (see FrozenWorkflow)
+        """
+        nodes = self._collect_all_nodes()
+        return FrozenWorkflow(self.name, nodes, self.get_global_section(nodes), self.parameters, self.sla)
+
     def _collect_all_nodes(self):
         """
         Collect all sub nodes of the current workflow, starting from 'start'
+        :return: the nodes in breadth first order (also kept in self.nodes)
+        :rtype : list[Node]
         """
-        self.nodes = []
+        nodes = []
         visited = set()
         nodes_to_visit = [self.start]
         while nodes_to_visit:
             current_node = nodes_to_visit.pop(0)
-            self.nodes.append(current_node)
+            nodes.append(current_node)
             visited.add(current_node)
             for node in current_node.get_child_nodes():
                 if node not in visited and node not in nodes_to_visit:
                     nodes_to_visit.append(node)
+        # a single assignment, concurrent serializations never see a partial list
+        self.nodes = nodes
+        return nodes
+
+
+def _workflow_to_xml(name, nodes, global_section, sla=None):
+    if sla is not None or any(getattr(node, 'sla', None) is not None for node in nodes):
+        workflow = etree.Element('workflow-app', name=name, xmlns=SLA_WORKFLOW_NAMESPACE,
+                                 nsmap={'sla': SLA_NAMESPACE})
+    else:
+        workflow = etree.Element('workflow-app', name=name, xmlns=WORKFLOW_NAMESPACE)
+    if not global_section.is_empty():
+        workflow.append(global_section.to_xml())
+
+    for node in nodes:
+        if isinstance(node, ActionNode):
+            action = node.to_xml(global_section)
+            # sla:info is the last element of an action
+            if getattr(node, 'sla', None) is not None:
+                action.append(node.sla.to_xml())
+            workflow.append(action)
+        else:
+            workflow.append(node.to_xml())
+
+    if sla is not None:
+        workflow.append(sla.to_xml())
+    return workflow
+
+
+class _FrozenDict(dict):
+    """
+    A dict that can not be changed
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('%s is immutable' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        return hash(frozenset(self.iteritems()))
+
+    def __reduce__(self):
+        return _FrozenDict, (dict(self),)
+
+
+class _Frozen(object):
+    """
+    Mixin of the frozen copies of nodes and global sections, their attributes can not be changed
+    """
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is frozen' % self.__class__.__name__)
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return _make_frozen, (self.__class__.__bases__[1], self.__dict__)
+
+
+_frozen_classes = {}
+
+
+def _frozen_class(cls):
+    frozen_cls = _frozen_classes.get(cls)
+    if frozen_cls is None:
+        frozen_cls = _frozen_classes.setdefault(cls, type('Frozen' + cls.__name__, (_Frozen, cls), {}))
+    return frozen_cls
+
+
+def _freeze_value(value):
+    """
+    An immutable copy of an attribute value, links to nodes are replaced by the names of the nodes
+    """
+    if isinstance(value, Node):
+        return value.name
+    if isinstance(value, (SLA, LayeredConfiguration)):
+        return _make_frozen(value.__class__, value.__dict__)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, dict):
+        return _FrozenDict((key, _freeze_value(item)) for key, item in value.iteritems())
+    if isinstance(value, set):
+        return frozenset(_freeze_value(item) for item in value)
+    return value
+
+
+def _make_frozen(cls, attributes):
+    if issubclass(cls, _Frozen):
+        cls = cls.__bases__[1]
+    frozen = object.__new__(_frozen_class(cls))
+    frozen.__dict__.update((name, _freeze_value(value)) for name, value in attributes.iteritems())
+    return frozen
+
+
+def _transitions(node):
+    """
+    :return: the names of the nodes a (frozen) node transitions to
+    :rtype : list[str]
+    """
+    if isinstance(node, ActionNode):
+        return [node.ok, node.error]
+    if isinstance(node, StartNode):
+        return [node.name]
+    if isinstance(node, DecisionNode):
+        return [case_to for case_to, _ in node.cases] + [node.default]
+    if isinstance(node, ForkNode):
+        return list(node.paths)
+    if isinstance(node, JoinNode):
+        return [node.to]
+    return []
+
+
+class FrozenWorkflow(object):
+    def __init__(self, name, nodes, global_section, parameters=None, sla=None):
+        """
+        A validated, immutable and indexed snapshot of a workflow (see Workflow.freeze).
+        The nodes are frozen copies in which the transitions refer to nodes by name.
+
+        :param name: Name of the workflow
+        :param nodes: the nodes of the workflow, the start node first
+        :type nodes: list[Node]
+        :param global_section: settings shared by all the actions of the workflow
+        :type global_section: GlobalSection
+        :param parameters: the parameters of the workflow
+        :type parameters: dict
+        :param sla: the service level agreement of the whole workflow
+        :type sla: SLA
+        :raise ValueError: if node names repeat, a transition leads to a missing node or there is no end node
+        """
+        nodes = tuple(_make_frozen(node.__class__, node.__dict__) for node in nodes)
+        by_name = dict((node.name, node) for node in nodes if not isinstance(node, StartNode))
+        if len(by_name) != len([node for node in nodes if not isinstance(node, StartNode)]):
+            raise ValueError('node names of workflow %s are not unique' % name)
+        for node in nodes:
+            for target in _transitions(node):
+                if target not in by_name:
+                    raise ValueError('%s transitions to a missing node %s' % (node.name, target))
+        if not any(isinstance(node, EndNode) for node in nodes):
+            raise ValueError('workflow %s has no end node' % name)
+
+        attributes = {'name': name, 'nodes': nodes, 'parameters': _freeze_value(parameters or {}),
+                      'global_section': _make_frozen(global_section.__class__, global_section.__dict__),
+                      'sla': _freeze_value(sla),
+                      'actions': tuple(node for node in nodes if isinstance(node, ActionNode)),
+                      '_nodes_by_name': _FrozenDict(by_name), '_strings': {}}
+        self.__dict__.update(attributes)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FrozenWorkflow is frozen')
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return _make_frozen_workflow, (self.name, self.nodes, self.global_section, self.parameters, self.sla)
+
+    def __contains__(self, name):
+        return name in self._nodes_by_name
+
+    def get_node(self, name):
+        """
+        :return: the node with the given name
+        :rtype : Node
+        :raise KeyError: if the workflow has no such node
+        """
+        return self._nodes_by_name[name]
+
+    def get_transitions(self, name):
+        """
+        :return: the nodes the given node transitions to
+        :rtype : list[Node]
+        """
+        return [self._nodes_by_name[target] for target in _transitions(self.get_node(name))]
+
+    def to_xml(self):
+        """
+        Serialize the workflow to a new XML element tree
+        :rtype : etree.Element
+        """
+        return _workflow_to_xml(self.name, self.nodes, self.global_section, self.sla)
+
+    def to_string(self, encoding='UTF-8', pretty_print=True, xml_declaration=False):
+        """
+        Get string representation of the workflow (an XML string), computed once per format
+        :param encoding: output encoding
+        :param pretty_print: Pretty format the XML?
+        :param xml_declaration: To add XML declaration?
+        :return: basestring
+        """
+        key = (encoding, pretty_print, xml_declaration)
+        string = self._strings.get(key)
+        if string is None:
+            # racing threads compute the same string, the cache only ever holds complete values
+            string = self._strings[key] = etree.tostring(self.to_xml(), encoding=encoding,
+                                                         xml_declaration=xml_declaration, pretty_print=pretty_print)
+        return string
+
+    def __str__(self):
+        return self.to_string()
+
+
+def _make_frozen_workflow(name, nodes, global_section, parameters, sla):
+    return FrozenWorkflow(name, nodes, global_section, parameters, sla)
+
+
+def _serialize_workflow(task):
+    """
+    Serialize one workflow of serialize_many (runs in the worker processes)
+    :return: (name of the workflow, the XML string or the temporary path it was written to)
+    """
+    workflow, output_dir, temp_prefix, encoding, pretty_print, xml_declaration = task
+    if not isinstance(workflow, (Workflow, FrozenWorkflow)):
+        workflow = workflow()
+    string = workflow.to_string(encoding=encoding, pretty_print=pretty_print, xml_declaration=xml_declaration)
+    if output_dir is None:
+        return workflow.name, string
+    # renamed to <workflow name>.xml by serialize_many, once it checked no other workflow has the same name
+    fd, path = tempfile.mkstemp(suffix='.xml', prefix='%s%s.' % (temp_prefix, workflow.name), dir=output_dir)
+    with os.fdopen(fd, 'wb') as output:
+        output.write(string)
+    return workflow.name, path
+
+
+def serialize_many(workflows, processes=None, output_dir=None, encoding='UTF-8', pretty_print=True,
+                   xml_declaration=False, chunk_size=16):
+    """
+    Serialize many workflows using a pool of processes (one per core by default).
+    The results are generated in the order of the workflows, as soon as they are ready.
+
+    Workflows are frozen before they are sent to the workers, builders are called in the workers
+    (a builder must be picklable, e.g: a module level function or a functools.partial of one).
+
+    :param workflows: the workflows to serialize, or functions of no arguments building them
+    :type workflows: collections.Iterable[Workflow or FrozenWorkflow or callable]
+    :param processes: number of worker processes, serialize in the current process if 1
+    :type processes: int
+    :param output_dir: if given, every workflow is written to <output_dir>/<workflow name>.xml by the workers
+                       (the workflows must have unique names)
+    :type output_dir: basestring
+    :param encoding: output encoding
+    :param pretty_print: Pretty format the XML?
+    :param xml_declaration: To add XML declaration?
+    :param chunk_size: number of workflows sent to a worker at once
+    :type chunk_size: int
+    :return: a generator of (name of the workflow, XML string or the path it was written to)
+    :rtype : collections.Iterator[tuple]
+    :raise ValueError: if output_dir is given and two workflows have the same name
+    """
+    # the temporary files of this call, removed if it stops before renaming them
+    temp_prefix = '.%s.' % uuid.uuid4().hex
+    tasks = ((workflow.freeze() if isinstance(workflow, Workflow) else workflow, output_dir, temp_prefix, encoding,
+              pretty_print, xml_declaration) for workflow in workflows)
+    results = _serialize_tasks(tasks, processes, chunk_size)
+    if output_dir is None:
+        for result in results:
+            yield result
+        return
+
+    names = set()
+    try:
+        for name, temp_path in results:
+            if name in names:
+                raise ValueError('workflow name %s is not unique, the workflows would be written to the same file' %
+                                 name)
+            names.add(name)
+            path = os.path.join(output_dir, '%s.xml' % name)
+            os.rename(temp_path, path)
+            yield name, path
+    finally:
+        results.close()
+        for temp_path in glob.glob(os.path.join(output_dir, temp_prefix + '*')):
+            os.remove(temp_path)
+
+
+def _serialize_tasks(tasks, processes, chunk_size):
+    if processes == 1:
+        for task in tasks:
+            yield _serialize_workflow(task)
+        return
+
+    import multiprocessing
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(_serialize_workflow, tasks, chunk_size):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 if __name__ == "__main__":
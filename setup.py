@@ -4,6 +4,7 @@ setup(
     name='pyoozie',
     version='0.1.0',
     packages=['pyoozie'],
+    scripts=['bin/pyoozie'],
     url='https://github.com/pavel-lazar/pyoozie',
     license='Apache 2.0',
     author='Pavel Lazar',
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import subprocess
+import sys
+import unittest
+
+__author__ = 'pavel'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_modules(statement):
+    """
+    :return: the modules loaded by a fresh interpreter running the statement
+    """
+    output = subprocess.check_output([sys.executable, '-c', "import sys; %s; print ' '.join(sys.modules)" % statement],
+                                     cwd=ROOT)
+    return output.split()
+
+
+class ImportTest(unittest.TestCase):
+    def test_client_does_not_import_lxml(self):
+        modules = _loaded_modules('import pyoozie; pyoozie.Oozie')
+        self.assertIn('pyoozie.oozie', modules)
+        self.assertEqual([module for module in modules if module.split('.')[0] == 'lxml'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Licensed to Pavel Lazar,  under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Pavel Lazar licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyoozie.fakeserver import FakeOozieServer
+from pyoozie.oozie import JobAction, JobStatus
+from pyoozie.scheduler import DagScheduler, ScheduledJob, TaskState
+
+__author__ = 'pavel'
+
+
+class _Crash(Exception):
+    pass
+
+
+class _CrashingClient(object):
+    """
+    A client that crashes the scheduler right after the server applied an action
+    """
+
+    def __init__(self, oozie, action):
+        self.oozie = oozie
+        self.action = action
+
+    def __getattr__(self, name):
+        return getattr(self.oozie, name)
+
+    def do_job_action(self, job_id, action, config=None):
+        self.oozie.do_job_action(job_id, action, config)
+        if action == self.action:
+            raise _Crash()
+
+
+class DagSchedulerResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOozieServer(job_duration=0.1).start()
+        self.directory = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.directory, 'state.json')
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def _scheduler(self, oozie):
+        jobs = [ScheduledJob('a', {'oozie.wf.application.path': '/apps/a'}),
+                ScheduledJob('b', {'oozie.wf.application.path': '/apps/b'}, depends_on=['a'])]
+        return DagScheduler(oozie, jobs, state_path=self.state_path, poll_interval=0.05)
+
+    def test_resume_after_crash_between_start_and_save(self):
+        scheduler = self._scheduler(_CrashingClient(self.server.client(), JobAction.START))
+        self.assertRaises(_Crash, scheduler.step)
+        job_id = scheduler._jobs_by_name['a'].job_id
+        self.assertEqual(self._scheduler(self.server.client()).get_states()['a'], TaskState.SUBMITTING)
+
+        states = self._scheduler(self.server.client()).run()
+        self.assertEqual(states, {'a': TaskState.SUCCEEDED, 'b': TaskState.SUCCEEDED})
+        self.assertEqual(self.server.jobs[job_id].status, JobStatus.SUCCEEDED)
+        self.assertEqual(len(self.server.jobs), 2)
+
+    def test_resume_starts_job_left_in_prep(self):
+        client = self.server.client()
+        job_id = client.create_job({'oozie.wf.application.path': '/apps/a'})
+        scheduler = self._scheduler(client)
+        job = scheduler._jobs_by_name['a']
+        job.state, job.job_id = TaskState.SUBMITTING, job_id
+        scheduler.save_state()
+
+        states = self._scheduler(client).run()
+        self.assertEqual(states, {'a': TaskState.SUCCEEDED, 'b': TaskState.SUCCEEDED})
+        self.assertEqual(self.server.jobs[job_id].status, JobStatus.SUCCEEDED)
+        self.assertEqual(len(self.server.jobs), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()